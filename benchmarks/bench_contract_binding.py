@@ -0,0 +1,99 @@
+"""
+Binds the ABC ABI at many addresses with VyperContract and reports time and
+retained memory.
+
+    python -m benchmarks.bench_contract_binding [-n 10000] [--eager-count 300]
+
+"lazy" is the current behaviour: nothing is built until a method is used.
+"eager" reproduces the previous behaviour of building the web3 Contract and a
+method wrapper for every ABI function at bind time. It retains several hundred
+KB per instance, so it runs on `--eager-count` instances and is scaled up to n.
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+
+from web3 import Web3
+
+from scripts.compile_cache import compile_code
+from tests.utils import VyperContract
+
+
+def make_addresses(count):
+    return [Web3.toChecksumAddress("0x%040x" % (i + 1)) for i in range(count)]
+
+
+def bind_lazy(w3, abi, addresses):
+    contract_factory = w3.eth.contract(abi=abi, ContractFactoryClass=VyperContract)
+    return [contract_factory(address) for address in addresses]
+
+
+def bind_eager(w3, abi, addresses):
+    contract_factory = w3.eth.contract(abi=abi)
+    contracts = []
+    for address in addresses:
+        contract = VyperContract(contract_factory(address))
+        for fn_name in contract._classic_contract.functions:
+            getattr(contract, fn_name)
+        contracts.append(contract)
+    return contracts
+
+
+def measure(bind, w3, abi, count):
+    addresses = make_addresses(count)
+
+    gc.collect()
+    start = time.perf_counter()
+    contracts = bind(w3, abi, addresses)
+    elapsed = time.perf_counter() - start
+    del contracts
+
+    gc.collect()
+    tracemalloc.start()
+    contracts = bind(w3, abi, addresses)
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del contracts
+
+    return elapsed, retained
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("-n", "--count", type=int, default=10000)
+    parser.add_argument("--eager-count", type=int, default=300)
+    args = parser.parse_args()
+
+    with open("contracts/ABC.vy") as f:
+        abi = compile_code(f.read(), ["abi", "bytecode"])["abi"]
+
+    w3 = Web3()
+    print("Binding ABC (%d ABI entries) at %d addresses" % (len(abi), args.count))
+
+    lazy_time, lazy_memory = measure(bind_lazy, w3, abi, args.count)
+
+    eager_count = min(args.eager_count, args.count)
+    eager_time, eager_memory = measure(bind_eager, w3, abi, eager_count)
+    scale = args.count / eager_count
+    eager_time, eager_memory = eager_time * scale, eager_memory * scale
+
+    for label, elapsed, retained in (
+        ("eager", eager_time, eager_memory),
+        ("lazy", lazy_time, lazy_memory),
+    ):
+        print(
+            "%-6s %9.3fs  %9.1f MB  (%.1f us, %.1f KB per instance)"
+            % (
+                label,
+                elapsed,
+                retained / 2 ** 20,
+                elapsed / args.count * 1e6,
+                retained / args.count / 2 ** 10,
+            )
+        )
+    if scale != 1:
+        print("eager figures scaled from %d instances" % eager_count)
+    print(
+        "lazy saves %.2fs and %.1f MB" % (eager_time - lazy_time, (eager_memory - lazy_memory) / 2 ** 20)
+    )
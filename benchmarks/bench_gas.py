@@ -0,0 +1,432 @@
+"""
+Records the gas used by every public function of ABC, TokenService and
+mockTokenCall and compares it with a JSON baseline.
+
+    python -m benchmarks.bench_gas [--sizes 1,10,25,50,100] [--threshold 0.01] [--update]
+
+Every entry is the `gasUsed` of a mined transaction, including the 21000
+intrinsic gas, so constant functions are sent as transactions as well.
+Batch mints, batch transfers, balanceOfBatch and the token call's batch
+functions are swept over `--sizes` and recorded as `name[size]`.
+
+Functions that only accept calls from another contract, such as
+TokenService.mintTokens, are covered by the entry point that calls them
+(see `VIA`). The chain starts from a fixed genesis timestamp, so block
+hashes, and with them the token call's skip list levels, are the same on
+every run.
+
+Exits with status 1 if any entry uses more than `--threshold` (a fraction)
+above its baseline. `--update` rewrites the baseline instead.
+"""
+import argparse
+import json
+import os
+import sys
+from contextlib import contextmanager
+
+from eth_utils import to_checksum_address
+
+from scripts.batching import MAX_BATCH_SIZE, chunks, pad_batch
+from scripts.chain import build_tester, build_w3
+from scripts.const import TYPE_NF_BIT, ZERO_ADDRESS
+from scripts.utils import TransactionReverted, vcompile
+
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "gas_baseline.json")
+CONTRACTS = ("ABC", "TokenService", "mockTokenCall")
+SIZES = (1, 10, 25, 50, 100)
+GENESIS_TIMESTAMP = 1577836800
+# A mint of 100 NFTs needs about 7M gas and fits an 8M block, but mockTokenCall's batches of
+# 100 need about 9.8M.
+GENESIS_GAS_LIMIT = 40000000
+ERC1155_INTERFACE_ID = bytes.fromhex("d9b67a26")
+
+# Functions restricted to calls from another contract, and the entry point measuring them.
+VIA = {
+    "ABC.updateBalanceOnNFTTransfer": "TokenService.buyToken",
+    "ABC.docsSubmitted": "mockTokenCall.docsSubmitted",
+    "ABC.userQualified": "mockTokenCall.userQualified",
+    "ABC.userRejected": "mockTokenCall.userRejected",
+    "ABC.finalize": "mockTokenCall.finalize",
+    "TokenService.mintTokens": "ABC.mintNonFungibleToken",
+    "TokenService.applyToken": "ABC.applyToken",
+    "TokenService.removeToken": "ABC.removeToken",
+    "TokenService.userRejected": "mockTokenCall.userRejected",
+    "TokenService.docsSubmitted": "mockTokenCall.docsSubmitted",
+    "TokenService.userQualified": "mockTokenCall.userQualified",
+    "TokenService.finalize": "mockTokenCall.finalize",
+    "TokenService.setOwner": "ABC.safeTransferFrom",
+    "mockTokenCall.applyToken": "ABC.applyToken",
+    "mockTokenCall.removeToken": "ABC.removeToken",
+}
+
+# Constant functions measured by the sweeps rather than with default arguments.
+SWEPT_VIEWS = {"ABC.balanceOfBatch"}
+
+
+def addresses(count):
+    return [to_checksum_address("0x%040x" % (i + 1)) for i in range(count)]
+
+
+class GasBench:
+    def __init__(self, sizes=SIZES):
+        self.sizes = sorted(sizes)
+        self.tester = build_tester(gas_limit=GENESIS_GAS_LIMIT, timestamp=GENESIS_TIMESTAMP)
+        self.w3 = build_w3(self.tester)
+        self.ao, self.to, self.wo = self.w3.eth.accounts[:3]
+        self.abis = {}
+        self.results = {}
+
+    @contextmanager
+    def isolated(self):
+        snapshot_id = self.tester.take_snapshot()
+        try:
+            yield
+        finally:
+            self.tester.revert_to_snapshot(snapshot_id)
+
+    def _mine(self, tx, key):
+        receipt = self.w3.eth.waitForTransactionReceipt(tx)
+        if not receipt.status:
+            raise TransactionReverted(receipt)
+        if key is not None:
+            self.results[key] = receipt.gasUsed
+        return receipt
+
+    def _params(self, sender, value=0):
+        # An explicit gas limit skips estimation, which would double the runtime.
+        gas = self.w3.eth.getBlock("pending").gasLimit
+        return {"from": sender, "gas": gas, "gasPrice": 0, "value": value}
+
+    def send(self, func, sender, key=None, value=0):
+        return self._mine(func.transact(self._params(sender, value)), key)
+
+    def deploy(self, name, *args, record=True):
+        compiled_contract = vcompile("contracts/%s.vy" % name)
+        self.abis[name] = compiled_contract["abi"]
+        factory = self.w3.eth.contract(
+            abi=compiled_contract["abi"], bytecode=compiled_contract["bytecode"]
+        )
+        tx_hash = factory.constructor(*args).transact(self._params(self.ao))
+        receipt = self._mine(tx_hash, "%s.__init__" % name if record else None)
+        return self.w3.eth.contract(address=receipt.contractAddress, abi=compiled_contract["abi"])
+
+    def time_travel(self, seconds):
+        self.tester.time_travel(self.w3.eth.getBlock("latest").timestamp + seconds)
+
+    def mint_nfts(self, count, to):
+        for batch in chunks([to] * count):
+            self.send(
+                self.abc.functions.mintNonFungibleToken(
+                    self.nf_type, pad_batch(batch, default_value=ZERO_ADDRESS)
+                ),
+                self.ao,
+            )
+
+    def measure_views(self, name, contract, args_by_type):
+        for abi in self.abis[name]:
+            key = "%s.%s" % (name, abi.get("name"))
+            if abi["type"] != "function" or not abi["constant"] or key in SWEPT_VIEWS:
+                continue
+            args = [args_by_type[param["type"]] for param in abi["inputs"]]
+            self.send(contract.get_function_by_name(abi["name"])(*args), self.ao, key)
+
+    def setup(self):
+        ao = self.ao
+        self.abc = self.deploy("ABC")
+        self.send(self.abc.functions.createToken("Non-Fungible", True), ao, "ABC.createToken")
+        self.nf_type = TYPE_NF_BIT | 1 << 128
+
+        self.service = self.deploy("TokenService", self.abc.address, self.nf_type)
+        self.send(
+            self.abc.functions.setTokenService(self.service.address, self.nf_type),
+            ao,
+            "ABC.setTokenService",
+        )
+        self.send(
+            self.abc.functions.setMintTokenApproval(self.nf_type, ao, True),
+            ao,
+            "ABC.setMintTokenApproval",
+        )
+        self.send(self.abc.functions.setURI("Non-Fungible v2", self.nf_type), ao, "ABC.setURI")
+
+        # Every item minted below is accepted, so finalize burns rather than rejects.
+        max_tokens = max(self.sizes) + 1
+        now = self.w3.eth.getBlock("latest").timestamp
+        self.token_call = self.deploy(
+            "mockTokenCall",
+            self.abc.address,
+            self.nf_type,
+            0,
+            max_tokens,
+            max_tokens,
+            now,
+            now + 3600,
+        )
+
+    def sweep_mints(self):
+        for size in self.sizes:
+            with self.isolated():
+                to = pad_batch(addresses(size), default_value=ZERO_ADDRESS)
+                self.send(
+                    self.abc.functions.mintNonFungibleToken(self.nf_type, to),
+                    self.ao,
+                    "ABC.mintNonFungibleToken[%d]" % size,
+                )
+                self.send(self.abc.functions.createToken("Fungible", False), self.ao)
+                fungible_type = self.abc.functions.nonce().call({"gas": 100000}) << 128
+                self.send(
+                    self.abc.functions.mintFungibleToken(
+                        fungible_type, to, pad_batch([100] * size)
+                    ),
+                    self.ao,
+                    "ABC.mintFungibleToken[%d]" % size,
+                )
+
+    def mint_world(self):
+        # NF items 1..max(sizes) and one fungible type per batch slot, all owned by `to`.
+        count = max(self.sizes)
+        self.items = [self.nf_type | i for i in range(1, count + 1)]
+        self.mint_nfts(count, self.to)
+
+        self.fungible_types = []
+        for _ in range(count):
+            self.send(self.abc.functions.createToken("Fungible", False), self.ao)
+            fungible_type = self.abc.functions.nonce().call({"gas": 100000}) << 128
+            self.send(
+                self.abc.functions.mintFungibleToken(
+                    fungible_type,
+                    pad_batch([self.to], default_value=ZERO_ADDRESS),
+                    pad_batch([1000]),
+                ),
+                self.ao,
+            )
+            self.fungible_types.append(fungible_type)
+
+    def sweep_transfers(self):
+        functions = self.abc.functions
+        for size in self.sizes:
+            owners = pad_batch([self.to] * size, default_value=ZERO_ADDRESS)
+            self.send(
+                functions.balanceOfBatch(owners, pad_batch(self.items[:size])),
+                self.ao,
+                "ABC.balanceOfBatch[%d]" % size,
+            )
+            for label, token_ids, value in (
+                ("nft", self.items, 1),
+                ("fungible", self.fungible_types, 10),
+            ):
+                with self.isolated():
+                    self.send(
+                        functions.safeBatchTransferFrom(
+                            self.to,
+                            self.wo,
+                            pad_batch(token_ids[:size]),
+                            pad_batch([value] * size),
+                            b"",
+                        ),
+                        self.to,
+                        "ABC.safeBatchTransferFrom[%s:%d]" % (label, size),
+                    )
+                with self.isolated():
+                    self.send(
+                        functions.safeBatchTransferFrom(
+                            self.to,
+                            self.wo,
+                            pad_batch(token_ids[:size]),
+                            pad_batch([value] * size),
+                            b"",
+                            size,
+                        ),
+                        self.to,
+                        "ABC.safeBatchTransferFrom[%s:%d:count]" % (label, size),
+                    )
+
+    def measure_singles(self):
+        abc, service, token_call = self.abc.functions, self.service.functions, self.token_call
+        item, to, wo, ao = self.items[0], self.to, self.wo, self.ao
+
+        with self.isolated():
+            self.send(
+                abc.safeTransferFrom(to, wo, item, 1, b""), to, "ABC.safeTransferFrom[nft]"
+            )
+            self.send(
+                abc.safeTransferFrom(to, wo, self.fungible_types[0], 10, b""),
+                to,
+                "ABC.safeTransferFrom[fungible]",
+            )
+            self.send(abc.setApprovalForAll(wo, True), to, "ABC.setApprovalForAll")
+            self.send(abc.approve(wo, item, 0, 1), to, "ABC.approve")
+
+        with self.isolated():
+            expires = self.w3.eth.getBlock("latest").timestamp + 1000
+            self.send(
+                service.sellToken(item, wo, ZERO_ADDRESS, 1000, expires),
+                to,
+                "TokenService.sellToken",
+            )
+            self.send(
+                service.buyToken(item, ZERO_ADDRESS), wo, "TokenService.buyToken", value=1000
+            )
+
+        with self.isolated():
+            functions = token_call.functions
+            self.send(abc.applyToken(item, token_call.address), to, "ABC.applyToken")
+            self.send(abc.removeToken(item), to, "ABC.removeToken")
+            self.send(abc.applyToken(item, token_call.address), to)
+            self.send(functions.userRejected(item), ao, "mockTokenCall.userRejected")
+            self.send(abc.applyToken(item, token_call.address), to)
+            self.send(functions.getTokenTypeIndex(item), ao, "mockTokenCall.getTokenTypeIndex")
+            self.send(functions.docsSubmitted(item), ao, "mockTokenCall.docsSubmitted")
+            self.send(functions.userQualified(item), ao, "mockTokenCall.userQualified")
+            # The state matrix only allows unPause while the call is not paused.
+            self.send(functions.unPause(), ao, "mockTokenCall.unPause")
+            self.send(functions.pause(), ao, "mockTokenCall.pause")
+
+            self.measure_views(
+                "ABC",
+                self.abc,
+                {"uint256": item, "address": to, "bytes": ERC1155_INTERFACE_ID},
+            )
+            self.measure_views("TokenService", self.service, {"uint256": item})
+            self.measure_views("mockTokenCall", token_call, {"uint256": item, "int128": 0})
+
+        with self.isolated():
+            # A token call with no applications can be destroyed straight away.
+            now = self.w3.eth.getBlock("latest").timestamp
+            empty_call = self.deploy(
+                "mockTokenCall", self.abc.address, self.nf_type, 0, 1, 1, now, now + 3600,
+                record=False,
+            )
+            self.send(empty_call.functions.destroyTokenCall(), ao, "mockTokenCall.destroyTokenCall")
+
+    def sweep_token_call(self):
+        for item in self.items:
+            self.send(self.abc.functions.applyToken(item, self.token_call.address), self.to)
+
+        functions = self.token_call.functions
+        for size in self.sizes:
+            with self.isolated():
+                token_ids = pad_batch(self.items[:size])
+                self.send(
+                    functions.docSubmittedBatch(token_ids),
+                    self.ao,
+                    "mockTokenCall.docSubmittedBatch[%d]" % size,
+                )
+                self.send(
+                    functions.userQualifiedBatch(token_ids),
+                    self.ao,
+                    "mockTokenCall.userQualifiedBatch[%d]" % size,
+                )
+                self.time_travel(3600)
+                self.send(functions.finalize(size), self.ao, "mockTokenCall.finalize[%d]" % size)
+
+    def run(self):
+        self.setup()
+        self.sweep_mints()
+        self.mint_world()
+        self.sweep_transfers()
+        self.measure_singles()
+        self.sweep_token_call()
+        return self.results
+
+    def uncovered(self):
+        """
+        Returns the public functions with neither an entry nor a `VIA` entry point.
+        """
+        names = {key.split("[")[0] for key in self.results}
+        missing = []
+        for contract_name, abi in sorted(self.abis.items()):
+            for entry in abi:
+                if entry["type"] != "function":
+                    continue
+                name = "%s.%s" % (contract_name, entry["name"])
+                if name not in names and VIA.get(name) not in names:
+                    missing.append(name)
+        return missing
+
+
+def stale_via(abis):
+    """
+    Returns the `VIA` entries whose function or entry point is not a function in `abis`,
+    a dict of contract name to ABI.
+    """
+    names = {
+        "%s.%s" % (contract_name, entry["name"])
+        for contract_name, abi in abis.items()
+        for entry in abi
+        if entry["type"] == "function"
+    }
+    return sorted(name for name, via in VIA.items() if name not in names or via not in names)
+
+
+def compare(baseline, results, threshold):
+    """
+    Returns `(regressions, improvements, added, removed)`. The first two are lists of
+    `(key, baseline gas, gas)`, the others lists of keys.
+    """
+    regressions, improvements = [], []
+    for key in sorted(set(baseline) & set(results)):
+        old, new = baseline[key], results[key]
+        if new > old * (1 + threshold):
+            regressions.append((key, old, new))
+        elif new < old:
+            improvements.append((key, old, new))
+    added = sorted(set(results) - set(baseline))
+    removed = sorted(set(baseline) - set(results))
+    return regressions, improvements, added, removed
+
+
+def format_change(key, old, new):
+    return "%-50s %10d -> %10d (%+.2f%%)" % (key, old, new, (new - old) * 100 / old)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--sizes",
+        type=lambda value: [int(size) for size in value.split(",")],
+        default=list(SIZES),
+        help="batch sizes to sweep, at most %d" % MAX_BATCH_SIZE,
+    )
+    parser.add_argument("--threshold", type=float, default=0.01)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--update", action="store_true", help="rewrite the baseline")
+    args = parser.parse_args()
+
+    bench = GasBench(args.sizes)
+    results = bench.run()
+    missing = bench.uncovered()
+    if missing:
+        sys.exit("No gas entry for: %s" % ", ".join(missing))
+
+    if args.update or not os.path.exists(args.baseline):
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print("Wrote %d entries to %s" % (len(results), args.baseline))
+        sys.exit()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions, improvements, added, removed = compare(baseline, results, args.threshold)
+
+    print(
+        "%d entries, %d within %.1f%% of %s"
+        % (
+            len(results),
+            len(results) - len(regressions) - len(added),
+            args.threshold * 100,
+            args.baseline,
+        )
+    )
+    for key, old, new in improvements:
+        print("improved   " + format_change(key, old, new))
+    for key in added:
+        print("new        %-50s %10d" % (key, results[key]))
+    for key in removed:
+        print("not run    %s" % key)
+    for key, old, new in regressions:
+        print("REGRESSED  " + format_change(key, old, new))
+    if regressions:
+        sys.exit(1)
@@ -0,0 +1,539 @@
+"""
+Drives TokenService through random event sequences and checks every result against a
+Python model of its state machine.
+
+    python -m benchmarks.bench_state_machine [--events 1000] [--tokens 20] [--accounts 5]
+
+Each step picks one of mint, apply, remove, sell, reject, docs, qualify, finalize or buy, a
+token and, usually, the account allowed to send the event; otherwise a random account.
+Token calls take applications for `--round-size` steps and are then closed by moving the
+chain's clock, so finalize and late token call events run against closed calls.
+
+The model derives a token's state from its fields like `_getState` and accepts an event
+when `STATE_TRANSITIONS` has an exit state for it and the changed token is in that state,
+like `preStateTransition` and `postStateTransition`. A transaction that succeeds where the
+model expects a revert, or the other way round, or a token whose on-chain state or owner
+differs from the model stops the run with `ModelMismatch`.
+
+Reports transitions per second, and gas and TokenService's SLOADs and SSTOREs per event type.
+"""
+import argparse
+import random
+import sys
+import time
+from collections import Counter, defaultdict
+
+from eth_utils import to_canonical_address
+
+from scripts.batching import pad_batch
+from scripts.chain import build_tester, build_w3
+from scripts.const import TYPE_NF_BIT, ZERO_ADDRESS
+from scripts.utils import vcompile
+
+
+GENESIS_TIMESTAMP = 1577836800
+GENESIS_GAS_LIMIT = 40000000
+CALL_PARAMS = {"gas": 1000000}
+TEN_DAYS = 3600 * 24 * 10
+
+UNKNOWN, AVAILABLE, EAPAPPLIED, EAPPROCESSING, EAPAPROVED, OPTIONED, BURNED = range(7)
+STATE_NAMES = [
+    "UNKNOWN",
+    "AVAILABLE",
+    "EAPAPPLIED",
+    "EAPPROCESSING",
+    "EAPAPROVED",
+    "OPTIONED",
+    "BURNED",
+]
+
+# TokenService's events in the order of its state transition matrix.
+EVENTS = ["mint", "apply", "remove", "sell", "reject", "docs", "qualify", "finalize", "buy"]
+
+# A copy of the matrix TokenService packs into STATE_TRANSITIONS: one row per event, indexed
+# by the entry state.
+STATE_TRANSITIONS = [
+    [AVAILABLE, 0, 0, 0, 0, 0, 0],
+    [0, EAPAPPLIED, 0, 0, 0, 0, 0],
+    [0, 0, AVAILABLE, AVAILABLE, 0, 0, 0],
+    [0, OPTIONED, 0, 0, 0, 0, 0],
+    [0, 0, AVAILABLE, AVAILABLE, AVAILABLE, 0, 0],
+    [0, 0, EAPPROCESSING, 0, 0, 0, 0],
+    [0, 0, 0, EAPAPROVED, 0, 0, 0],
+    [0, 0, 0, 0, BURNED, 0, 0],
+    [0, 0, 0, 0, 0, AVAILABLE, 0],
+]
+
+
+class ModelMismatch(AssertionError):
+    pass
+
+
+class TokenModel:
+    def __init__(self, tid, owner):
+        self.tid = tid
+        self.owner = owner
+        self.buyer = ZERO_ADDRESS
+        self.price = 0
+        self.expires = 0
+        self.call = None
+        self.docs_submitted = False
+        self.user_qualified = False
+
+    def copy(self):
+        token = TokenModel(self.tid, self.owner)
+        token.__dict__.update(self.__dict__)
+        return token
+
+    def state(self, timestamp):
+        if self.owner == ZERO_ADDRESS:
+            return BURNED
+        if self.buyer == ZERO_ADDRESS:
+            if self.call is None:
+                return AVAILABLE
+            if self.user_qualified:
+                return EAPAPROVED if self.docs_submitted else UNKNOWN
+            return EAPPROCESSING if self.docs_submitted else EAPAPPLIED
+        if self.call is None:
+            return OPTIONED if self.expires >= timestamp else AVAILABLE
+        return UNKNOWN
+
+
+class CallModel:
+    def __init__(self, contract, start, end):
+        self.contract = contract
+        self.start = start
+        self.end = end
+        self.tokens = set()
+        self.destroyed = False
+
+    def is_open(self, timestamp):
+        return self.start <= timestamp < self.end
+
+    def is_closed(self, timestamp):
+        return timestamp >= self.end
+
+
+def transition(event, token, timestamp, change):
+    """
+    Returns a copy of `token` changed by `change` if `event` is allowed from the token's
+    state and leaves it in the exit state, otherwise None.
+    """
+    exit_state = STATE_TRANSITIONS[EVENTS.index(event)][token.state(timestamp)]
+    if exit_state == UNKNOWN:
+        return None
+    changed = token.copy()
+    change(changed)
+    if changed.state(timestamp) != exit_state:
+        return None
+    return changed
+
+
+class StorageOpCounter:
+
+    """
+    Counts the SLOADs and SSTOREs run against the storage of `address` while entered, by
+    wrapping those two opcodes of `computation_class`.
+    """
+
+    MNEMONICS = ("SLOAD", "SSTORE")
+
+    def __init__(self, computation_class, address):
+        self.computation_class = computation_class
+        self.address = to_canonical_address(address)
+        self.counts = Counter()
+
+    def _wrap(self, opcode_fn):
+        def counted(computation):
+            if computation.msg.storage_address == self.address:
+                self.counts[opcode_fn.mnemonic] += 1
+            return opcode_fn(computation=computation)
+
+        counted.mnemonic = opcode_fn.mnemonic
+        return counted
+
+    def __enter__(self):
+        self.opcodes = self.computation_class.opcodes
+        self.computation_class.opcodes = {
+            value: self._wrap(opcode_fn) if opcode_fn.mnemonic in self.MNEMONICS else opcode_fn
+            for value, opcode_fn in self.opcodes.items()
+        }
+        return self
+
+    def __exit__(self, *exc_info):
+        self.computation_class.opcodes = self.opcodes
+
+    def take(self):
+        counts = tuple(self.counts[mnemonic] for mnemonic in self.MNEMONICS)
+        self.counts.clear()
+        return counts
+
+
+def leave_call(token):
+    token.call = None
+    token.docs_submitted = token.user_qualified = False
+
+
+class StateMachineFuzzer:
+    def __init__(self, tokens=20, accounts=5, seed=0, round_size=50, valid_sender=0.8):
+        self.max_tokens = tokens
+        self.seed = seed
+        self.round_size = round_size
+        self.valid_sender = valid_sender
+        self.rng = random.Random(seed)
+
+        self.tester = build_tester(gas_limit=GENESIS_GAS_LIMIT, timestamp=GENESIS_TIMESTAMP)
+        self.w3 = build_w3(self.tester)
+        self.ao = self.w3.eth.accounts[0]
+        self.accounts = self.w3.eth.accounts[1 : accounts + 1]
+
+        self.tokens = {}
+        self.balances = defaultdict(int)
+        self.calls = []
+        self.steps = 0
+        self.gas = defaultdict(list)
+        self.storage_ops = defaultdict(list)
+        self.reverted = defaultdict(int)
+        self.seconds = 0.0
+
+    def _params(self, sender, value=0):
+        # An explicit gas limit skips estimation, and lets reverting transactions be mined.
+        gas = self.w3.eth.getBlock("pending").gasLimit
+        return {"from": sender, "gas": gas, "gasPrice": 0, "value": value}
+
+    def send(self, func, sender, value=0):
+        tx_hash = func.transact(self._params(sender, value))
+        return self.w3.eth.waitForTransactionReceipt(tx_hash)
+
+    def deploy(self, name, *args):
+        compiled_contract = vcompile("contracts/%s.vy" % name)
+        factory = self.w3.eth.contract(
+            abi=compiled_contract["abi"], bytecode=compiled_contract["bytecode"]
+        )
+        tx_hash = factory.constructor(*args).transact(self._params(self.ao))
+        address = self.w3.eth.waitForTransactionReceipt(tx_hash).contractAddress
+        return self.w3.eth.contract(address=address, abi=compiled_contract["abi"])
+
+    def setup(self):
+        self.abc = self.deploy("ABC")
+        self.send(self.abc.functions.createToken("State machine", True), self.ao)
+        self.token_type = TYPE_NF_BIT | 1 << 128
+        self.service = self.deploy("TokenService", self.abc.address, self.token_type)
+        abc = self.abc.functions
+        self.send(abc.setTokenService(self.service.address, self.token_type), self.ao)
+        self.send(abc.setMintTokenApproval(self.token_type, self.ao, True), self.ao)
+        computation_class = self.tester.backend.chain.get_vm().state.computation_class
+        self.storage_counter = StorageOpCounter(computation_class, self.service.address)
+
+    def open_call(self):
+        if self.calls:
+            self.tester.time_travel(self.calls[-1].end)
+        start = self.w3.eth.getBlock("latest").timestamp
+        # A step mines at most one block a second, so the call stays open for its round.
+        end = start + 2 * self.round_size + 10
+        contract = self.deploy(
+            "mockTokenCall",
+            self.abc.address,
+            self.token_type,
+            0,
+            self.max_tokens,
+            self.max_tokens,
+            start,
+            end,
+        )
+        self.calls.append(CallModel(contract, start, end))
+
+    def live_call(self, token):
+        if token.call is not None and not token.call.destroyed:
+            return token.call
+        return None
+
+    def sender(self, allowed):
+        if allowed != ZERO_ADDRESS and self.rng.random() < self.valid_sender:
+            return allowed
+        return self.rng.choice([self.ao] + self.accounts)
+
+    # Each event returns the function to send, its sender and value, the token the model
+    # expects afterwards (None for a revert) and a callback that updates the rest of the model.
+
+    def mint(self, token, timestamp):
+        to = self.rng.choice(self.accounts)
+        sender = self.sender(self.ao)
+        func = self.abc.functions.mintNonFungibleToken(
+            self.token_type, pad_batch([to], default_value=ZERO_ADDRESS)
+        )
+
+        def commit(minted):
+            self.balances[to] += 1
+
+        expected = None
+        if sender == self.ao:
+            expected = TokenModel(self.token_type | len(self.tokens) + 1, to)
+        return func, sender, 0, expected, commit
+
+    def apply(self, token, timestamp):
+        call = self.calls[-1]
+        sender = self.sender(token.owner)
+        func = self.abc.functions.applyToken(token.tid, call.contract.address)
+
+        def change(changed):
+            changed.call = call
+            changed.docs_submitted = changed.user_qualified = False
+
+        expected = None
+        if sender == token.owner and call.is_open(timestamp):
+            expected = transition("apply", token, timestamp, change)
+        return func, sender, 0, expected, lambda applied: call.tokens.add(token.tid)
+
+    def remove(self, token, timestamp):
+        call = token.call
+        sender = self.sender(token.owner)
+        func = self.abc.functions.removeToken(token.tid)
+
+        expected = None
+        if sender == token.owner and call is not None and call.is_open(timestamp):
+            expected = transition("remove", token, timestamp, leave_call)
+        return func, sender, 0, expected, lambda removed: call.tokens.discard(token.tid)
+
+    def sell(self, token, timestamp):
+        sender = self.sender(token.owner)
+        buyer = self.rng.choice(self.accounts)
+        price = self.rng.randint(1, 1000)
+        # Short options run out within a few steps, so some buys come too late.
+        expires = timestamp + self.rng.choice([1, 3, 1000, TEN_DAYS + 1])
+        func = self.service.functions.sellToken(token.tid, buyer, ZERO_ADDRESS, price, expires)
+
+        def change(changed):
+            changed.buyer, changed.price, changed.expires = buyer, price, expires
+
+        expected = None
+        if sender == token.owner and expires <= timestamp + TEN_DAYS:
+            expected = transition("sell", token, timestamp, change)
+        return func, sender, 0, expected, None
+
+    def buy(self, token, timestamp):
+        seller = token.owner
+        sender = self.sender(token.buyer)
+        func = self.service.functions.buyToken(token.tid, ZERO_ADDRESS)
+
+        def change(changed):
+            changed.owner = changed.buyer
+            changed.buyer, changed.price, changed.expires = ZERO_ADDRESS, 0, 0
+
+        def commit(bought):
+            self.balances[seller] -= 1
+            self.balances[bought.owner] += 1
+
+        expected = None
+        if sender == token.buyer and token.expires > timestamp:
+            expected = transition("buy", token, timestamp, change)
+        return func, sender, token.price, expected, commit
+
+    def _token_call_event(self, event, function_name, token, timestamp, change):
+        # Sent through the call the token applied to, or the open one once that call has
+        # self-destructed: a transaction to a destroyed contract always succeeds.
+        call = self.live_call(token) or self.calls[-1]
+        sender = self.sender(self.ao)
+        func = call.contract.get_function_by_name(function_name)(token.tid)
+
+        expected = None
+        if sender == self.ao and token.call is call and not timestamp < call.start:
+            expected = transition(event, token, timestamp, change)
+        return func, sender, expected
+
+    def reject(self, token, timestamp):
+        call = token.call
+        func, sender, expected = self._token_call_event(
+            "reject", "userRejected", token, timestamp, leave_call
+        )
+        return func, sender, 0, expected, lambda rejected: call.tokens.discard(token.tid)
+
+    def docs(self, token, timestamp):
+        def change(changed):
+            changed.docs_submitted = True
+
+        func, sender, expected = self._token_call_event(
+            "docs", "docsSubmitted", token, timestamp, change
+        )
+        return func, sender, 0, expected, None
+
+    def qualify(self, token, timestamp):
+        def change(changed):
+            changed.user_qualified = True
+
+        func, sender, expected = self._token_call_event(
+            "qualify", "userQualified", token, timestamp, change
+        )
+        return func, sender, 0, expected, None
+
+    def finalize(self, token, timestamp):
+        # Finalizes the first application of the token's call, or of any live call.
+        call = self.live_call(token)
+        if call is None:
+            call = self.rng.choice([call for call in self.calls if not call.destroyed])
+        sender = self.sender(self.ao)
+        func = call.contract.functions.finalize(1)
+        first = self.tokens[min(call.tokens)] if call.tokens else None
+
+        def change(changed):
+            changed.owner = ZERO_ADDRESS
+
+        def commit(burned):
+            call.tokens.discard(burned.tid)
+            call.destroyed = not call.tokens
+
+        expected = None
+        if sender == self.ao and call.is_closed(timestamp):
+            if first is None:
+                # An empty call finishes and self-destructs without touching a token.
+                call.destroyed = True
+                return func, sender, 0, token, None
+            expected = transition("finalize", first, timestamp, change)
+        return func, sender, 0, expected, commit
+
+    def step(self):
+        if self.steps % self.round_size == 0:
+            self.open_call()
+        self.steps += 1
+
+        token = None
+        if len(self.tokens) < self.max_tokens and (
+            not self.tokens or self.rng.random() < 1 / len(EVENTS)
+        ):
+            event = "mint"
+        else:
+            event = self.rng.choice(EVENTS[1:])
+            token = self.tokens[self.rng.choice(sorted(self.tokens))]
+
+        timestamp = self.w3.eth.getBlock("pending").timestamp
+        func, sender, value, expected, commit = getattr(self, event)(token, timestamp)
+        start = time.perf_counter()
+        with self.storage_counter:
+            receipt = self.send(func, sender, value)
+        self.seconds += time.perf_counter() - start
+        storage_ops = self.storage_counter.take()
+
+        if bool(receipt.status) != (expected is not None):
+            raise ModelMismatch(
+                "seed %d, step %d: %s of %s in state %s from %s %s, the model expected %s"
+                % (
+                    self.seed,
+                    self.steps,
+                    event,
+                    hex(token.tid) if token else "a new token",
+                    STATE_NAMES[token.state(timestamp)] if token else "UNKNOWN",
+                    sender,
+                    "succeeded" if receipt.status else "reverted",
+                    "a revert" if receipt.status else "it to succeed",
+                )
+            )
+        if not receipt.status:
+            self.reverted[event] += 1
+            return
+
+        self.gas[event].append(receipt.gasUsed)
+        self.storage_ops[event].append(storage_ops)
+        if commit is not None:
+            commit(expected)
+        self.tokens[expected.tid] = expected
+        self.check_token(expected)
+
+    def check_token(self, token):
+        timestamp = self.w3.eth.getBlock("latest").timestamp
+        state = self.service.functions.get_state(token.tid).call(CALL_PARAMS)
+        owner = self.service.functions.tokens__owner(token.tid).call(CALL_PARAMS)
+        if (state, owner) != (token.state(timestamp), token.owner):
+            raise ModelMismatch(
+                "seed %d, step %d: token %s is %s and owned by %s, the model has %s and %s"
+                % (
+                    self.seed,
+                    self.steps,
+                    hex(token.tid),
+                    STATE_NAMES[state],
+                    owner,
+                    STATE_NAMES[token.state(timestamp)],
+                    token.owner,
+                )
+            )
+
+    def check_all(self):
+        for token in self.tokens.values():
+            self.check_token(token)
+        for account in self.accounts:
+            balance = self.abc.functions.balanceOf(account, self.token_type).call(CALL_PARAMS)
+            if balance != self.balances[account]:
+                raise ModelMismatch(
+                    "seed %d: %s holds %d tokens, the model has %d"
+                    % (self.seed, account, balance, self.balances[account])
+                )
+
+    def run(self, events):
+        self.setup()
+        for _ in range(events):
+            self.step()
+        self.check_all()
+        return self
+
+    def report(self):
+        transitions = sum(len(gas) for gas in self.gas.values())
+        events = transitions + sum(self.reverted.values())
+        seconds = self.seconds or float("inf")
+        lines = [
+            "%d events, %d transitions and %d expected reverts in %.2fs: "
+            "%.1f transitions/s, %.1f events/s"
+            % (
+                events,
+                transitions,
+                events - transitions,
+                self.seconds,
+                transitions / seconds,
+                events / seconds,
+            ),
+            "%-10s %6s %9s %10s %10s %10s %7s %7s"
+            % ("event", "ok", "reverted", "min gas", "mean gas", "max gas", "SLOAD", "SSTORE"),
+        ]
+        for event in EVENTS:
+            gas = self.gas.get(event) or [0]
+            # Mean TokenService storage reads and writes of the event's transitions.
+            storage_ops = self.storage_ops.get(event) or [(0, 0)]
+            sloads, sstores = (sum(ops) / len(storage_ops) for ops in zip(*storage_ops))
+            lines.append(
+                "%-10s %6d %9d %10d %10d %10d %7.1f %7.1f"
+                % (
+                    event,
+                    len(self.gas.get(event, [])),
+                    self.reverted.get(event, 0),
+                    min(gas),
+                    sum(gas) // len(gas),
+                    max(gas),
+                    sloads,
+                    sstores,
+                )
+            )
+        return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--events", type=int, default=1000)
+    parser.add_argument("--tokens", type=int, default=20)
+    parser.add_argument("--accounts", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--round-size", type=int, default=50, help="steps per token call")
+    parser.add_argument(
+        "--valid-sender",
+        type=float,
+        default=0.8,
+        help="chance of sending an event from the account allowed to",
+    )
+    args = parser.parse_args()
+
+    fuzzer = StateMachineFuzzer(
+        args.tokens, args.accounts, args.seed, args.round_size, args.valid_sender
+    )
+    try:
+        fuzzer.run(args.events)
+    except ModelMismatch as e:
+        print(fuzzer.report())
+        sys.exit(str(e))
+    print(fuzzer.report())
@@ -7,6 +7,9 @@ TYPE_NF_BIT: constant(uint256) = shift(1, 255) # 1000000...0000000
 BYTE_SIZE: constant(uint256) = 1024
 MAX_BATCH_SIZE: constant(uint256) = 100
 MAX_URI_LENGTH: constant(uint256) = 256
+# Batch transfers log one TransferBatch, with all MAX_BATCH_SIZE slots, from this many items
+# on; smaller batches log a TransferSingle per item, which costs less.
+TRANSFER_BATCH_LOG_COUNT: constant(uint256) = 20
 
 # bytes4(keccak256("onERC1155Received(address,address,uint256,uint256,bytes)"))
 ERC1155_ACCEPTED: constant(bytes[5]) = b'\xf2\x3a\x6e\x61'
@@ -63,8 +66,7 @@ contract NFTTokenService:
     def tokens__tco__tokenCall(_tokenId: uint256) -> address: constant
     def tokens__tco__docsSubmitted(_tokenId: uint256) -> bool: constant
     def tokens__tco__userQualified(_tokenId: uint256) -> bool: constant
-    def nextTid() -> uint256: constant
-    def mintToken(_owner: address, _sender: address): modifying
+    def mintTokens(_owners: address[100], _sender: address) -> uint256: modifying
     def applyToken(_tokenId: uint256, _tokenCall: address, _sender: address): modifying
     def removeToken(_tokenId: uint256, _sender: address): modifying
     def docsSubmitted(_tokenId: uint256, _sender: address): modifying
@@ -326,46 +328,83 @@ def safeBatchTransferFrom(
     _to: address,
     _tokenIds: uint256[MAX_BATCH_SIZE],
     _values: uint256[MAX_BATCH_SIZE],
-    _data: bytes[BYTE_SIZE]
+    _data: bytes[BYTE_SIZE],
+    _count: uint256 = 100  # MAX_BATCH_SIZE, as defaults must be literals
 ):
+    # With _count, only the first _count items are transferred and the loop stops there.
+    # TransferBatch and onERC1155BatchReceived still get the whole arrays, so when either is
+    # used the slots past _count must be empty.
     assert _to != ZERO_ADDRESS
+    assert _count <= MAX_BATCH_SIZE
     fromSpender: bool = _from != msg.sender and not self.isApprovedForAll[_from][msg.sender]
+    logItems: bool = _count < TRANSFER_BATCH_LOG_COUNT
+    toContract: bool = _to.is_contract
+    checkPadding: bool = not logItems or toContract
+    count: int128 = convert(_count, int128)
+
+    # Balances move once per run of items sharing a token type (an NFT's base type or a
+    # fungible id), so a batch of one type writes each balance once. The sender's balance
+    # is checked against the run's total, so a transfer to _from itself fails when a run
+    # holds more than _from's balance, even though no balance would change.
+    runType: uint256 = 0
+    runValue: uint256 = 0
+    fromBalance: uint256 = 0
 
     for i in range(MAX_BATCH_SIZE):
+        if i >= count:
+            if not checkPadding:
+                break
+            assert _tokenIds[i] == 0
+            continue
+
         tokenId: uint256 = _tokenIds[i]
         value: uint256 = _values[i]
 
         if tokenId == 0:
             continue
 
+        tokenType: uint256 = tokenId
+        typeValue: uint256 = value
         if self._isNonFungible(tokenId):
-            _tokenType: uint256 = self._getNonFungibleBaseType(tokenId)
+            tokenType = self._getNonFungibleBaseType(tokenId)
+            typeValue = 1
+            tokenService: address = self.tokenServices[tokenType]
 
-            assert NFTTokenService(self.tokenServices[_tokenType]).tokens__owner(tokenId) == _from
-            assert NFTTokenService(self.tokenServices[_tokenType]).tokens__option__expires(tokenId) < block.timestamp
-
-            assert self.balances[_tokenType][_from] >= 1
+            assert NFTTokenService(tokenService).tokens__owner(tokenId) == _from
+            assert NFTTokenService(tokenService).tokens__option__expires(tokenId) < block.timestamp
 
             if fromSpender:
                 assert self.allowance[_from][msg.sender][tokenId] >= 1
                 self.allowance[_from][msg.sender][tokenId] = 0
 
-            NFTTokenService(self.tokenServices[_tokenType]).setOwner(tokenId, _to)
-
-            self.balances[_tokenType][_from] = self.balances[_tokenType][_from] - 1
-            self.balances[_tokenType][_to] = self.balances[_tokenType][_to] + 1
-        else:
-            assert self.balances[tokenId][_from] >= value
-
-            if fromSpender:
-                self.allowance[_from][msg.sender][tokenId] = self.allowance[_from][msg.sender][tokenId] - value
-
-            self.balances[tokenId][_from] = self.balances[tokenId][_from] - value
-            self.balances[tokenId][_to] = self.balances[tokenId][_to] + value
-
-    log.TransferBatch(msg.sender, _from, _to, _tokenIds, _values)
-
-    if _to.is_contract:
+            NFTTokenService(tokenService).setOwner(tokenId, _to)
+        elif fromSpender:
+            self.allowance[_from][msg.sender][tokenId] = self.allowance[_from][msg.sender][tokenId] - value
+
+        if tokenType != runType:
+            # Inline, as a private call here would copy this function's arrays around it.
+            if runValue > 0:
+                fromBalance = self.balances[runType][_from]
+                assert fromBalance >= runValue
+                self.balances[runType][_from] = fromBalance - runValue
+                self.balances[runType][_to] = self.balances[runType][_to] + runValue
+            runType = tokenType
+            runValue = 0
+        runValue += typeValue
+
+        if logItems:
+            log.TransferSingle(msg.sender, _from, _to, tokenId, value)
+
+    if runValue > 0:
+        fromBalance = self.balances[runType][_from]
+        assert fromBalance >= runValue
+        self.balances[runType][_from] = fromBalance - runValue
+        self.balances[runType][_to] = self.balances[runType][_to] + runValue
+
+    if not logItems:
+        log.TransferBatch(msg.sender, _from, _to, _tokenIds, _values)
+
+    if toContract:
         self._doSafeBatchTransferAcceptanceCheck(msg.sender, _from, _to, _tokenIds, _values, _data)
 
 
@@ -415,14 +454,18 @@ def mintNonFungibleToken(_tokenTypeId: uint256, _to: address[MAX_BATCH_SIZE]):
     assert self._isNonFungible(_tokenTypeId)
     assert self.isApprovedToMintToken[_tokenTypeId][msg.sender]
     totalQty: uint256 = 0
+    tokenId: uint256 = 0
 
     for i in range(MAX_BATCH_SIZE):
         to: address = _to[i]
         if to == ZERO_ADDRESS:
             continue  # Skip zero address and continue to next address
 
-        tokenId: uint256 = NFTTokenService(self.tokenServices[_tokenTypeId]).nextTid()
-        NFTTokenService(self.tokenServices[_tokenTypeId]).mintToken(to, msg.sender)
+        if tokenId == 0:
+            # At the first recipient, so a batch of zero addresses never calls the service.
+            # It mints the whole batch, skipping zero addresses like this loop, with
+            # consecutive ids from the one it returns (never 0, as it has the type bits).
+            tokenId = NFTTokenService(self.tokenServices[_tokenTypeId]).mintTokens(_to, msg.sender)
 
         self.balances[_tokenTypeId][to] = self.balances[_tokenTypeId][to] + 1
         totalQty += 1
@@ -430,6 +473,7 @@ def mintNonFungibleToken(_tokenTypeId: uint256, _to: address[MAX_BATCH_SIZE]):
         log.TransferSingle(msg.sender, ZERO_ADDRESS, to, tokenId, 1)
         if to.is_contract:
             self._doSafeTransferAcceptanceCheck(msg.sender, msg.sender, to, tokenId, 1, '')
+        tokenId += 1
 
     if totalQty > 0:
         self.tokenTypes[_tokenTypeId].mintedQty  += totalQty
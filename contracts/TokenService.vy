@@ -4,16 +4,33 @@ struct Option:
     currency: address
     expires: timestamp
 
-struct TCO:
+# Flat, as Vyper can not return nested structs from private functions.
+struct Token:
+    tid: uint256
+    owner: address
+    # Option
+    buyer: address
+    price: uint256
+    currency: address
+    expires: timestamp
+    # Token call
     tokenCall: address
     docsSubmitted: bool
     userQualified: bool
 
-struct Token:
-    tid: uint256
+# A Token in storage takes five words instead of nine; see _loadToken.
+struct PackedToken:
     owner: address
-    option: Option
-    tco: TCO
+    option: uint256     # buyer address | expires << EXPIRES_SHIFT
+    price: uint256
+    currency: address
+    tco: uint256        # token call address | MINTED | DOCS_SUBMITTED | USER_QUALIFIED
+
+# Unit-typed constants break as_unitless_number in this compiler, so the units that turn
+# packed seconds back into a timestamp come from a struct literal.
+struct Clock:
+    epoch: timestamp
+    second: timedelta
 
 struct Transaction:
     tid: uint256
@@ -48,6 +65,18 @@ UnAuthorizedEventRequest: event({_event: int128, _origin_address: address, _auth
 # keccak256("onRequestFromTokenCall()") 
 FROM_TOKEN_CALL: constant(bytes32) = 0x095332897a16faaf295be718bfc48721e7de9e87ff680ab2dd0179fb892881ea
 
+MAX_BATCH_SIZE: constant(uint256) = 100
+
+
+# Packed token fields; addresses take the low 160 bits of their word.
+# The minted flag sits with the token call, whose word is rewritten by every application
+# anyway, so owner and option still clear to zero (and earn their refunds) when reset.
+ADDRESS_MASK: constant(uint256) = 2**160 - 1
+MINTED: constant(uint256) = 2**160
+DOCS_SUBMITTED: constant(uint256) = 2**161
+USER_QUALIFIED: constant(uint256) = 2**162
+EXPIRES_SHIFT: constant(int128) = 160
+
 
 ## STATES ##
 UNKNOWN: constant(int128) = 0
@@ -71,50 +100,72 @@ TCO_FINALIZE: constant(int128) = 7
 WO_BUY_TOKEN: constant(int128) = 8
 
 
-StateTransitionMatrix: constant(int128[7][9]) = \
-	[	[AVAILABLE,0,0,0,0,0,0],	# AO_MINT_TOKEN
-		[0,EAPAPPLIED,0,0,0,0,0],	# TO_APPLY_TOKEN
-		[0,0,AVAILABLE,AVAILABLE,0,0,0], # TO_REMOVE_TOKEN
-		[0,OPTIONED,0,0,0,0,0],	# TO_SELL_TOKEN
-		[0,0,AVAILABLE,AVAILABLE,AVAILABLE,0,0], # TCO_USER_REJECTED
-		[0,0,EAPPROCESSING,0,0,0,0], # TCO_DOCS_SUBMITTED
-		[0,0,0,EAPAPROVED,0,0,0], # TCO_USER_QUALIFIED
-		[0,0,0,0,BURNED,0,0], # TCO_FINALIZE
-		[0,0,0,0,0,AVAILABLE,0], # WO_BUY_TOKEN
-	]
+# The state transition matrix, one exit state per event (row) and entry state (column):
+#
+#   AO_MINT_TOKEN       [AVAILABLE,0,0,0,0,0,0]
+#   TO_APPLY_TOKEN      [0,EAPAPPLIED,0,0,0,0,0]
+#   TO_REMOVE_TOKEN     [0,0,AVAILABLE,AVAILABLE,0,0,0]
+#   TO_SELL_TOKEN       [0,OPTIONED,0,0,0,0,0]
+#   TCO_USER_REJECTED   [0,0,AVAILABLE,AVAILABLE,AVAILABLE,0,0]
+#   TCO_DOCS_SUBMITTED  [0,0,EAPPROCESSING,0,0,0,0]
+#   TCO_USER_QUALIFIED  [0,0,0,EAPAPROVED,0,0,0]
+#   TCO_FINALIZE        [0,0,0,0,BURNED,0,0]
+#   WO_BUY_TOKEN        [0,0,0,0,0,AVAILABLE,0]
+#
+# packed into a constant with a hex digit per entry, so it needs no storage. The exit state
+# for _event and _entry_state is digit _event * STATE_COUNT + _entry_state from the right,
+# which makes each row seven digits read right to left, AO_MINT_TOKEN's last.
+STATE_COUNT: constant(int128) = 7
+STATE_TRANSITIONS: constant(bytes32) = 0x0010000000600000004000000030000111000000050000110000000200000001
 
 
 nextTid: public(uint256)
-tokens: public(map(uint256,Token))
+tokens: map(uint256,PackedToken)
 contract_owner: address
 erc1155_addr: address
 token_type_id: uint256
 
-# Put our array into persistent storage (Cheaper gas-wise)
-# Declare it here, initialize inside __init__
-StateTransition: int128[7][9]
-
 # _getState covers this one completely.
 # @private
 # @constant
 # def _isAvailableState(token: Token) -> int128:
 #     # token.tid != 0
 #     # token.owner != ZERO_ADDRESS
-#     # token.tco.tokenCall == ZERO_ADDRESS
-#     # token.option.buyer == ZERO_ADDRESS
-#     if  token.option.buyer == ZERO_ADDRESS :
+#     # token.tokenCall == ZERO_ADDRESS
+#     # token.buyer == ZERO_ADDRESS
+#     if  token.buyer == ZERO_ADDRESS :
 #         return AVAILABLE
 #     return UNKNOWN
 
+@private
+@constant
+def _loadToken(_tid: uint256) -> Token:
+    option: uint256 = self.tokens[_tid].option
+    tco: uint256 = self.tokens[_tid].tco
+    clock: Clock = Clock({epoch: 0, second: 1})
+    return Token({
+        # A token's tid is its key, so storage only records whether it was minted.
+        tid: _tid * (bitwise_and(tco, MINTED) / MINTED),
+        owner: self.tokens[_tid].owner,
+        buyer: convert(convert(bitwise_and(option, ADDRESS_MASK), bytes32), address),
+        price: self.tokens[_tid].price,
+        currency: self.tokens[_tid].currency,
+        expires: clock.epoch + shift(option, -EXPIRES_SHIFT) * clock.second,
+        tokenCall: convert(convert(bitwise_and(tco, ADDRESS_MASK), bytes32), address),
+        docsSubmitted: bitwise_and(tco, DOCS_SUBMITTED) != 0,
+        userQualified: bitwise_and(tco, USER_QUALIFIED) != 0
+    })
+
+
 @private
 @constant
 def _isEAPAppliedState(_token: Token) -> int128:    
     # token.tid != 0
     # token.owner != ZERO_ADDRESS
-    # token.tco.tokenCall != ZERO_ADDRESS
-    # token.option.buyer == ZERO_ADDRESS
-    if  _token.tco.docsSubmitted == False and \
-        _token.tco.userQualified == False : 
+    # token.tokenCall != ZERO_ADDRESS
+    # token.buyer == ZERO_ADDRESS
+    if  _token.docsSubmitted == False and \
+        _token.userQualified == False : 
         return EAPAPPLIED
     return UNKNOWN
 
@@ -123,10 +174,10 @@ def _isEAPAppliedState(_token: Token) -> int128:
 def _isEAPProcessingState(_token: Token) -> int128:
     # token.tid != 0
     # token.owner != ZERO_ADDRESS
-    # token.tco.tokenCall != ZERO_ADDRESS
-    # token.option.buyer == ZERO_ADDRESS
-    if  _token.tco.docsSubmitted == True and \
-        _token.tco.userQualified == False : 
+    # token.tokenCall != ZERO_ADDRESS
+    # token.buyer == ZERO_ADDRESS
+    if  _token.docsSubmitted == True and \
+        _token.userQualified == False : 
         return EAPPROCESSING
     return UNKNOWN
 
@@ -135,10 +186,10 @@ def _isEAPProcessingState(_token: Token) -> int128:
 def _isEAPApprovedState(_token: Token) -> int128:
     # token.tid != 0
     # token.owner != ZERO_ADDRESS
-    # token.tco.tokenCall != ZERO_ADDRESS
-    # token.option.buyer == ZERO_ADDRESS
-    if  _token.tco.docsSubmitted == True and \
-        _token.tco.userQualified == True :
+    # token.tokenCall != ZERO_ADDRESS
+    # token.buyer == ZERO_ADDRESS
+    if  _token.docsSubmitted == True and \
+        _token.userQualified == True :
         return EAPAPROVED
     return UNKNOWN   
 
@@ -147,9 +198,9 @@ def _isEAPApprovedState(_token: Token) -> int128:
 def _isOptionedState(_token: Token) -> int128:
     # token.tid != 0
     # token.owner != ZERO_ADDRESS
-    # token.tco.tokenCall == ZERO_ADDRESS:
-    if  _token.option.buyer != ZERO_ADDRESS:
-        if _token.option.expires >= block.timestamp :
+    # token.tokenCall == ZERO_ADDRESS:
+    if  _token.buyer != ZERO_ADDRESS:
+        if _token.expires >= block.timestamp :
             return OPTIONED
         else:
             # Option has expired - we're really available.
@@ -180,8 +231,8 @@ def _getState(_token: Token) -> int128:
         #    result = t
         count += 1
         result = BURNED
-    elif _token.option.buyer == ZERO_ADDRESS:
-        if _token.tco.tokenCall == ZERO_ADDRESS:        
+    elif _token.buyer == ZERO_ADDRESS:
+        if _token.tokenCall == ZERO_ADDRESS:        
             # t = self._isAvailableState(_token)
             # if t != UNKNOWN: 
             #     count += 1
@@ -201,8 +252,8 @@ def _getState(_token: Token) -> int128:
             if t != UNKNOWN: 
                 count += 1
                 result = t
-    elif _token.option.buyer != ZERO_ADDRESS:
-        if _token.tco.tokenCall == ZERO_ADDRESS: 
+    elif _token.buyer != ZERO_ADDRESS:
+        if _token.tokenCall == ZERO_ADDRESS: 
             t = self._isOptionedState(_token)
             if t != UNKNOWN: 
                 count += 1
@@ -221,8 +272,7 @@ def _isState(_state: int128, _token: Token) -> bool:
 
 @private
 @constant
-def preStateTransition(_sender: address, _tid: uint256, _event: int128) -> Transaction:
-    _token : Token = self.tokens[_tid]
+def preStateTransition(_sender: address, _tid: uint256, _token: Token, _event: int128) -> Transaction:
     # Ensure our transaction is being called from a wallet authorized to perform the transaction.
     if _event == AO_MINT_TOKEN:
         # Minting persmission should be determined on the ERC contact side
@@ -238,22 +288,23 @@ def preStateTransition(_sender: address, _tid: uint256, _event: int128) -> Trans
         assert _sender == _token.owner
 
     elif _event in [TCO_DOCS_SUBMITTED, TCO_USER_REJECTED, TCO_USER_QUALIFIED, TCO_FINALIZE]:
-        if _sender != _token.tco.tokenCall:
-            log.UnAuthorizedEventRequest(_event, _sender, _token.tco.tokenCall)
-        assert _sender == _token.tco.tokenCall
+        if _sender != _token.tokenCall:
+            log.UnAuthorizedEventRequest(_event, _sender, _token.tokenCall)
+        assert _sender == _token.tokenCall
         assert TokenCall(_sender).onRequestFromTokenCall() == FROM_TOKEN_CALL
 
     elif _event == WO_BUY_TOKEN:
-        if _sender != _token.option.buyer:
-            log.UnAuthorizedEventRequest(_event, _sender, _token.option.buyer)  
-        assert _sender == _token.option.buyer
+        if _sender != _token.buyer:
+            log.UnAuthorizedEventRequest(_event, _sender, _token.buyer)  
+        assert _sender == _token.buyer
     else:
         # Not a legal event at all.
         log.UnAuthorizedEventRequest(_event, _sender, ZERO_ADDRESS) 
         assert False
 
     _entry_state : int128 = self._getState(_token)
-    _exit_state : int128 = self.StateTransition[_event][_entry_state]
+    transitions: uint256 = convert(STATE_TRANSITIONS, uint256)
+    _exit_state : int128 = convert(bitwise_and(shift(transitions, -4 * (_event * STATE_COUNT + _entry_state)), 15), int128)
     ## DEBUG - remark this out to see expected state transition in log output.
     assert _exit_state != UNKNOWN
     
@@ -264,11 +315,11 @@ def preStateTransition(_sender: address, _tid: uint256, _event: int128) -> Trans
 
 @private
 @constant
-def postStateTransition(_xtrans: Transaction):
+def postStateTransition(_xtrans: Transaction, _token: Token):
+    # _token is the caller's copy with its changes applied, not a fresh read of storage.
     log.ExitStateLog(_xtrans.tid, _xtrans.exit_state)
-    token : Token = self.tokens[_xtrans.tid]
     ## DEBUG - remark this out to see log output.
-    assert self._isState(_xtrans.exit_state, token)
+    assert self._isState(_xtrans.exit_state, _token)
 
 
 @public
@@ -276,9 +327,6 @@ def __init__(
         _erc1155_addr: address,
         _token_type: uint256
     ):
-    # The necessity for copying the matrix will be fixed with this
-    # issue: https://github.com/ethereum/vyper/issues/1915
-    self.StateTransition = StateTransitionMatrix
     self.contract_owner = msg.sender
     self.erc1155_addr = _erc1155_addr
     self.token_type_id = _token_type
@@ -294,74 +342,101 @@ def get_nextTid() -> uint256:
 @public
 @constant
 def get_state(_tid: uint256) -> int128:
-    token: Token = self.tokens[_tid]
+    token: Token = self._loadToken(_tid)
     return self._getState(token)
 
 
 @public
 @constant
 def get_option(_tid: uint256) -> Option:
-    token : Token = self.tokens[_tid]
-    return token.option
+    token : Token = self._loadToken(_tid)
+    return Option({ buyer: token.buyer,
+                    price: token.price,
+                    currency: token.currency,
+                    expires: token.expires })
 
 
+# Each transition reads its token once, checks the entry state on that copy, applies its
+# changes to both the copy and the packed storage words they touch, and checks the exit
+# state on the copy.
+
 @public
-def mintToken(_to_owner: address, _tx_sender: address):
+def mintTokens(_to_owners: address[MAX_BATCH_SIZE], _tx_sender: address) -> uint256:
+    # Mints a token to each owner that is not ZERO_ADDRESS, with consecutive tids from
+    # nextTid, and returns the first tid. Every tid from nextTid on is unminted, so the
+    # first token's authorization and state checks hold for the whole range.
     assert msg.sender == self.erc1155_addr
-    xtrans : Transaction = self.preStateTransition(_tx_sender, self.nextTid, AO_MINT_TOKEN)
-    token: Token = self.tokens[xtrans.tid]
-
-    # Assert the new token sequence number will not overflow
-    prev_token_seq_number: uint256 = bitwise_xor(self.token_type_id, self.nextTid - 1)
-    new_token_seq_number: uint256 = bitwise_xor(self.token_type_id, self.nextTid)
-    assert new_token_seq_number > prev_token_seq_number
+    first_tid: uint256 = self.nextTid
+    tid: uint256 = first_tid
+    token: Token = self._loadToken(tid)
+    xtrans : Transaction = Transaction({tid: 0, entry_state: UNKNOWN, exit_state: UNKNOWN})
+    type_id: uint256 = self.token_type_id
+
+    for i in range(MAX_BATCH_SIZE):
+        owner: address = _to_owners[i]
+        if owner == ZERO_ADDRESS:
+            continue
+
+        if tid == first_tid:
+            xtrans = self.preStateTransition(_tx_sender, tid, token, AO_MINT_TOKEN)
+            token.tid = tid
+            token.owner = owner
+            assert self._isState(xtrans.exit_state, token)
+        else:
+            log.EntryStateLog(tid, xtrans.entry_state, xtrans.exit_state, AO_MINT_TOKEN)
 
-    token.tid = self.nextTid
-    token.owner = _to_owner
+        # Assert the new token sequence number will not overflow
+        prev_token_seq_number: uint256 = bitwise_xor(type_id, tid - 1)
+        new_token_seq_number: uint256 = bitwise_xor(type_id, tid)
+        assert new_token_seq_number > prev_token_seq_number
 
-    self.nextTid += 1
+        self.tokens[tid].owner = owner
+        self.tokens[tid].tco = MINTED
+        log.ExitStateLog(tid, xtrans.exit_state)
+        tid += 1
 
-    self.tokens[xtrans.tid] = token
-    self.postStateTransition(xtrans)
+    if tid != first_tid:
+        self.nextTid = tid
+    return first_tid
 
 
 @public
 def applyToken(_tid: uint256, tokenCall: address, _tx_sender: address):
     assert msg.sender == self.erc1155_addr
     assert TokenCall(tokenCall).onRequestFromTokenCall() == FROM_TOKEN_CALL
-    xtrans : Transaction = self.preStateTransition(_tx_sender, _tid, TO_APPLY_TOKEN)
-    token: Token = self.tokens[_tid]
+    token: Token = self._loadToken(_tid)
+    xtrans : Transaction = self.preStateTransition(_tx_sender, _tid, token, TO_APPLY_TOKEN)
 
-    token.tco.tokenCall = tokenCall
-    token.tco.docsSubmitted = False
-    token.tco.userQualified = False
+    token.tokenCall = tokenCall
+    token.docsSubmitted = False
+    token.userQualified = False
 
     TokenCall(tokenCall).applyToken(_tid)
 
-    self.tokens[xtrans.tid] = token
-    self.postStateTransition(xtrans)
+    self.tokens[xtrans.tid].tco = bitwise_or(convert(tokenCall, uint256), MINTED)
+    self.postStateTransition(xtrans, token)
 
 
 @public 
 def removeToken(_tid: uint256, _tx_sender: address):
     assert msg.sender == self.erc1155_addr
-    xtrans : Transaction = self.preStateTransition(_tx_sender, _tid, TO_REMOVE_TOKEN)  
-    token: Token = self.tokens[_tid]    
+    token: Token = self._loadToken(_tid)
+    xtrans : Transaction = self.preStateTransition(_tx_sender, _tid, token, TO_REMOVE_TOKEN)
 
-    TokenCall(token.tco.tokenCall).removeToken(_tid)
+    TokenCall(token.tokenCall).removeToken(_tid)
 
-    token.tco.tokenCall = ZERO_ADDRESS
-    token.tco.docsSubmitted = False
-    token.tco.userQualified = False
+    token.tokenCall = ZERO_ADDRESS
+    token.docsSubmitted = False
+    token.userQualified = False
 
-    self.tokens[xtrans.tid] = token
-    self.postStateTransition(xtrans)
+    self.tokens[xtrans.tid].tco = MINTED
+    self.postStateTransition(xtrans, token)
 
 
 @public
 def sellToken(_tid: uint256, _buyer: address, _currency: address, _price: uint256, _expires: timestamp):
-    xtrans : Transaction = self.preStateTransition(msg.sender, _tid, TO_SELL_TOKEN)  
-    token: Token = self.tokens[_tid]  
+    token: Token = self._loadToken(_tid)
+    xtrans : Transaction = self.preStateTransition(msg.sender, _tid, token, TO_SELL_TOKEN)
 
     # Any other tests we can do for a valid wallet address??
     assert _buyer != ZERO_ADDRESS
@@ -371,23 +446,31 @@ def sellToken(_tid: uint256, _buyer: address, _currency: address, _price: uint25
     # Assure that expiration is no more than 10 days out from now.
     assert _expires <= block.timestamp + (3600 * 24 * 10)
 
-    token.option = Option({ buyer: _buyer,
-                            price: _price,
-                            currency: _currency,
-                            expires: _expires })
+    token.buyer = _buyer
+    token.price = _price
+    token.currency = _currency
+    token.expires = _expires
+
+    # The limit above also keeps the expiry within the 96 bits above the buyer.
+    expires: uint256 = as_unitless_number(_expires)
+    self.tokens[xtrans.tid].option = bitwise_or(convert(_buyer, uint256), shift(expires, EXPIRES_SHIFT))
+    self.tokens[xtrans.tid].price = _price
+    self.tokens[xtrans.tid].currency = _currency
 
-    self.tokens[xtrans.tid] = token
-    self.postStateTransition(xtrans)
+    self.postStateTransition(xtrans, token)
 
 
 @public 
 @payable
 def buyToken(_tid: uint256, _currency: address):
-    xtrans : Transaction = self.preStateTransition(msg.sender, _tid, WO_BUY_TOKEN)  
-    token: Token = self.tokens[_tid]  
+    token: Token = self._loadToken(_tid)
+    xtrans : Transaction = self.preStateTransition(msg.sender, _tid, token, WO_BUY_TOKEN)
     previousOwner: address = token.owner
 
-    option: Option = token.option
+    option: Option = Option({ buyer: token.buyer,
+                              price: token.price,
+                              currency: token.currency,
+                              expires: token.expires })
 
     assert msg.sender == option.buyer
 
@@ -422,66 +505,129 @@ def buyToken(_tid: uint256, _currency: address):
     # Did we make the sale?
     #assert token.owner == msg.sender
 
-    token.option = Option({ buyer: ZERO_ADDRESS,
-                            price: 0,
-                            currency: ZERO_ADDRESS,
-                            expires: 0 })
+    token.buyer = ZERO_ADDRESS
+    token.price = 0
+    token.currency = ZERO_ADDRESS
+    token.expires = 0
+    self.tokens[xtrans.tid].owner = token.owner
+    self.tokens[xtrans.tid].option = 0
+    self.tokens[xtrans.tid].price = 0
+    self.tokens[xtrans.tid].currency = ZERO_ADDRESS
 
-    self.tokens[xtrans.tid] = token
-    self.postStateTransition(xtrans)
+    self.postStateTransition(xtrans, token)
 
 
 @public 
 def userRejected(_tid: uint256, _tx_sender: address):
     assert msg.sender == self.erc1155_addr
-    xtrans : Transaction = self.preStateTransition(_tx_sender, _tid, TCO_USER_REJECTED)
-    token: Token = self.tokens[_tid]
+    token: Token = self._loadToken(_tid)
+    xtrans : Transaction = self.preStateTransition(_tx_sender, _tid, token, TCO_USER_REJECTED)
 
-    token.tco.tokenCall = ZERO_ADDRESS
-    token.tco.docsSubmitted = False
-    token.tco.userQualified = False
+    token.tokenCall = ZERO_ADDRESS
+    token.docsSubmitted = False
+    token.userQualified = False
 
-    self.tokens[xtrans.tid] = token
-    self.postStateTransition(xtrans)
+    self.tokens[xtrans.tid].tco = MINTED
+    self.postStateTransition(xtrans, token)
 
 
 @public 
 def docsSubmitted(_tid: uint256, _tx_sender: address):
     assert msg.sender == self.erc1155_addr
-    xtrans : Transaction = self.preStateTransition(_tx_sender, _tid, TCO_DOCS_SUBMITTED)
-    token: Token = self.tokens[_tid]
+    token: Token = self._loadToken(_tid)
+    xtrans : Transaction = self.preStateTransition(_tx_sender, _tid, token, TCO_DOCS_SUBMITTED)
 
-    token.tco.docsSubmitted = True
+    token.docsSubmitted = True
 
-    self.tokens[xtrans.tid] = token
-    self.postStateTransition(xtrans)
+    # Only EAPAPPLIED tokens get here, so userQualified is still unset.
+    self.tokens[xtrans.tid].tco = bitwise_or(convert(token.tokenCall, uint256), bitwise_or(MINTED, DOCS_SUBMITTED))
+    self.postStateTransition(xtrans, token)
 
 
 @public 
 def userQualified(_tid: uint256, _tx_sender: address):
     assert msg.sender == self.erc1155_addr
-    xtrans : Transaction = self.preStateTransition(_tx_sender, _tid, TCO_USER_QUALIFIED)
-    token: Token = self.tokens[_tid]
+    token: Token = self._loadToken(_tid)
+    xtrans : Transaction = self.preStateTransition(_tx_sender, _tid, token, TCO_USER_QUALIFIED)
 
-    token.tco.userQualified = True
+    token.userQualified = True
 
-    self.tokens[xtrans.tid] = token
-    self.postStateTransition(xtrans)
+    # Only EAPPROCESSING tokens get here, so docsSubmitted is already set.
+    tco: uint256 = bitwise_or(convert(token.tokenCall, uint256), bitwise_or(MINTED, DOCS_SUBMITTED))
+    self.tokens[xtrans.tid].tco = bitwise_or(tco, USER_QUALIFIED)
+    self.postStateTransition(xtrans, token)
 
 
 @public 
 def finalize(_tid: uint256, _tx_sender: address):
     assert msg.sender == self.erc1155_addr
-    xtrans : Transaction = self.preStateTransition(_tx_sender, _tid, TCO_FINALIZE)
-    token: Token = self.tokens[_tid]
+    token: Token = self._loadToken(_tid)
+    xtrans : Transaction = self.preStateTransition(_tx_sender, _tid, token, TCO_FINALIZE)
 
     token.owner = ZERO_ADDRESS
 
-    self.tokens[xtrans.tid] = token
-    self.postStateTransition(xtrans)
+    self.tokens[xtrans.tid].owner = ZERO_ADDRESS
+    self.postStateTransition(xtrans, token)
 
 
 @public
 def setOwner(_tokenId: uint256, _newOwner: address):
     assert msg.sender == self.erc1155_addr
     self.tokens[_tokenId].owner = _newOwner
+
+
+# The getters of the former public(map(uint256, Token)), read from the packed words.
+
+@public
+@constant
+def tokens__tid(arg0: uint256) -> uint256:
+    return arg0 * (bitwise_and(self.tokens[arg0].tco, MINTED) / MINTED)
+
+
+@public
+@constant
+def tokens__owner(arg0: uint256) -> address:
+    return self.tokens[arg0].owner
+
+
+@public
+@constant
+def tokens__option__buyer(arg0: uint256) -> address:
+    return convert(convert(bitwise_and(self.tokens[arg0].option, ADDRESS_MASK), bytes32), address)
+
+
+@public
+@constant
+def tokens__option__price(arg0: uint256) -> uint256:
+    return self.tokens[arg0].price
+
+
+@public
+@constant
+def tokens__option__currency(arg0: uint256) -> address:
+    return self.tokens[arg0].currency
+
+
+@public
+@constant
+def tokens__option__expires(arg0: uint256) -> timestamp:
+    clock: Clock = Clock({epoch: 0, second: 1})
+    return clock.epoch + shift(self.tokens[arg0].option, -EXPIRES_SHIFT) * clock.second
+
+
+@public
+@constant
+def tokens__tco__tokenCall(arg0: uint256) -> address:
+    return convert(convert(bitwise_and(self.tokens[arg0].tco, ADDRESS_MASK), bytes32), address)
+
+
+@public
+@constant
+def tokens__tco__docsSubmitted(arg0: uint256) -> bool:
+    return bitwise_and(self.tokens[arg0].tco, DOCS_SUBMITTED) != 0
+
+
+@public
+@constant
+def tokens__tco__userQualified(arg0: uint256) -> bool:
+    return bitwise_and(self.tokens[arg0].tco, USER_QUALIFIED) != 0
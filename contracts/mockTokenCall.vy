@@ -45,17 +45,23 @@ TO_APPLY_TOKEN: constant(int128) = 7
 TO_REMOVE_TOKEN: constant(int128) = 8
 
 
-STATE_TRANSITION_MATRIX: constant(int128[6][9]) = \
-    [   [0,PAUSED,0,PAUSED,0,0], # TCO_PAUSE_TC
-        [0,PENDING,0,OPEN,0,0],  # TCO_UNPAUSE_TC
-        [0,0,0,0,CLOSED,0],      # TCO_FINISH_TC_REMAINING
-        [0,0,0,0,FINISHED,0],    # TCO_FINISH_TC_EMPTY
-        [0,0,0,OPEN,CLOSED,0],   # TCO_DOCS_SUBMITTED
-        [0,0,0,OPEN,CLOSED,0],   # TCO_USER_QUALIFIED
-        [0,0,0,OPEN,CLOSED,0],   # TCO_USER_REJECTED
-        [0,0,0,OPEN,0,0],        # TO_APPLY_TOKEN
-        [0,0,0,OPEN,0,0],        # TO_REMOVE_TOKEN
-    ]
+# The state transition matrix, one exit state per event (row) and entry state (column):
+#
+#   TCO_PAUSE_TC            [0,PAUSED,0,PAUSED,0,0]
+#   TCO_UNPAUSE_TC          [0,PENDING,0,OPEN,0,0]
+#   TCO_FINISH_TC_REMAINING [0,0,0,0,CLOSED,0]
+#   TCO_FINISH_TC_EMPTY     [0,0,0,0,FINISHED,0]
+#   TCO_DOCS_SUBMITTED      [0,0,0,OPEN,CLOSED,0]
+#   TCO_USER_QUALIFIED      [0,0,0,OPEN,CLOSED,0]
+#   TCO_USER_REJECTED       [0,0,0,OPEN,CLOSED,0]
+#   TO_APPLY_TOKEN          [0,0,0,OPEN,0,0]
+#   TO_REMOVE_TOKEN         [0,0,0,OPEN,0,0]
+#
+# packed into a constant with a hex digit per entry, so it needs no storage. The exit state
+# for _event and _entry_state is digit _event * STATE_COUNT + _entry_state from the right,
+# which makes each row six digits read right to left, TCO_PAUSE_TC's last.
+STATE_COUNT: constant(int128) = 6
+STATE_TRANSITIONS: constant(bytes32) = 0x0000000000003000003000043000043000043000050000040000003010002020
 
 
 
@@ -142,7 +148,6 @@ startDate: public(timestamp)
 endDate: public(timestamp)
 
 tokenLists: public(TokenList[2])
-StateTransition: int128[6][9]
 
 
 ##################### CONSTANT FUNCTIONS #####################
@@ -310,7 +315,8 @@ def preStateTransition(_sender: address, _event: int128, _tokenTypeId: uint256 =
     assert self.isAuthorizedForTransition(_event, _sender, _tokenTypeId)
     co: address = self.contractOwner
     _entry_state : int128 = self._getState()
-    _exit_state : int128 = self.StateTransition[_event][_entry_state]
+    transitions: uint256 = convert(STATE_TRANSITIONS, uint256)
+    _exit_state : int128 = convert(bitwise_and(shift(transitions, -4 * (_event * STATE_COUNT + _entry_state)), 15), int128)
 
     assert _exit_state != UNKNOWN
 
@@ -435,8 +441,6 @@ def __init__(
     self.startDate = _startDate
     self.endDate = _endDate
 
-    self.StateTransition = STATE_TRANSITION_MATRIX
-
 
 @public
 def applyToken(_tokenId: uint256):
@@ -0,0 +1,64 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from scripts import utils
+from scripts.token_debugger import create_account_and_fund, get_logs
+
+
+DEFAULT_CONCURRENCY = 16
+
+
+class AsyncHelpers:
+
+    """
+    Asyncio counterparts of the helpers in scripts/utils.py and scripts/token_debugger.py.
+
+    web3 providers are blocking, so every request runs on a thread pool and at most
+    `concurrency` of them are in flight at once:
+
+    > helpers = AsyncHelpers(w3, concurrency=32)
+    > addresses = await asyncio.gather(*(helpers.deploy(compiled, abc, t) for t in types))
+
+    The in-process EthereumTester is not thread safe; use `concurrency=1` with it, or
+    serialize its requests with a lock in a middleware.
+    """
+
+    def __init__(self, w3, concurrency=DEFAULT_CONCURRENCY, executor=None):
+        self.w3 = w3
+        self.concurrency = concurrency
+        self._executor = executor or ThreadPoolExecutor(max_workers=concurrency)
+        self._semaphore = None
+        self._loop = None
+
+    def _get_semaphore(self):
+        # Created lazily: an asyncio primitive is bound to the loop it was created on.
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+            self._loop = loop
+        return self._semaphore
+
+    async def run(self, fn, *args, **kwargs):
+        async with self._get_semaphore():
+            return await asyncio.get_running_loop().run_in_executor(
+                self._executor, partial(fn, *args, **kwargs)
+            )
+
+    async def deploy(self, compiled_contract, *args, owner=None, **kwargs):
+        return await self.run(utils.deploy, self.w3, compiled_contract, *args, owner=owner, **kwargs)
+
+    async def transact(self, func):
+        return await self.run(utils.transact, self.w3, func)
+
+    async def call(self, func, params=None):
+        return await self.run(func.call, params)
+
+    async def get_logs(self, tx_hash, contract, event_name):
+        return await self.run(get_logs, self.w3, tx_hash, contract, event_name)
+
+    async def create_account_and_fund(self, source_account, amount, password):
+        return await self.run(create_account_and_fund, self.w3, source_account, amount, password)
+
+    def close(self):
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,66 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from scripts.const import ZERO_ADDRESS
+from scripts.rpc import supports_batch
+
+
+# ABC's batch functions take fixed-size arrays.
+MAX_BATCH_SIZE = 100
+
+_paddings = {
+    (0, MAX_BATCH_SIZE): (0,) * MAX_BATCH_SIZE,
+    (ZERO_ADDRESS, MAX_BATCH_SIZE): (ZERO_ADDRESS,) * MAX_BATCH_SIZE,
+}
+
+
+def _padding(default_value, size):
+    key = (default_value, size)
+    if key not in _paddings:
+        _paddings[key] = (default_value,) * size
+    return _paddings[key]
+
+
+def pad_batch(input_list, size=MAX_BATCH_SIZE, default_value=0):
+    """
+    Returns the first `size` items of `input_list`, filled up to `size` from a shared
+    template of `default_value`s.
+    """
+    values = list(input_list[:size])
+    values.extend(_padding(default_value, size)[len(values) :])
+    return values
+
+
+def chunks(values, size=MAX_BATCH_SIZE):
+    return [values[i : i + size] for i in range(0, len(values), size)]
+
+
+def balance_of_batch(
+    contract, owners, token_ids, concurrency=4, params=None, block_identifier="latest"
+):
+    """
+    `ABC.balanceOfBatch` for any number of `(owner, token id)` pairs, returned in order.
+
+    Pairs are split into 100-slot calls made with the `params` transaction dict. Over HTTP
+    up to `concurrency` calls run at once; other providers, such as the in-process
+    EthereumTester, are called one at a time.
+    """
+    owners = list(owners)
+    token_ids = list(token_ids)
+    if len(owners) != len(token_ids):
+        raise ValueError("Got %d owners for %d token ids" % (len(owners), len(token_ids)))
+
+    def fetch(chunk):
+        chunk_owners, chunk_ids = chunk
+        balances = contract.functions.balanceOfBatch(
+            pad_batch(chunk_owners, default_value=ZERO_ADDRESS), pad_batch(chunk_ids)
+        ).call(params, block_identifier)
+        return balances[: len(chunk_ids)]
+
+    batches = list(zip(chunks(owners), chunks(token_ids)))
+    if concurrency > 1 and len(batches) > 1 and supports_batch(contract.web3):
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(fetch, batches))
+    else:
+        results = [fetch(batch) for batch in batches]
+
+    return [balance for balances in results for balance in balances]
@@ -0,0 +1,113 @@
+import argparse
+import glob
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import vyper
+
+from scripts.compile_cache import compile_code
+
+
+CONTRACTS_DIR = "contracts"
+BUILD_DIR = os.path.join("build", "contracts")
+OUTPUT_FORMATS = ["abi", "bytecode", "bytecode_runtime", "external_interface"]
+
+
+def source_hash(source_code):
+    return hashlib.sha256(source_code.encode("utf-8")).hexdigest()
+
+
+def artifact_path(build_dir, source_path):
+    contract_name = os.path.splitext(os.path.basename(source_path))[0]
+    return os.path.join(build_dir, contract_name + ".json")
+
+
+def is_up_to_date(source_path, build_dir):
+    try:
+        with open(artifact_path(build_dir, source_path)) as f:
+            artifact = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return False
+
+    with open(source_path) as f:
+        source_code = f.read()
+
+    return (
+        artifact.get("sourceHash") == source_hash(source_code)
+        and artifact.get("compiler", {}).get("version") == vyper.__version__
+    )
+
+
+def compile_artifact(source_path):
+    with open(source_path) as f:
+        source_code = f.read()
+
+    compiled_contract = compile_code(source_code, OUTPUT_FORMATS)
+
+    # Same layout truffle writes to build/contracts, so scripts/deploy.py can read either.
+    return {
+        "contractName": os.path.splitext(os.path.basename(source_path))[0],
+        "abi": compiled_contract["abi"],
+        "bytecode": compiled_contract["bytecode"],
+        "deployedBytecode": compiled_contract["bytecode_runtime"],
+        "external_interface": compiled_contract["external_interface"],
+        "sourcePath": os.path.abspath(source_path),
+        "sourceHash": source_hash(source_code),
+        "compiler": {"name": "vyper", "version": vyper.__version__},
+        "updatedAt": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+
+
+def build(contracts_dir=CONTRACTS_DIR, build_dir=BUILD_DIR, jobs=None, force=False):
+    source_paths = sorted(glob.glob(os.path.join(contracts_dir, "*.vy")))
+    stale_paths = [
+        path for path in source_paths if force or not is_up_to_date(path, build_dir)
+    ]
+
+    if not stale_paths:
+        return []
+
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1 or len(stale_paths) == 1:
+        artifacts = [compile_artifact(path) for path in stale_paths]
+    else:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(stale_paths))) as executor:
+            artifacts = list(executor.map(compile_artifact, stale_paths))
+
+    os.makedirs(build_dir, exist_ok=True)
+    for path, artifact in zip(stale_paths, artifacts):
+        with open(artifact_path(build_dir, path), "w") as f:
+            json.dump(artifact, f, indent=2)
+
+    return stale_paths
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compile contracts/*.vy into truffle-compatible build artifacts."
+    )
+    parser.add_argument("--contracts-dir", default=CONTRACTS_DIR)
+    parser.add_argument("--build-dir", default=BUILD_DIR)
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=None, help="worker processes (default: all cores)"
+    )
+    parser.add_argument(
+        "-f", "--force", action="store_true", help="rebuild even if sources are unchanged"
+    )
+    args = parser.parse_args()
+
+    start = time.time()
+    built = build(args.contracts_dir, args.build_dir, jobs=args.jobs, force=args.force)
+    for path in built:
+        print("Compiled", path)
+    print(
+        "Built %d contract(s), skipped %d unchanged in %.2fs"
+        % (
+            len(built),
+            len(glob.glob(os.path.join(args.contracts_dir, "*.vy"))) - len(built),
+            time.time() - start,
+        )
+    )
@@ -0,0 +1,337 @@
+import argparse
+import itertools
+import json
+import os
+import sys
+import tempfile
+import time
+
+from eth_utils import to_checksum_address
+from web3 import Web3
+from web3.exceptions import TimeExhausted
+
+from scripts.batching import MAX_BATCH_SIZE, pad_batch
+from scripts.const import NETWORK_CONFIG, TYPE_NF_BIT, ZERO_ADDRESS
+from scripts.receipts import ReceiptWaiter
+from scripts.utils import send_jobs, transact_job, vcompile, wait_for_jobs
+
+
+def read_recipients(path):
+    """
+    Streams `(address, quantity)` pairs from a file with one `address` or
+    `address,quantity` per line. Blank lines and lines starting with `#` are skipped.
+    """
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            address, _, quantity = line.partition(",")
+            yield to_checksum_address(address.strip()), int(quantity or 1)
+
+
+class MintReport:
+    def __init__(self, batches, tokens, gas_used, seconds, failed, pending=()):
+        self.batches = batches
+        self.tokens = tokens
+        self.gas_used = gas_used
+        self.seconds = seconds
+        self.failed = failed
+        self.pending = list(pending)
+
+    @property
+    def tokens_per_second(self):
+        return self.tokens / self.seconds if self.seconds else 0.0
+
+    @property
+    def gas_per_token(self):
+        return self.gas_used / self.tokens if self.tokens else 0.0
+
+    def __str__(self):
+        return (
+            "Minted %d tokens in %d batches in %.1fs: %.1f tokens/s, %.0f gas/token, "
+            "%d failed batch(es), %d still pending"
+            % (
+                self.tokens,
+                self.batches,
+                self.seconds,
+                self.tokens_per_second,
+                self.gas_per_token,
+                len(self.failed),
+                len(self.pending),
+            )
+        )
+
+
+class BulkMinter:
+
+    """
+    Mints `token_id` to a stream of recipients in `batch_size` batches.
+
+    Batches are sent `window` at a time with locally managed nonces (`send_jobs`), then their
+    receipts are collected together. Non-fungible types go through `mintNonFungibleToken`,
+    one token per recipient; fungible ids through `mintFungibleToken` with each recipient's
+    quantity.
+
+    Progress is kept in a JSON checkpoint, written after every window is sent and again
+    once it is mined. A rerun with the same recipients and checkpoint skips finished
+    batches, first waits for transactions that were sent but not confirmed before, and
+    sends failed batches again. A transaction that does not show up within `timeout` is
+    only replaced in a way that cannot mint its batch twice; see `_recover_pending`.
+
+    `on_window`, if given, is called with the number of tokens each window minted once the
+    window is mined and before the checkpoint records it, e.g. to commit a local chain.
+
+    Each NFT costs about 70k gas, so a batch of 100 NFTs needs about 7M and fits an 8M
+    block gas limit; use a smaller `batch_size` on chains with lower limits.
+    """
+
+    def __init__(
+        self,
+        w3,
+        contract,
+        token_id,
+        sender=None,
+        batch_size=MAX_BATCH_SIZE,
+        window=10,
+        gas=None,
+        checkpoint_path=None,
+        timeout=120,
+        on_window=None,
+    ):
+        if not 0 < batch_size <= MAX_BATCH_SIZE:
+            raise ValueError("batch_size must be between 1 and %d" % MAX_BATCH_SIZE)
+
+        self.w3 = w3
+        self.contract = contract
+        self.token_id = token_id
+        self.sender = sender or w3.eth.accounts[0]
+        self.batch_size = batch_size
+        self.window = window
+        self.gas = gas
+        self.checkpoint_path = checkpoint_path
+        self.timeout = timeout
+        self.on_window = on_window
+        self.non_fungible = bool(token_id & TYPE_NF_BIT)
+        self.state = None
+
+    def _new_state(self):
+        return {
+            "contract": self.contract.address,
+            "token_id": self.token_id,
+            "batch_size": self.batch_size,
+            "sender": self.sender,
+            "next_batch": 0,
+            # Batch index -> {"tx_hash", "size", "nonce"} of transactions not yet settled.
+            "pending": {},
+            # Batch index -> nonce to replace the batch's transaction at, or None to send it
+            # with a new nonce.
+            "retry": {},
+            "failed": [],
+            "minted": 0,
+            "gas_used": 0,
+        }
+
+    def load_checkpoint(self):
+        if self.checkpoint_path is None or not os.path.exists(self.checkpoint_path):
+            return self._new_state()
+
+        with open(self.checkpoint_path) as f:
+            state = json.load(f)
+        expected = self._new_state()
+        for key in ("contract", "token_id", "batch_size", "sender"):
+            if state.get(key) != expected[key]:
+                raise ValueError(
+                    "Checkpoint %s is for %s %s, not %s"
+                    % (self.checkpoint_path, key, state.get(key), expected[key])
+                )
+        return state
+
+    def save_checkpoint(self, state):
+        if self.checkpoint_path is None:
+            return
+        directory = os.path.dirname(os.path.abspath(self.checkpoint_path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def _batches(self, recipients):
+        recipients = iter(recipients)
+        for index in itertools.count():
+            batch = list(itertools.islice(recipients, self.batch_size))
+            if not batch:
+                return
+            yield index, batch
+
+    def _job(self, batch, nonce=None):
+        to = pad_batch([address for address, _ in batch], default_value=ZERO_ADDRESS)
+        if self.non_fungible:
+            func = self.contract.functions.mintNonFungibleToken(self.token_id, to)
+        else:
+            quantities = pad_batch([quantity for _, quantity in batch])
+            func = self.contract.functions.mintFungibleToken(self.token_id, to, quantities)
+
+        params = {"from": self.sender}
+        if self.gas is not None:
+            params["gas"] = self.gas
+        if nonce is not None:
+            params["nonce"] = nonce
+        return transact_job(func, **params)
+
+    def _record(self, state, index, size, receipt=None, error=None, tx_hash=None):
+        state["pending"].pop(str(index), None)
+        if error is None:
+            state["minted"] += size
+            state["gas_used"] += receipt.gasUsed
+            return size, receipt.gasUsed
+        state["failed"].append(
+            {"batch": index, "error": str(error), "tx_hash": tx_hash.hex() if tx_hash else None}
+        )
+        return 0, 0
+
+    def _recover_pending(self, state):
+        """
+        Settles batches sent by an earlier run and queues the rest in `retry`.
+
+        A transaction without a receipt after `timeout` may still be mined as long as its
+        nonce is unused, so its batch is sent again at that nonce, replacing it; only one
+        of the two can be mined. If the node refuses the replacement, e.g. because the
+        original is still in its pool, the batch stays pending for a later run. Once the
+        nonce is used by another transaction the original can never be mined, and the
+        batch is sent with a new nonce. Failed batches are sent again as well.
+        """
+        if state["pending"]:
+            # Read before the receipts, so a transaction mined in between is still found.
+            confirmed_nonce = self.w3.eth.getTransactionCount(self.sender, "latest")
+            waiter = ReceiptWaiter(self.w3, timeout=self.timeout)
+            waiter.add_many(entry["tx_hash"] for entry in state["pending"].values())
+            receipts = {}
+            try:
+                for tx_hash, receipt in waiter.iter_receipts():
+                    receipts[tx_hash] = receipt
+            except TimeExhausted:
+                pass
+
+            for index, entry in list(state["pending"].items()):
+                receipt = receipts.get(entry["tx_hash"])
+                if receipt is not None:
+                    error = None if receipt.status else "reverted"
+                    self._record(
+                        state, int(index), entry["size"], receipt, error, receipt.transactionHash
+                    )
+                elif entry["nonce"] >= confirmed_nonce:
+                    state["retry"][index] = entry["nonce"]
+                else:
+                    del state["pending"][index]
+                    state["retry"][index] = None
+
+        for failure in state["failed"]:
+            state["retry"][str(failure["batch"])] = None
+        state["failed"] = []
+        self.save_checkpoint(state)
+
+    def _mint_window(self, state, window):
+        # Replacements go first, as they take nonces that are already in use.
+        window = sorted(window, key=lambda item: state["retry"].get(str(item[0])) is None)
+        results = send_jobs(
+            self.w3,
+            [self._job(batch, state["retry"].get(str(index))) for index, batch in window],
+        )
+
+        for (index, batch), result in zip(window, results):
+            state["retry"].pop(str(index), None)
+            if result["tx_hash"] is not None:
+                state["pending"][str(index)] = {
+                    "tx_hash": result["tx_hash"].hex(),
+                    "size": len(batch),
+                    "nonce": result["nonce"],
+                }
+        state["next_batch"] = max(state["next_batch"], max(index for index, _ in window) + 1)
+        self.save_checkpoint(state)
+
+        wait_for_jobs(self.w3, results, self.timeout)
+        tokens = gas_used = 0
+        for (index, batch), result in zip(window, results):
+            if str(index) in state["pending"] and result["receipt"] is None:
+                # Not mined within the timeout, or a refused replacement whose original is
+                # still out there; left pending for the next run to settle.
+                continue
+            minted, gas = self._record(
+                state, index, len(batch), result["receipt"], result["error"], result["tx_hash"]
+            )
+            tokens += minted
+            gas_used += gas
+        if self.on_window is not None:
+            self.on_window(tokens)
+        self.save_checkpoint(state)
+        return tokens, gas_used
+
+    def run(self, recipients):
+        """
+        Mints to `recipients`, an iterable of `(address, quantity)` pairs, and returns a
+        `MintReport` for this run. Batches that failed in this run are listed in its
+        `failed`, and the checkpoint's; the next run with the checkpoint sends them again.
+        """
+        state = self.load_checkpoint()
+        self._recover_pending(state)
+
+        start = time.perf_counter()
+        batches = tokens = gas_used = 0
+        window = []
+        for index, batch in self._batches(recipients):
+            if index < state["next_batch"] and str(index) not in state["retry"]:
+                continue
+            window.append((index, batch))
+            if len(window) == self.window:
+                minted, gas = self._mint_window(state, window)
+                batches, tokens, gas_used = batches + len(window), tokens + minted, gas_used + gas
+                window = []
+        if window:
+            minted, gas = self._mint_window(state, window)
+            batches, tokens, gas_used = batches + len(window), tokens + minted, gas_used + gas
+
+        self.state = state
+        return MintReport(
+            batches,
+            tokens,
+            gas_used,
+            time.perf_counter() - start,
+            state["failed"],
+            sorted(int(index) for index in state["pending"]),
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mint an ABC token to a file of recipients.")
+    parser.add_argument("address", help="ABC contract address")
+    parser.add_argument("token_id", type=lambda value: int(value, 0), help="token type or id")
+    parser.add_argument("recipients", help="file with one `address[,quantity]` per line")
+    parser.add_argument("--checkpoint", default=None, help="default: <recipients>.checkpoint")
+    parser.add_argument("--from", dest="sender", default=None)
+    parser.add_argument("--batch-size", type=int, default=MAX_BATCH_SIZE)
+    parser.add_argument("--window", type=int, default=10, help="transactions in flight")
+    parser.add_argument("--gas", type=int, default=None, help="skip estimation, use this gas")
+    args = parser.parse_args()
+
+    endpoint = f"http://{NETWORK_CONFIG['HOST']}:{NETWORK_CONFIG['PORT']}"
+    w3 = Web3(Web3.HTTPProvider(endpoint))
+    abc = w3.eth.contract(address=args.address, abi=vcompile("contracts/ABC.vy")["abi"])
+
+    minter = BulkMinter(
+        w3,
+        abc,
+        args.token_id,
+        sender=args.sender,
+        batch_size=args.batch_size,
+        window=args.window,
+        gas=args.gas,
+        checkpoint_path=args.checkpoint or args.recipients + ".checkpoint",
+    )
+    report = minter.run(read_recipients(args.recipients))
+    print(report)
+    for failure in report.failed:
+        print("Batch %(batch)d failed (%(tx_hash)s): %(error)s" % failure)
+    if report.failed or report.pending:
+        print("Run again with the same checkpoint to send or settle the remaining batches.")
+        sys.exit(1)
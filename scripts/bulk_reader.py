@@ -0,0 +1,145 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from eth_utils import function_abi_to_4byte_selector, to_checksum_address
+from hexbytes import HexBytes
+from web3._utils.abi import filter_by_name
+
+from scripts.rpc import batch_request, supports_batch
+
+
+# Result column -> ABC getter. Each takes a token id and returns a single value.
+FIELDS = {
+    "state": "getNFTState",
+    "owner": "getNFTOwner",
+    "token_call": "getNFTTokenCall",
+    "data_submitted": "getNFTDataSubmitted",
+    "option_expires": "getOptionExpireDate",
+}
+
+
+class TokenStateReader:
+
+    """
+    Reads the TokenService state of many NFTs through ABC's getters.
+
+    Calldata is built directly from each getter's selector and the token id. Over HTTP
+    each chunk of `chunk_size` tokens is one JSON-RPC batch of `eth_call`s, and at most
+    `concurrency` chunks are in flight at a time. Other providers, such as the in-process
+    EthereumTester, which is not thread safe, are called one `eth_call` at a time. All
+    calls are pinned to one block, so the columns describe a single chain state:
+
+    > reader = TokenStateReader(w3, abc.address, abc.abi)
+    > columns = reader.read_type(token_type, 1, 10001)
+    > numpy.array(columns["owner"])[numpy.array(columns["state"]) == 2]
+
+    A getter that reverts, or whose result does not decode, leaves None in its column
+    and does not stop the other reads. The `error` column holds, for each token, None or
+    a dict of the failed fields and their exceptions.
+    """
+
+    def __init__(self, w3, address, abi, fields=None, chunk_size=200, concurrency=4):
+        self.w3 = w3
+        self.address = to_checksum_address(address)
+        self.chunk_size = chunk_size
+        self.concurrency = concurrency
+        self.rpc_calls = 0
+
+        self._getters = {}
+        for field in fields or FIELDS:
+            fn_abi = filter_by_name(FIELDS[field], abi)[0]
+            self._getters[field] = (
+                function_abi_to_4byte_selector(fn_abi),
+                fn_abi["outputs"][0]["type"],
+            )
+
+    def _decode(self, output_type, result):
+        value = self.w3.codec.decode_single(output_type, result)
+        if output_type == "address":
+            return to_checksum_address(value)
+        return value
+
+    def _call(self, call, block_identifier):
+        try:
+            return self.w3.eth.call(call, block_identifier)
+        except Exception as e:
+            return e
+
+    def _fetch_chunk(self, token_ids, block_identifier):
+        calls = [
+            {"to": self.address, "data": "0x%s%064x" % (selector.hex(), token_id)}
+            for token_id in token_ids
+            for selector, _ in self._getters.values()
+        ]
+
+        if supports_batch(self.w3):
+            # Block numbers are hex quantities in JSON-RPC; tags such as "latest" pass as is.
+            if isinstance(block_identifier, int):
+                block = hex(block_identifier)
+            else:
+                block = block_identifier
+            results = batch_request(
+                self.w3, [("eth_call", [call, block]) for call in calls], raise_errors=False
+            )
+            results = [
+                result if isinstance(result, Exception) else HexBytes(result)
+                for result in results
+            ]
+            rpc_calls = 1
+        else:
+            results = [self._call(call, block_identifier) for call in calls]
+            rpc_calls = len(calls)
+
+        rows = []
+        for i in range(len(token_ids)):
+            row_results = results[i * len(self._getters) : (i + 1) * len(self._getters)]
+            values = []
+            errors = {}
+            for (field, (_, output_type)), result in zip(self._getters.items(), row_results):
+                if not isinstance(result, Exception):
+                    try:
+                        values.append(self._decode(output_type, result))
+                        continue
+                    except Exception as e:
+                        result = e
+                values.append(None)
+                errors[field] = result
+            rows.append((values, errors or None))
+        return rows, rpc_calls
+
+    def read(self, token_ids, block_identifier=None):
+        """
+        Returns a dict of columns, `token_id`, one per field and `error`, in the order of
+        `token_ids`.
+        """
+        token_ids = list(token_ids)
+        if block_identifier is None:
+            block_identifier = self.w3.eth.blockNumber
+
+        chunks = [
+            token_ids[i : i + self.chunk_size] for i in range(0, len(token_ids), self.chunk_size)
+        ]
+        if supports_batch(self.w3) and self.concurrency > 1:
+            with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+                chunk_rows = list(
+                    executor.map(lambda chunk: self._fetch_chunk(chunk, block_identifier), chunks)
+                )
+        else:
+            chunk_rows = [self._fetch_chunk(chunk, block_identifier) for chunk in chunks]
+
+        columns = {"token_id": token_ids}
+        for field in self._getters:
+            columns[field] = []
+        columns["error"] = []
+        for rows, rpc_calls in chunk_rows:
+            self.rpc_calls += rpc_calls
+            for values, errors in rows:
+                for field, value in zip(self._getters, values):
+                    columns[field].append(value)
+                columns["error"].append(errors)
+        return columns
+
+    def read_type(self, token_type, start, stop, block_identifier=None):
+        """
+        Reads the NFTs of `token_type` with indexes in `range(start, stop)`.
+        """
+        return self.read((token_type | index for index in range(start, stop)), block_identifier)
@@ -0,0 +1,52 @@
+import copy
+
+from eth.db.atomic import AtomicDB
+from eth.db.backends.memory import MemoryDB
+from eth_tester import EthereumTester, PyEVMBackend
+from web3 import Web3
+from web3.providers.eth_tester import EthereumTesterProvider
+
+
+GENESIS_DEFAULTS = {"gas_limit": 8000000}
+
+# Initialized genesis backends, built once per process for each set of genesis overrides.
+_genesis_templates = {}
+
+
+def zero_gas_price_strategy(web3, transaction_params=None):
+    return 0  # zero gas price makes testing simpler.
+
+
+def genesis_backend(**genesis_overrides):
+    """
+    Returns a new PyEVMBackend on a genesis with `genesis_overrides` over
+    `GENESIS_DEFAULTS`.
+    """
+    genesis_overrides = dict(GENESIS_DEFAULTS, **genesis_overrides)
+    return PyEVMBackend(
+        genesis_parameters=PyEVMBackend._generate_genesis_params(overrides=genesis_overrides)
+    )
+
+
+def build_tester(**genesis_overrides):
+    """
+    Returns an EthereumTester on its own copy of a cached genesis chain, so only the first
+    chain for a set of `genesis_overrides` generates the genesis state and account keys.
+    Copying is a shallow copy of the in-memory key-value store.
+    """
+    key = tuple(sorted(genesis_overrides.items()))
+    if key not in _genesis_templates:
+        _genesis_templates[key] = genesis_backend(**genesis_overrides)
+    template = _genesis_templates[key]
+
+    pyevm_backend = copy.copy(template)
+    pyevm_backend.fork_config = dict(template.fork_config)
+    kv_store = template.chain.chaindb.db.wrapped_db.kv_store
+    pyevm_backend.chain = type(template.chain)(AtomicDB(MemoryDB(dict(kv_store))))
+    return EthereumTester(backend=pyevm_backend)
+
+
+def build_w3(tester):
+    w3 = Web3(EthereumTesterProvider(tester))
+    w3.eth.setGasPriceStrategy(zero_gas_price_strategy)
+    return w3
@@ -0,0 +1,247 @@
+import argparse
+import itertools
+import json
+import os
+import sqlite3
+
+from eth.db.atomic import AtomicDB
+from eth.db.backends.base import BaseDB
+from eth.db.chain import ChainDB
+from eth.exceptions import CanonicalHeadNotFound
+from eth_tester import EthereumTester
+
+from scripts.batching import MAX_BATCH_SIZE
+from scripts.bulk_mint import BulkMinter
+from scripts.chain import build_w3, genesis_backend
+from scripts.const import TYPE_NF_BIT
+from scripts.utils import deploy, transact, vcompile
+
+
+METADATA_KEY = b"abc-token:metadata"
+# Upper bound per minted NFT, to a new holder; the first in a batch costs more, hence the
+# fixed allowance.
+NFT_MINT_GAS = 72000
+NFT_MINT_BATCH_GAS = 200000
+DEPLOY_GAS = 7000000
+
+
+class SQLiteDB(BaseDB):
+
+    """
+    py-evm key-value database in a single SQLite file, a stand-in for LevelDB where
+    plyvel is not installed. Writes are committed by `commit` and `close`.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS kv (key BLOB PRIMARY KEY, value BLOB NOT NULL)"
+        )
+
+    def __getitem__(self, key):
+        row = self.connection.execute("SELECT value FROM kv WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            raise KeyError(key)
+        return row[0]
+
+    def __setitem__(self, key, value):
+        self.connection.execute("INSERT OR REPLACE INTO kv VALUES (?, ?)", (key, value))
+
+    def _exists(self, key):
+        return (
+            self.connection.execute("SELECT 1 FROM kv WHERE key = ?", (key,)).fetchone()
+            is not None
+        )
+
+    def __delitem__(self, key):
+        if not self.connection.execute("DELETE FROM kv WHERE key = ?", (key,)).rowcount:
+            raise KeyError(key)
+
+    def commit(self):
+        self.connection.commit()
+
+    def close(self):
+        self.connection.commit()
+        self.connection.close()
+
+
+def has_leveldb():
+    try:
+        import plyvel  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def open_chain_db(path, backend=None):
+    """
+    Opens the database at `path` with `backend`, "leveldb" (py-evm's LevelDB, needs
+    plyvel) or "sqlite". By default LevelDB is used when plyvel is available.
+    """
+    if backend is None:
+        backend = "leveldb" if has_leveldb() else "sqlite"
+
+    if backend == "leveldb":
+        from eth.db.backends.level import LevelDB
+
+        return LevelDB(path)
+    if backend == "sqlite":
+        return AtomicDB(SQLiteDB(path))
+    raise ValueError("Unknown chain database backend %r" % backend)
+
+
+class ChainStore:
+
+    """
+    An EthereumTester whose chain lives on disk at `path`.
+
+    A new store starts from a genesis with `genesis_overrides` and the default funded
+    accounts; an existing one resumes from its head block, so large states only have to
+    be built once. `metadata` holds JSON, such as the addresses deployed into the chain.
+    Call `close` (or use the store as a context manager) to flush the database.
+    """
+
+    def __init__(self, path, backend=None, **genesis_overrides):
+        self.path = path
+        self.db = open_chain_db(path, backend)
+
+        # Keys, accounts and the chain class come from an in-memory genesis; a new store
+        # also takes its genesis state.
+        pyevm_backend = genesis_backend(**genesis_overrides)
+        chain_class = type(pyevm_backend.chain)
+        try:
+            ChainDB(self.db).get_canonical_head()
+            self.created = False
+        except CanonicalHeadNotFound:
+            kv_store = pyevm_backend.chain.chaindb.db.wrapped_db.kv_store
+            with self.db.atomic_batch() as batch:
+                for key, value in kv_store.items():
+                    batch[key] = value
+            self.created = True
+
+        pyevm_backend.chain = chain_class(self.db)
+        self.tester = EthereumTester(backend=pyevm_backend)
+
+    @property
+    def chain(self):
+        return self.tester.backend.chain
+
+    @property
+    def metadata(self):
+        try:
+            return json.loads(self.db[METADATA_KEY].decode())
+        except KeyError:
+            return {}
+
+    @metadata.setter
+    def metadata(self, value):
+        self.db[METADATA_KEY] = json.dumps(value).encode()
+
+    def web3(self):
+        return build_w3(self.tester)
+
+    def flush(self):
+        wrapped_db = getattr(self.db, "wrapped_db", None)
+        if isinstance(wrapped_db, SQLiteDB):
+            wrapped_db.commit()
+
+    def close(self):
+        wrapped_db = getattr(self.db, "wrapped_db", self.db)
+        if isinstance(wrapped_db, SQLiteDB):
+            wrapped_db.close()
+        elif hasattr(self.db, "db"):
+            self.db.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def setup_token(store, w3):
+    """
+    Deploys ABC with a non-fungible type and its TokenService into the store, once.
+    """
+    metadata = store.metadata
+    if "abc" in metadata:
+        return metadata
+
+    owner = w3.eth.accounts[0]
+    abc_contract = vcompile("contracts/ABC.vy")
+    abc = w3.eth.contract(
+        address=deploy(w3, abc_contract, gas=DEPLOY_GAS), abi=abc_contract["abi"]
+    )
+    transact(w3, abc.functions.createToken("Non-Fungible", True))
+    token_type = TYPE_NF_BIT | abc.functions.nonce().call({"gas": 100000}) << 128
+
+    service = deploy(
+        w3, vcompile("contracts/TokenService.vy"), abc.address, token_type, gas=DEPLOY_GAS
+    )
+    transact(w3, abc.functions.setTokenService(service, token_type))
+    transact(w3, abc.functions.setMintTokenApproval(token_type, owner, True))
+
+    metadata.update(abc=abc.address, token_service=service, token_type=token_type, minted=0)
+    store.metadata = metadata
+    store.flush()
+    return metadata
+
+
+def mint_nfts(store, w3, count, batch_size=MAX_BATCH_SIZE, checkpoint_path=None):
+    """
+    Mints `count` NFTs of the store's token to its accounts in turn and returns the
+    `MintReport`. The chain and its `minted` count are committed after every window, so an
+    interrupted run keeps what it minted; the next call with the same `checkpoint_path`
+    finishes that run. The checkpoint is removed once every batch is minted.
+    """
+    metadata = setup_token(store, w3)
+    abc = w3.eth.contract(address=metadata["abc"], abi=vcompile("contracts/ABC.vy")["abi"])
+    recipients = itertools.islice(itertools.cycle(w3.eth.accounts), count)
+    batch_size = min(batch_size, MAX_BATCH_SIZE)
+
+    def commit_window(minted):
+        metadata["minted"] += minted
+        store.metadata = metadata
+        store.flush()
+
+    minter = BulkMinter(
+        w3,
+        abc,
+        metadata["token_type"],
+        batch_size=batch_size,
+        gas=NFT_MINT_GAS * batch_size + NFT_MINT_BATCH_GAS,
+        checkpoint_path=checkpoint_path,
+        on_window=commit_window,
+    )
+    report = minter.run((address, 1) for address in recipients)
+    if checkpoint_path is not None and not (report.failed or report.pending):
+        os.remove(checkpoint_path)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create or extend an on-disk test chain.")
+    parser.add_argument("path", help="LevelDB directory or SQLite file")
+    parser.add_argument("--backend", choices=["leveldb", "sqlite"], default=None)
+    parser.add_argument("--gas-limit", type=int, default=8000000, help="for a new chain")
+    parser.add_argument("--mint", type=int, default=0, help="NFTs to add to the chain")
+    # About 70k gas per NFT, so the largest batch, 100, fits the default gas limit.
+    parser.add_argument("--batch-size", type=int, default=MAX_BATCH_SIZE)
+    parser.add_argument("--checkpoint", default=None, help="default: <path>.mint-checkpoint")
+    args = parser.parse_args()
+
+    with ChainStore(args.path, args.backend, gas_limit=args.gas_limit) as store:
+        w3 = store.web3()
+        if args.mint:
+            checkpoint_path = args.checkpoint or args.path.rstrip(os.sep) + ".mint-checkpoint"
+            report = mint_nfts(store, w3, args.mint, args.batch_size, checkpoint_path)
+            print(report)
+            if report.failed or report.pending:
+                print("Run again with the same --mint and checkpoint to finish this run.")
+
+        head = w3.eth.getBlock("latest")
+        print(
+            "%s: block %d, %s"
+            % (args.path, head.number, json.dumps(store.metadata, sort_keys=True))
+        )
@@ -0,0 +1,165 @@
+import copy
+import hashlib
+import json
+import os
+import tempfile
+
+import vyper
+from vyper import compiler
+
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "abc-token", "vyper")
+DEFAULT_MAX_SIZE = 64 * 1024 * 1024  # bytes
+
+
+class CompileCache:
+
+    """
+    On-disk cache of Vyper compiler output.
+
+    Entries are keyed by the source hash, the compiler version, the requested
+    output formats and any interface codes, so an unchanged contract is
+    compiled once per machine. When the directory grows past `max_size` bytes
+    the least recently used entries are evicted.
+
+    The location and size can be overridden with the `ABC_COMPILE_CACHE_DIR`
+    and `ABC_COMPILE_CACHE_SIZE` environment variables. An empty
+    `ABC_COMPILE_CACHE_DIR` keeps the cache in memory only.
+
+    Entries are written atomically and readers tolerate entries evicted under
+    them, so several processes, such as pytest-xdist workers, can share a
+    directory.
+    """
+
+    def __init__(self, path=None, max_size=None):
+        if path is None:
+            path = os.environ.get("ABC_COMPILE_CACHE_DIR", DEFAULT_CACHE_DIR)
+        if max_size is None:
+            max_size = int(os.environ.get("ABC_COMPILE_CACHE_SIZE", DEFAULT_MAX_SIZE))
+
+        self.path = path
+        self.max_size = max_size
+        self._memory = {}
+
+    def key(self, source_code, output_formats, interface_codes=None):
+        payload = json.dumps(
+            {
+                "source": hashlib.sha256(source_code.encode("utf-8")).hexdigest(),
+                "compiler": vyper.__version__,
+                "formats": sorted(set(output_formats)),
+                "interfaces": interface_codes,
+            },
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _entry_path(self, key):
+        return os.path.join(self.path, key + ".json")
+
+    def get(self, key):
+        if key in self._memory:
+            return copy.deepcopy(self._memory[key])
+
+        if not self.path:
+            return None
+
+        entry_path = self._entry_path(key)
+        try:
+            with open(entry_path) as f:
+                value = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+        # Touch the entry so eviction drops the least recently used first.
+        try:
+            os.utime(entry_path)
+        except OSError:
+            pass
+
+        self._memory[key] = value
+        return copy.deepcopy(value)
+
+    def put(self, key, value):
+        self._memory[key] = copy.deepcopy(value)
+
+        if not self.path:
+            return
+
+        os.makedirs(self.path, exist_ok=True)
+        # Write to a temp file and rename, so concurrent readers never see a partial entry.
+        fd, tmp_path = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(value, f)
+            os.replace(tmp_path, self._entry_path(key))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        self.evict()
+
+    def evict(self):
+        if not self.path or not os.path.isdir(self.path):
+            return
+
+        entries = []
+        total_size = 0
+        for name in os.listdir(self.path):
+            if not name.endswith(".json"):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.path, name))
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name))
+            total_size += stat.st_size
+
+        for _, size, name in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            try:
+                os.remove(os.path.join(self.path, name))
+            except FileNotFoundError:
+                pass
+            self._memory.pop(name[: -len(".json")], None)
+            total_size -= size
+
+    def clear(self):
+        self._memory.clear()
+        if not self.path or not os.path.isdir(self.path):
+            return
+        for name in os.listdir(self.path):
+            if name.endswith(".json"):
+                try:
+                    os.remove(os.path.join(self.path, name))
+                except FileNotFoundError:
+                    pass
+
+    def compile_code(self, source_code, output_formats, interface_codes=None):
+        key = self.key(source_code, output_formats, interface_codes)
+        compiled_contract = self.get(key)
+
+        if compiled_contract is None:
+            compiled_contract = compiler.compile_code(
+                source_code, output_formats, interface_codes=interface_codes
+            )
+            self.put(key, compiled_contract)
+
+        return compiled_contract
+
+
+_default_cache = None
+
+
+def get_default_cache():
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = CompileCache()
+    return _default_cache
+
+
+def compile_code(source_code, output_formats, interface_codes=None):
+    return get_default_cache().compile_code(
+        source_code, output_formats, interface_codes=interface_codes
+    )
@@ -1,3 +1,8 @@
 ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
 
+# Token id layout, as in ABC.vy
+TYPE_MASK = ((1 << 256) - 1) ^ ((1 << 128) - 1)
+NF_INDEX_MASK = (1 << 128) - 1
+TYPE_NF_BIT = 1 << 255
+
 NETWORK_CONFIG = {"HOST": "localhost", "PORT": 8555}
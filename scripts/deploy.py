@@ -1,7 +1,7 @@
 from datetime import datetime, timedelta
 import json
 from web3 import Web3
-from utils import deploy
+from scripts.utils import deploy
 
 
 def to_timestamp(date):
@@ -0,0 +1,121 @@
+import hashlib
+import json
+import warnings
+
+from eth_abi.codec import ABICodec
+from eth_utils import event_abi_to_log_topic, to_checksum_address
+from hexbytes import HexBytes
+from web3._utils.abi import build_default_registry, filter_by_type
+from web3._utils.events import get_event_data
+from web3.exceptions import InvalidEventABI, LogTopicError, MismatchedABI
+
+
+class EventDecoder:
+
+    """
+    Decodes every log of a receipt in one pass, by looking up the event ABI for each
+    log's topic0 instead of trying every event of a contract against every log.
+
+    ABIs registered with an address only decode logs emitted by that address; ABIs
+    registered without one decode matching logs from any contract. One decoder can hold
+    several contracts:
+
+    > decoder = EventDecoder()
+    > decoder.register(abc.abi, abc.address)
+    > decoder.register(token_service.abi, token_service.address)
+    > for event in decoder.decode_receipt(receipt):
+    >     print(event.address, event.event, event.args)
+    """
+
+    def __init__(self, codec=None):
+        self.codec = codec or ABICodec(build_default_registry())
+        self._by_topic = {}
+        self._by_address = {}
+
+    def register(self, contract_abi, address=None):
+        topics = {
+            HexBytes(event_abi_to_log_topic(event_abi)): event_abi
+            for event_abi in filter_by_type("event", contract_abi)
+            if not event_abi.get("anonymous")
+        }
+        if address is None:
+            self._by_topic.update(topics)
+        else:
+            self._by_address.setdefault(to_checksum_address(address), {}).update(topics)
+        return self
+
+    def event_abi(self, log):
+        if not log["topics"]:
+            return None
+        topic = HexBytes(log["topics"][0])
+        by_address = self._by_address.get(log.get("address"))
+        if by_address and topic in by_address:
+            return by_address[topic]
+        return self._by_topic.get(topic)
+
+    def decode_log(self, log):
+        event_abi = self.event_abi(log)
+        if event_abi is None:
+            return None
+        return self._decode(event_abi, log)
+
+    def _decode(self, event_abi, log):
+        # Like processReceipt's default WARN mode, a log whose topic matches but whose
+        # layout does not, e.g. an event with the same signature but other indexed
+        # arguments, is skipped with a warning.
+        try:
+            return get_event_data(self.codec, event_abi, log)
+        except (MismatchedABI, LogTopicError, InvalidEventABI, TypeError) as e:
+            tx_hash = log.get("transactionHash")
+            warnings.warn(
+                "Discarded log %s of transaction %s, which does not match %s: %s(%s)"
+                % (
+                    log.get("logIndex"),
+                    HexBytes(tx_hash).hex() if tx_hash else None,
+                    event_abi["name"],
+                    type(e).__name__,
+                    e,
+                )
+            )
+            return None
+
+    def decode_logs(self, logs, event_name=None):
+        events = []
+        for log in logs:
+            event_abi = self.event_abi(log)
+            if event_abi is None:
+                continue
+            if event_name is not None and event_abi["name"] != event_name:
+                continue
+            event = self._decode(event_abi, log)
+            if event is not None:
+                events.append(event)
+        return events
+
+    def decode_receipt(self, receipt, event_name=None):
+        return self.decode_logs(receipt["logs"], event_name)
+
+    def group_receipt(self, receipt):
+        """
+        Decodes a receipt and returns its events grouped by event name, in log order.
+        """
+        grouped = {}
+        for event in self.decode_receipt(receipt):
+            grouped.setdefault(event.event, []).append(event)
+        return grouped
+
+
+# Shared decoders by ABI content, so there is one per distinct contract ABI.
+_decoders = {}
+
+
+def get_decoder(contract_abi):
+    """
+    Returns a shared decoder for `contract_abi`, not bound to any address, built the
+    first time an ABI with that content is seen. Equal ABIs share it, even when they are
+    separate copies, e.g. from separate compiles or deploys.
+    """
+    key = hashlib.sha256(json.dumps(contract_abi, sort_keys=True).encode("utf-8")).digest()
+    if key not in _decoders:
+        _decoders[key] = EventDecoder().register(contract_abi)
+    return _decoders[key]
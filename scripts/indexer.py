@@ -0,0 +1,314 @@
+import argparse
+import sqlite3
+import time
+
+from eth_utils import event_abi_to_log_topic, to_checksum_address, to_hex
+from web3 import Web3
+from web3._utils.abi import filter_by_type
+
+from scripts.const import NETWORK_CONFIG, TYPE_MASK
+from scripts.events import EventDecoder
+from scripts.utils import vcompile
+
+
+INDEXED_EVENTS = ["TransferSingle", "TransferBatch", "URI", "ApprovalForAll"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS transfers (
+    block_number INTEGER NOT NULL,
+    block_hash TEXT NOT NULL,
+    tx_hash TEXT NOT NULL,
+    log_index INTEGER NOT NULL,
+    batch_index INTEGER NOT NULL,
+    operator TEXT NOT NULL,
+    from_address TEXT NOT NULL,
+    to_address TEXT NOT NULL,
+    token_id TEXT NOT NULL,
+    token_type TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (tx_hash, log_index, batch_index)
+);
+CREATE INDEX IF NOT EXISTS transfers_from ON transfers (from_address);
+CREATE INDEX IF NOT EXISTS transfers_to ON transfers (to_address);
+CREATE INDEX IF NOT EXISTS transfers_token_id ON transfers (token_id);
+CREATE INDEX IF NOT EXISTS transfers_token_type ON transfers (token_type);
+CREATE INDEX IF NOT EXISTS transfers_block ON transfers (block_number);
+
+CREATE TABLE IF NOT EXISTS uris (
+    block_number INTEGER NOT NULL,
+    block_hash TEXT NOT NULL,
+    tx_hash TEXT NOT NULL,
+    log_index INTEGER NOT NULL,
+    token_id TEXT NOT NULL,
+    uri TEXT NOT NULL,
+    PRIMARY KEY (tx_hash, log_index)
+);
+CREATE INDEX IF NOT EXISTS uris_token_id ON uris (token_id);
+CREATE INDEX IF NOT EXISTS uris_block ON uris (block_number);
+
+CREATE TABLE IF NOT EXISTS approvals (
+    block_number INTEGER NOT NULL,
+    block_hash TEXT NOT NULL,
+    tx_hash TEXT NOT NULL,
+    log_index INTEGER NOT NULL,
+    owner TEXT NOT NULL,
+    operator TEXT NOT NULL,
+    approved INTEGER NOT NULL,
+    PRIMARY KEY (tx_hash, log_index)
+);
+CREATE INDEX IF NOT EXISTS approvals_owner ON approvals (owner);
+CREATE INDEX IF NOT EXISTS approvals_block ON approvals (block_number);
+
+CREATE TABLE IF NOT EXISTS checkpoints (
+    address TEXT PRIMARY KEY,
+    block_number INTEGER NOT NULL,
+    block_hash TEXT NOT NULL
+);
+"""
+
+EVENT_TABLES = ["transfers", "uris", "approvals"]
+
+
+def to_uint_key(value):
+    # uint256 does not fit an SQLite integer; fixed-width hex keeps exact values and order.
+    return "%064x" % value
+
+
+def token_type_of(token_id):
+    return token_id & TYPE_MASK
+
+
+class TransferIndexer:
+
+    """
+    Streams ABC's TransferSingle, TransferBatch, URI and ApprovalForAll logs into SQLite.
+
+    Logs are fetched with `eth_getLogs` over ranges of `chunk_size` blocks and each range is
+    written in one transaction together with the checkpoint, so an interrupted run resumes
+    from the last complete range. `sync()` catches up to the head, `follow()` keeps going:
+
+    > indexer = TransferIndexer(w3, abc_address, "abc.db")
+    > indexer.sync()
+    > indexer.transfers_to(owner)
+
+    Batch transfers are stored one row per token id, skipping the zero-id padding. uint256
+    columns (token_id, token_type, value) are 64 character hex strings, see `to_uint_key`.
+    If a checkpointed block is no longer canonical, rows from orphaned blocks are dropped and
+    those blocks are indexed again.
+    """
+
+    def __init__(
+        self,
+        w3,
+        address,
+        db_path=":memory:",
+        abi=None,
+        start_block=0,
+        chunk_size=1000,
+        confirmations=0,
+    ):
+        self.w3 = w3
+        self.address = to_checksum_address(address)
+        self.start_block = start_block
+        self.chunk_size = chunk_size
+        self.confirmations = confirmations
+        self.db = sqlite3.connect(db_path)
+        self.db.executescript(SCHEMA)
+
+        abi = abi or vcompile("contracts/ABC.vy")["abi"]
+        events = [e for e in filter_by_type("event", abi) if e["name"] in INDEXED_EVENTS]
+        self.decoder = EventDecoder().register(events, self.address)
+        self.topics = [to_hex(event_abi_to_log_topic(e)) for e in events]
+
+    @property
+    def checkpoint(self):
+        return self.db.execute(
+            "SELECT block_number, block_hash FROM checkpoints WHERE address = ?", (self.address,)
+        ).fetchone()
+
+    def _set_checkpoint(self, block):
+        self.db.execute(
+            "INSERT OR REPLACE INTO checkpoints (address, block_number, block_hash) "
+            "VALUES (?, ?, ?)",
+            (self.address, block.number, block.hash.hex()),
+        )
+
+    def _rewind(self):
+        """
+        Drops rows from blocks that are no longer canonical and moves the checkpoint back to
+        the last block that still is. Returns the block to resume from.
+        """
+        checkpoint = self.checkpoint
+        if checkpoint is None:
+            return self.start_block
+
+        block_number, block_hash = checkpoint
+        block = self.w3.eth.getBlock(block_number)
+        if block is not None and block.hash.hex() == block_hash:
+            return block_number + 1
+
+        stored = self.db.execute(
+            " UNION ".join(
+                "SELECT DISTINCT block_number, block_hash FROM %s" % table for table in EVENT_TABLES
+            )
+            + " ORDER BY block_number DESC"
+        ).fetchall()
+        resume_from = self.start_block
+        with self.db:
+            for number, block_hash in stored:
+                block = self.w3.eth.getBlock(number)
+                if block is not None and block.hash.hex() == block_hash:
+                    self._set_checkpoint(block)
+                    resume_from = number + 1
+                    break
+                for table in EVENT_TABLES:
+                    self.db.execute("DELETE FROM %s WHERE block_hash = ?" % table, (block_hash,))
+            else:
+                self.db.execute("DELETE FROM checkpoints WHERE address = ?", (self.address,))
+        return resume_from
+
+    def _store(self, event):
+        args = event.args
+        row = (
+            event.blockNumber,
+            event.blockHash.hex(),
+            event.transactionHash.hex(),
+            event.logIndex,
+        )
+
+        if event.event == "TransferSingle":
+            self._store_transfer(row, 0, args, args._token_id, args._value)
+        elif event.event == "TransferBatch":
+            for i, (token_id, value) in enumerate(zip(args._token_ids, args._value)):
+                if token_id != 0:
+                    self._store_transfer(row, i, args, token_id, value)
+        elif event.event == "URI":
+            self.db.execute(
+                "INSERT OR IGNORE INTO uris VALUES (?, ?, ?, ?, ?, ?)",
+                row + (to_uint_key(args._token_id), args._value),
+            )
+        elif event.event == "ApprovalForAll":
+            self.db.execute(
+                "INSERT OR IGNORE INTO approvals VALUES (?, ?, ?, ?, ?, ?, ?)",
+                row + (args._owner, args._operator, int(args._approved)),
+            )
+
+    def _store_transfer(self, row, batch_index, args, token_id, value):
+        self.db.execute(
+            "INSERT OR IGNORE INTO transfers VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            row
+            + (
+                batch_index,
+                args._operator,
+                args._from,
+                args._to,
+                to_uint_key(token_id),
+                to_uint_key(token_type_of(token_id)),
+                to_uint_key(value),
+            ),
+        )
+
+    def sync(self, to_block=None):
+        """
+        Indexes every block from the checkpoint up to `to_block`, by default the head minus
+        `confirmations`. Returns the number of logs stored.
+        """
+        from_block = self._rewind()
+        if to_block is None:
+            to_block = self.w3.eth.blockNumber - self.confirmations
+
+        stored = 0
+        while from_block <= to_block:
+            chunk_end = min(from_block + self.chunk_size - 1, to_block)
+            logs = self.w3.eth.getLogs(
+                {
+                    "address": self.address,
+                    "fromBlock": from_block,
+                    "toBlock": chunk_end,
+                    "topics": [self.topics],
+                }
+            )
+            with self.db:
+                for event in self.decoder.decode_logs(logs):
+                    self._store(event)
+                self._set_checkpoint(self.w3.eth.getBlock(chunk_end))
+            stored += len(logs)
+            from_block = chunk_end + 1
+        return stored
+
+    def follow(self, poll_interval=2, stop=None):
+        while stop is None or not stop():
+            self.sync()
+            time.sleep(poll_interval)
+
+    def _transfers(self, where, params):
+        return self.db.execute(
+            "SELECT block_number, tx_hash, log_index, batch_index, operator, from_address, "
+            "to_address, token_id, token_type, value FROM transfers WHERE %s "
+            "ORDER BY block_number, log_index, batch_index" % where,
+            params,
+        ).fetchall()
+
+    def transfers_to(self, owner):
+        return self._transfers("to_address = ?", (to_checksum_address(owner),))
+
+    def transfers_from(self, owner):
+        return self._transfers("from_address = ?", (to_checksum_address(owner),))
+
+    def transfers_of_token(self, token_id):
+        return self._transfers("token_id = ?", (to_uint_key(token_id),))
+
+    def transfers_of_type(self, token_type):
+        return self._transfers("token_type = ?", (to_uint_key(token_type),))
+
+    def uri(self, token_id):
+        row = self.db.execute(
+            "SELECT uri FROM uris WHERE token_id = ? ORDER BY block_number DESC, log_index DESC",
+            (to_uint_key(token_id),),
+        ).fetchone()
+        return row[0] if row else None
+
+    def operators(self, owner):
+        rows = self.db.execute(
+            "SELECT operator, approved FROM approvals WHERE owner = ? "
+            "ORDER BY block_number, log_index",
+            (to_checksum_address(owner),),
+        ).fetchall()
+        approved = {}
+        for operator, is_approved in rows:
+            approved[operator] = bool(is_approved)
+        return {operator for operator, is_approved in approved.items() if is_approved}
+
+    def close(self):
+        self.db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Index ABC transfer events into SQLite.")
+    parser.add_argument("address", help="ABC contract address")
+    parser.add_argument("--db", default="abc-index.db")
+    parser.add_argument("--start-block", type=int, default=0)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--confirmations", type=int, default=0)
+    parser.add_argument("--follow", action="store_true", help="keep following the chain head")
+    args = parser.parse_args()
+
+    endpoint = f"http://{NETWORK_CONFIG['HOST']}:{NETWORK_CONFIG['PORT']}"
+    w3 = Web3(Web3.HTTPProvider(endpoint))
+
+    indexer = TransferIndexer(
+        w3,
+        args.address,
+        args.db,
+        start_block=args.start_block,
+        chunk_size=args.chunk_size,
+        confirmations=args.confirmations,
+    )
+    if args.follow:
+        indexer.follow()
+    else:
+        count = indexer.sync()
+        if indexer.checkpoint is None:
+            print("Nothing confirmed yet")
+        else:
+            print("Indexed %d logs up to block %d" % (count, indexer.checkpoint[0]))
@@ -0,0 +1,215 @@
+from collections import OrderedDict
+
+from eth_utils import event_abi_to_log_topic, to_checksum_address, to_hex
+from web3._utils.abi import filter_by_type
+
+from scripts.const import NF_INDEX_MASK, TYPE_MASK, TYPE_NF_BIT, ZERO_ADDRESS
+from scripts.events import EventDecoder
+from scripts.utils import vcompile
+
+
+TRANSFER_EVENTS = ["TransferSingle", "TransferBatch"]
+
+
+class ReorgTooDeep(Exception):
+    pass
+
+
+def is_nf_item(token_id):
+    return token_id & TYPE_NF_BIT and token_id & NF_INDEX_MASK
+
+
+class OwnershipView:
+
+    """
+    Off-chain view of ABC ownership, maintained from TransferSingle/TransferBatch logs.
+
+    It mirrors the contract's bookkeeping: an NFT's owner is the `_to` of its last transfer,
+    and `balances` move by `_value` per token type for NFTs and per token id for fungible
+    tokens. `finalize` logs a zero value transfer to the zero address, so the NFT loses its
+    owner but the type balance is left alone, as on chain. `setOwner` calls that do not go
+    through a logged transfer are not visible here.
+
+    Every change made while applying a block is recorded in that block's undo log, so the
+    last `max_depth` blocks can be rolled back on a reorg. `sync()` follows a chain:
+
+    > view = OwnershipView(w3, abc_address)
+    > view.sync()
+    > view.owner_of(token_id), view.tokens_of(owner), view.balance_of(owner, token_id)
+    """
+
+    def __init__(self, w3, address, abi=None, start_block=0, max_depth=64, chunk_size=1000):
+        self.w3 = w3
+        self.address = to_checksum_address(address)
+        self.start_block = start_block
+        self.max_depth = max_depth
+        self.chunk_size = chunk_size
+
+        abi = abi or vcompile("contracts/ABC.vy")["abi"]
+        events = [e for e in filter_by_type("event", abi) if e["name"] in TRANSFER_EVENTS]
+        self.decoder = EventDecoder().register(events, self.address)
+        self.topics = [to_hex(event_abi_to_log_topic(e)) for e in events]
+
+        self.head = None
+        self._owners = {}
+        self._tokens = {}
+        self._balances = {}
+        self._undo_logs = OrderedDict()
+        self._undo = None
+
+    def owner_of(self, token_id):
+        return self._owners.get(token_id, ZERO_ADDRESS)
+
+    def tokens_of(self, owner):
+        return frozenset(self._tokens.get(owner, ()))
+
+    def balance_of(self, owner, token_id):
+        # Same answers as ABC.balanceOf: 0 or 1 for an NFT, the per-type count for an NF
+        # type id and the balance for a fungible token id.
+        if is_nf_item(token_id):
+            return int(self.owner_of(token_id) == owner)
+        return self._balances.get((owner, token_id), 0)
+
+    def _set_owner(self, token_id, owner):
+        previous = self._owners.get(token_id, ZERO_ADDRESS)
+        if previous == owner:
+            return
+        self._undo.append((self._set_owner, token_id, previous))
+
+        if previous != ZERO_ADDRESS:
+            self._tokens[previous].discard(token_id)
+            if not self._tokens[previous]:
+                del self._tokens[previous]
+        if owner == ZERO_ADDRESS:
+            del self._owners[token_id]
+        else:
+            self._owners[token_id] = owner
+            self._tokens.setdefault(owner, set()).add(token_id)
+
+    def _add_balance(self, owner, key, delta):
+        if owner == ZERO_ADDRESS or delta == 0:
+            return
+        self._undo.append((self._add_balance, owner, key, -delta))
+
+        balance = self._balances.get((owner, key), 0) + delta
+        if balance:
+            self._balances[(owner, key)] = balance
+        else:
+            del self._balances[(owner, key)]
+
+    def _apply_transfer(self, from_address, to_address, token_id, value):
+        if is_nf_item(token_id):
+            self._set_owner(token_id, to_address)
+            key = token_id & TYPE_MASK
+        else:
+            key = token_id
+        self._add_balance(from_address, key, -value)
+        self._add_balance(to_address, key, value)
+
+    def apply_block(self, number, block_hash, events):
+        """
+        Applies the decoded transfer events of one block, in log order.
+        """
+        if self.head is not None and number <= self.head[0]:
+            raise ValueError("Block %d is not after the view head %d" % (number, self.head[0]))
+
+        self._undo = []
+        for event in events:
+            args = event.args
+            if event.event == "TransferSingle":
+                self._apply_transfer(args._from, args._to, args._token_id, args._value)
+            elif event.event == "TransferBatch":
+                for token_id, value in zip(args._token_ids, args._value):
+                    if token_id != 0:
+                        self._apply_transfer(args._from, args._to, token_id, value)
+        self._undo_logs[number] = (block_hash, self._undo)
+        self._undo = None
+        self.head = (number, block_hash)
+
+        while self._undo_logs and next(iter(self._undo_logs)) <= number - self.max_depth:
+            self._undo_logs.popitem(last=False)
+
+    def rollback(self, number):
+        """
+        Undoes every block after `number`.
+        """
+        if self.head is None or number >= self.head[0]:
+            return
+        if number + 1 not in self._undo_logs:
+            raise ReorgTooDeep(
+                "Cannot roll back to block %d, only the last %d blocks are kept"
+                % (number, self.max_depth)
+            )
+
+        while self._undo_logs and next(reversed(self._undo_logs)) > number:
+            _, (_, undo) = self._undo_logs.popitem()
+            self._undo = []
+            for op in reversed(undo):
+                op[0](*op[1:])
+        self._undo = None
+
+        if number < self.start_block:
+            self.head = None
+        elif number in self._undo_logs:
+            self.head = (number, self._undo_logs[number][0])
+        else:
+            self.head = (number, self._block_hash(number))
+
+    def _fork_point(self):
+        """
+        Returns the last applied block that is still canonical, or None if the view is
+        on the canonical chain.
+        """
+        if self.head is None or self.head[1] == self._block_hash(self.head[0]):
+            return None
+        for number in reversed(self._undo_logs):
+            if self._undo_logs[number][0] == self._block_hash(number):
+                return number
+        raise ReorgTooDeep("No canonical block in the last %d blocks" % self.max_depth)
+
+    def _block_hash(self, number):
+        block = self.w3.eth.getBlock(number)
+        return block.hash.hex() if block is not None else None
+
+    def sync(self, to_block=None):
+        """
+        Rolls back orphaned blocks if the chain reorganized, then applies every block up to
+        `to_block`, by default the head. Returns the number of blocks applied.
+        """
+        fork_point = self._fork_point()
+        if fork_point is not None:
+            self.rollback(fork_point)
+
+        from_block = self.start_block if self.head is None else self.head[0] + 1
+        if to_block is None:
+            to_block = self.w3.eth.blockNumber
+        if from_block > to_block:
+            return 0
+
+        applied = 0
+        for chunk_start in range(from_block, to_block + 1, self.chunk_size):
+            chunk_end = min(chunk_start + self.chunk_size - 1, to_block)
+            logs = self.w3.eth.getLogs(
+                {
+                    "address": self.address,
+                    "fromBlock": chunk_start,
+                    "toBlock": chunk_end,
+                    "topics": [self.topics],
+                }
+            )
+            by_block = {}
+            for event in self.decoder.decode_logs(logs):
+                by_block.setdefault(event.blockNumber, []).append(event)
+
+            for number in range(chunk_start, chunk_end + 1):
+                events = by_block.get(number, [])
+                if events:
+                    block_hash = events[0].blockHash.hex()
+                elif number > to_block - self.max_depth:
+                    # Only blocks that can still be rolled back need their hash.
+                    block_hash = self._block_hash(number)
+                else:
+                    block_hash = None
+                self.apply_block(number, block_hash, events)
+                applied += 1
+        return applied
@@ -0,0 +1,122 @@
+import time
+
+from hexbytes import HexBytes
+from web3._utils.method_formatters import receipt_formatter
+from web3.datastructures import AttributeDict
+from web3.exceptions import TimeExhausted, TransactionNotFound
+
+from scripts.rpc import batch_request, supports_batch
+
+
+class ReceiptWaiter:
+
+    """
+    Waits for many transaction receipts at once.
+
+    Over HTTP every poll is a single JSON-RPC batch request covering all the pending
+    hashes; other providers fall back to one `eth_getTransactionReceipt` per hash.
+    The poll interval starts at `min_poll`, grows by `backoff` up to `max_poll` while
+    nothing new is mined, and drops back to `min_poll` as soon as a receipt arrives:
+
+    > waiter = ReceiptWaiter(w3)
+    > waiter.add_many(tx_hashes)
+    > for tx_hash, receipt in waiter.iter_receipts():
+    >     ...
+    """
+
+    def __init__(self, w3, timeout=120, min_poll=0.1, max_poll=2, backoff=2):
+        self.w3 = w3
+        self.timeout = timeout
+        self.min_poll = min_poll
+        self.max_poll = max_poll
+        self.backoff = backoff
+        self.pending = {}
+        self.rpc_calls = 0
+
+    def add(self, tx_hash):
+        tx_hash = HexBytes(tx_hash)
+        self.pending[tx_hash.hex()] = tx_hash
+
+    def add_many(self, tx_hashes):
+        for tx_hash in tx_hashes:
+            self.add(tx_hash)
+
+    def _fetch_batch(self, tx_hashes):
+        results = batch_request(
+            self.w3, [("eth_getTransactionReceipt", [tx_hash]) for tx_hash in tx_hashes]
+        )
+        self.rpc_calls += 1
+        return {
+            tx_hash: AttributeDict.recursive(receipt_formatter(result))
+            for tx_hash, result in zip(tx_hashes, results)
+            if result is not None
+        }
+
+    def _fetch_each(self, tx_hashes):
+        receipts = {}
+        for tx_hash in tx_hashes:
+            self.rpc_calls += 1
+            try:
+                receipt = self.w3.eth.getTransactionReceipt(tx_hash)
+            except TransactionNotFound:
+                continue
+            if receipt is not None:
+                receipts[tx_hash] = receipt
+        return receipts
+
+    def poll(self):
+        """
+        Checks every pending hash once and returns the receipts that are now available.
+        """
+        if not self.pending:
+            return {}
+
+        if supports_batch(self.w3):
+            receipts = self._fetch_batch(list(self.pending))
+        else:
+            receipts = self._fetch_each(list(self.pending))
+
+        for tx_hash in receipts:
+            del self.pending[tx_hash]
+        return receipts
+
+    def iter_receipts(self):
+        """
+        Yields `(tx_hash, receipt)` pairs, `tx_hash` as a hex string, in the order they are
+        mined. Raises `TimeExhausted` if some are still pending after `timeout` seconds;
+        those stay in `pending`.
+        """
+        deadline = time.monotonic() + self.timeout
+        interval = self.min_poll
+
+        while self.pending:
+            receipts = self.poll()
+            yield from receipts.items()
+            if not self.pending:
+                break
+
+            if receipts:
+                interval = self.min_poll
+            else:
+                interval = min(interval * self.backoff, self.max_poll)
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeExhausted(
+                    "%d transactions are not in the chain after %s seconds"
+                    % (len(self.pending), self.timeout)
+                )
+            time.sleep(min(interval, remaining))
+
+    def wait(self, tx_hashes):
+        """
+        Waits for all of `tx_hashes` and returns their receipts in the same order.
+        """
+        tx_hashes = [HexBytes(tx_hash).hex() for tx_hash in tx_hashes]
+        self.add_many(tx_hashes)
+        receipts = dict(self.iter_receipts())
+        return [receipts[tx_hash] for tx_hash in tx_hashes]
+
+
+def wait_for_receipts(w3, tx_hashes, timeout=120):
+    return ReceiptWaiter(w3, timeout=timeout).wait(tx_hashes)
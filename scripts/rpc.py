@@ -0,0 +1,44 @@
+import itertools
+import json
+
+from web3._utils.request import make_post_request
+from web3.providers import HTTPProvider
+
+
+_request_ids = itertools.count()
+
+
+def supports_batch(w3):
+    return isinstance(w3.provider, HTTPProvider)
+
+
+def batch_request(w3, calls, raise_errors=True):
+    """
+    Sends `(method, params)` calls to an HTTP provider as one JSON-RPC batch and returns
+    their raw results in the same order. Results are not run through web3's formatters.
+    Raises ValueError for the first call that failed, as web3 does for a single request,
+    or with `raise_errors=False` returns that ValueError in the call's place.
+    """
+    provider = w3.provider
+    request_ids = []
+    request = []
+    for method, params in calls:
+        request_id = next(_request_ids)
+        request_ids.append(request_id)
+        request.append({"jsonrpc": "2.0", "method": method, "params": params, "id": request_id})
+
+    raw_response = make_post_request(
+        provider.endpoint_uri, json.dumps(request).encode(), **provider.get_request_kwargs()
+    )
+    responses = {response["id"]: response for response in json.loads(raw_response)}
+
+    results = []
+    for request_id in request_ids:
+        response = responses[request_id]
+        if "error" in response:
+            if raise_errors:
+                raise ValueError(response["error"])
+            results.append(ValueError(response["error"]))
+        else:
+            results.append(response.get("result"))
+    return results
@@ -2,6 +2,7 @@ import argparse
 import dateutil.parser
 
 from datetime import date, datetime, timedelta
+from scripts.events import get_decoder
 from scripts.utils import vcompile, deploy, transact
 from scripts.const import NETWORK_CONFIG
 from web3 import Web3
@@ -10,7 +11,7 @@ from web3.middleware import geth_poa_middleware
 
 def get_logs(w3, tx_hash, contract, event_name):
     tx_receipt = w3.eth.getTransactionReceipt(tx_hash)
-    logs = contract.events[event_name]().processReceipt(tx_receipt)
+    logs = get_decoder(contract.abi).decode_receipt(tx_receipt, event_name)
     return logs
 
 
@@ -1,7 +1,17 @@
 import json
 import os
 
-from vyper import compiler
+from eth_utils import is_address
+from web3.exceptions import TimeExhausted
+
+from scripts.compile_cache import compile_code
+from scripts.receipts import ReceiptWaiter
+
+
+class TransactionReverted(Exception):
+    def __init__(self, receipt):
+        super().__init__("Transaction %s reverted" % receipt.transactionHash.hex())
+        self.receipt = receipt
 
 
 def transact(w3, func):
@@ -14,21 +24,37 @@ def vcompile(file_path):
     with open(file_path) as f:
         source_code = f.read()
 
-    compiled_contract = compiler.compile_code(
+    compiled_contract = compile_code(
         source_code, ["abi", "bytecode", "external_interface"]
     )
 
     return compiled_contract
 
 
-def deploy(w3, compiled_contract, *args, owner=None, **kwargs):
+def deploy_job(w3, compiled_contract, *args, owner=None, **kwargs):
     contract = w3.eth.contract(
         abi=compiled_contract["abi"], bytecode=compiled_contract["bytecode"]
     )
 
-    params = {"from": owner or w3.eth.accounts[0]}
+    return contract.constructor(*args), _job_params(kwargs, owner or w3.eth.accounts[0])
+
+
+def transact_job(func, **kwargs):
+    return func, _job_params(kwargs)
+
+
+def _job_params(kwargs, sender=None):
+    # gasPrice is left to the caller, or to the node's gas price strategy.
+    params = {}
+    if sender is not None:
+        params["from"] = sender
     params.update(kwargs)
-    tx_hash = contract.constructor(*args).transact(params)
+    return params
+
+
+def deploy(w3, compiled_contract, *args, owner=None, **kwargs):
+    constructor, params = deploy_job(w3, compiled_contract, *args, owner=owner, **kwargs)
+    tx_hash = constructor.transact(params)
 
     tx_receipt = w3.eth.waitForTransactionReceipt(tx_hash)
     contract_address = tx_receipt.contractAddress
@@ -36,6 +62,103 @@ def deploy(w3, compiled_contract, *args, owner=None, **kwargs):
     return contract_address
 
 
+def _default_sender(w3):
+    if is_address(w3.eth.defaultAccount):
+        return w3.eth.defaultAccount
+    return w3.eth.accounts[0]
+
+
+def send_jobs(w3, jobs):
+    """
+    Sends `(func, params)` jobs, as built by `deploy_job` and `transact_job`, back to back
+    without waiting for receipts.
+
+    Nonces are assigned locally per sender, starting from its pending transaction count.
+    A job with its own `nonce`, e.g. one replacing a stuck transaction, is sent with it and
+    does not move that count. Jobs are not gas-estimated against each other, so pass `gas`
+    for a job that depends on an earlier one in the same batch.
+
+    Returns one dict per job with `tx_hash`, `nonce`, `receipt`, `contract_address` and
+    `error`; only `tx_hash` and `nonce`, or `error` if the job could not be sent, are
+    filled in here.
+    """
+    nonces = {}
+    results = []
+
+    for func, params in jobs:
+        params = dict(params)
+        sender = params.setdefault("from", _default_sender(w3))
+        local_nonce = "nonce" not in params
+        if local_nonce:
+            if sender not in nonces:
+                nonces[sender] = w3.eth.getTransactionCount(sender, "pending")
+            params["nonce"] = nonces[sender]
+
+        result = {
+            "tx_hash": None,
+            "nonce": params["nonce"],
+            "receipt": None,
+            "contract_address": None,
+            "error": None,
+        }
+        try:
+            result["tx_hash"] = func.transact(params)
+        except Exception as e:
+            # Nothing was broadcast, so the nonce is free for the next job.
+            result["error"] = e
+        else:
+            if local_nonce:
+                nonces[sender] = params["nonce"] + 1
+        results.append(result)
+
+    return results
+
+
+def wait_for_jobs(w3, results, timeout=120):
+    """
+    Fills in `receipt`, `contract_address` and `error` for results from `send_jobs`.
+    Receipts are collected with a `ReceiptWaiter`, one batch request per poll over HTTP.
+    A sent job without a receipt gets the waiter's error, or a `TimeExhausted`.
+    """
+    waiter = ReceiptWaiter(w3, timeout=timeout)
+    waiter.add_many(result["tx_hash"] for result in results if result["tx_hash"] is not None)
+    receipts = {}
+    wait_error = None
+    try:
+        for tx_hash, receipt in waiter.iter_receipts():
+            receipts[tx_hash] = receipt
+    except Exception as e:
+        wait_error = e
+
+    for result in results:
+        if result["tx_hash"] is None:
+            continue
+        receipt = receipts.get(result["tx_hash"].hex())
+        if receipt is None:
+            result["error"] = wait_error or TimeExhausted(
+                "Transaction %s is not in the chain" % result["tx_hash"].hex()
+            )
+            continue
+
+        result["receipt"] = receipt
+        result["contract_address"] = receipt.contractAddress
+        if receipt.status == 0:
+            result["error"] = TransactionReverted(receipt)
+
+    return results
+
+
+def send_batch(w3, jobs, timeout=120):
+    """
+    Sends jobs with `send_jobs` and only then waits for the receipts, so a batch costs
+    about one block of latency instead of one per transaction.
+
+    A job that fails to send, reverts or times out has `error` set; the rest of the
+    batch still goes through.
+    """
+    return wait_for_jobs(w3, send_jobs(w3, jobs), timeout)
+
+
 def get_state(path=""):
     try:
         with open(os.path.join(path, "state.json"), "r") as f:
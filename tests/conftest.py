@@ -1,108 +1,21 @@
 from functools import wraps
+import hashlib
 import logging
+import time
 
-# from eth_tester import (
-#     EthereumTester,
-# )
-from eth_tester import EthereumTester, PyEVMBackend
 from eth_tester.exceptions import TransactionFailed
-from eth_utils.toolz import compose
 import pytest
 from web3 import Web3
 from web3.exceptions import ValidationError
-from web3.contract import Contract, mk_collision_prop
-from web3.providers.eth_tester import EthereumTesterProvider
 
 from vyper import compile_lll, compiler, optimizer
 from vyper.parser.parser_utils import LLLnode
 
+from scripts.chain import build_tester, build_w3
+from scripts.compile_cache import compile_code
+from scripts.events import get_decoder
+from tests.utils import VyperContract
 
-class VyperMethod:
-    ALLOWED_MODIFIERS = {"call", "estimateGas", "transact", "buildTransaction"}
-
-    def __init__(self, function, normalizers=None):
-        self._function = function
-        self._function._return_data_normalizers = normalizers
-
-    def __call__(self, *args, **kwargs):
-        return self.__prepared_function(*args, **kwargs)
-
-    def __prepared_function(self, *args, **kwargs):
-        if not kwargs:
-            modifier, modifier_dict = "call", {}
-            fn_abi = [
-                x
-                for x in self._function.contract_abi
-                if x.get("name") == self._function.function_identifier
-            ].pop()
-            # To make tests faster just supply some high gas value.
-            modifier_dict.update({"gas": fn_abi.get("gas", 0) + 50000})
-        elif len(kwargs) == 1:
-            modifier, modifier_dict = kwargs.popitem()
-            if modifier not in self.ALLOWED_MODIFIERS:
-                raise TypeError(
-                    "The only allowed keyword arguments are: %s"
-                    % self.ALLOWED_MODIFIERS
-                )
-        else:
-            raise TypeError(
-                "Use up to one keyword argument, one of: %s" % self.ALLOWED_MODIFIERS
-            )
-
-        return getattr(self._function(*args), modifier)(modifier_dict)
-
-
-class VyperContract:
-
-    """
-    An alternative Contract Factory which invokes all methods as `call()`,
-    unless you add a keyword argument. The keyword argument assigns the prep method.
-
-    This call
-
-    > contract.withdraw(amount, transact={'from': eth.accounts[1], 'gas': 100000, ...})
-
-    is equivalent to this call in the classic contract:
-
-    > contract.functions.withdraw(amount).transact({'from': eth.accounts[1], 'gas': 100000, ...})
-    """
-
-    def __init__(self, classic_contract, method_class=VyperMethod):
-
-        classic_contract._return_data_normalizers += CONCISE_NORMALIZERS
-        self._classic_contract = classic_contract
-        self.address = self._classic_contract.address
-
-        protected_fn_names = [fn for fn in dir(self) if not fn.endswith("__")]
-
-        for fn_name in self._classic_contract.functions:
-
-            # Override namespace collisions
-            if fn_name in protected_fn_names:
-                _concise_method = mk_collision_prop(fn_name)
-
-            else:
-                _classic_method = getattr(self._classic_contract.functions, fn_name)
-
-                _concise_method = method_class(
-                    _classic_method, self._classic_contract._return_data_normalizers
-                )
-
-            setattr(self, fn_name, _concise_method)
-
-    @classmethod
-    def factory(cls, *args, **kwargs):
-        return compose(cls, Contract.factory(*args, **kwargs))
-
-
-def _none_addr(datatype, data):
-    if datatype == "address" and int(data, base=16) == 0:
-        return (datatype, None)
-    else:
-        return (datatype, data)
-
-
-CONCISE_NORMALIZERS = (_none_addr,)
 
 ############
 # PATCHING #
@@ -123,19 +36,24 @@ def set_evm_verbose_logging():
 # vdb.set_evm_opcode_debugger()
 
 
-@pytest.fixture
-def tester():
-    genesis_overrides = {"gas_limit": 8000000}
-    custom_genesis_params = PyEVMBackend._generate_genesis_params(
-        overrides=genesis_overrides
-    )
-    pyevm_backend = PyEVMBackend(genesis_parameters=custom_genesis_params)
-    t = EthereumTester(backend=pyevm_backend)
-    return t
+@pytest.fixture(scope="session")
+def session_tester():
+    return build_tester()
 
 
-def zero_gas_price_strategy(web3, transaction_params=None):
-    return 0  # zero gas price makes testing simpler.
+@pytest.fixture(scope="session")
+def session_w3(session_tester):
+    return build_w3(session_tester)
+
+
+@pytest.fixture
+def tester(session_tester):
+    # Every test runs on the shared session chain and is rolled back afterwards.
+    # Session-scoped "world" fixtures are set up before this snapshot is taken,
+    # so they are deployed once and every test starts from the same state.
+    snapshot_id = session_tester.take_snapshot()
+    yield session_tester
+    session_tester.revert_to_snapshot(snapshot_id)
 
 
 @pytest.fixture
@@ -144,10 +62,8 @@ def zero_address():
 
 
 @pytest.fixture
-def w3(tester):
-    w3 = Web3(EthereumTesterProvider(tester))
-    w3.eth.setGasPriceStrategy(zero_gas_price_strategy)
-    return w3
+def w3(session_w3, tester):
+    return session_w3
 
 
 @pytest.fixture
@@ -182,7 +98,7 @@ def get_contract_from_lll(w3):
 
 
 def _get_contract(w3, source_code, *args, **kwargs):
-    out = compiler.compile_code(
+    out = compile_code(
         source_code,
         ["abi", "bytecode"],
         interface_codes=kwargs.pop("interface_codes", None),
@@ -218,11 +134,18 @@ def get_contract(w3):
     return get_contract
 
 
+@pytest.fixture(scope="session")
+def get_session_contract(session_w3):
+    def get_session_contract(source_code, *args, **kwargs):
+        return _get_contract(session_w3, source_code, *args, **kwargs)
+
+    return get_session_contract
+
+
 @pytest.fixture(scope="module")
 def get_contract_module():
-    tester = EthereumTester()
-    w3 = Web3(EthereumTesterProvider(tester))
-    w3.eth.setGasPriceStrategy(zero_gas_price_strategy)
+    # A private chain per module, so modules never share state, whichever worker runs them.
+    w3 = build_w3(build_tester())
 
     def get_contract_module(source_code, *args, **kwargs):
         return _get_contract(w3, source_code, *args, **kwargs)
@@ -230,11 +153,26 @@ def get_contract_module():
     return get_contract_module
 
 
+# Compiler gas estimates by source hash, and estimated vs. actual gas by (source hash, function).
+_gas_estimates = {}
+_gas_records = {}
+# Seconds spent setting up fixtures, by test id.
+_setup_times = {}
+
+
+def _source_hash(code):
+    return hashlib.sha256(code.encode("utf-8")).hexdigest()
+
+
 def get_compiler_gas_estimate(code, func):
+    source_hash = _source_hash(code)
+    if source_hash not in _gas_estimates:
+        _gas_estimates[source_hash] = compiler.gas_estimate(code)
+    estimates = _gas_estimates[source_hash]
     if func:
-        return compiler.gas_estimate(code)[func] + 22000
+        return estimates[func] + 22000
     else:
-        return sum(compiler.gas_estimate(code).values()) + 22000
+        return sum(estimates.values()) + 22000
 
 
 def check_gas_on_chain(w3, tester, code, func=None, res=None):
@@ -247,11 +185,93 @@ def check_gas_on_chain(w3, tester, code, func=None, res=None):
             "Gas upper bound fail: bound %d actual %d" % (gas_estimate, gas_actual)
         )
 
-    print(
-        "Function name: {} - Gas estimate {}, Actual: {}".format(
-            func, gas_estimate, gas_actual
+    _record_gas(_source_hash(code), func, gas_estimate, [gas_actual])
+
+
+def _record_gas(source_hash, func, gas_estimate, actuals):
+    key = (source_hash, func)
+    if key not in _gas_records:
+        _gas_records[key] = (gas_estimate, [])
+    _gas_records[key][1].extend(actuals)
+
+
+def pytest_addoption(parser):
+    parser.addoption("--runslow", action="store_true", help="also run tests marked slow")
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--runslow"):
+        return
+    skip_slow = pytest.mark.skip(reason="slow, run with --runslow")
+    for item in items:
+        if "slow" in item.keywords:
+            item.add_marker(skip_slow)
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_setup(item):
+    start = time.perf_counter()
+    yield
+    _setup_times[item.nodeid] = time.perf_counter() - start
+
+
+def pytest_sessionfinish(session):
+    # In a pytest-xdist worker, hand the records to the controller for its summary.
+    workeroutput = getattr(session.config, "workeroutput", None)
+    if workeroutput is not None:
+        workeroutput["gas_records"] = [
+            [source_hash, func, gas_estimate, actuals]
+            for (source_hash, func), (gas_estimate, actuals) in _gas_records.items()
+        ]
+        workeroutput["setup_times"] = _setup_times
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node, error):
+    workeroutput = getattr(node, "workeroutput", {})
+    for record in workeroutput.get("gas_records", []):
+        _record_gas(*record)
+    _setup_times.update(workeroutput.get("setup_times", {}))
+
+
+def pytest_terminal_summary(terminalreporter):
+    if _setup_times:
+        times = sorted(_setup_times.values())
+        slowest = max(_setup_times, key=_setup_times.get)
+        terminalreporter.write_sep("=", "test setup overhead")
+        terminalreporter.write_line(
+            "%d tests: median %.1f ms, mean %.1f ms, total %.2f s"
+            % (
+                len(times),
+                times[len(times) // 2] * 1000,
+                sum(times) * 1000 / len(times),
+                sum(times),
+            )
         )
+        terminalreporter.write_line("slowest %.2f s: %s" % (_setup_times[slowest], slowest))
+
+    if not _gas_records:
+        return
+
+    terminalreporter.write_sep("=", "gas estimate vs. actual")
+    terminalreporter.write_line(
+        "%-10s %-32s %6s %10s %10s %10s"
+        % ("source", "function", "calls", "estimate", "max actual", "mean actual")
     )
+    for (source_hash, func), (gas_estimate, actuals) in sorted(
+        _gas_records.items(), key=lambda item: (item[0][0], str(item[0][1]))
+    ):
+        terminalreporter.write_line(
+            "%-10s %-32s %6d %10d %10d %10d"
+            % (
+                source_hash[:10],
+                func,
+                len(actuals),
+                gas_estimate,
+                max(actuals),
+                sum(actuals) // len(actuals),
+            )
+        )
 
 
 def gas_estimation_decorator(w3, tester, fn, source_code, func):
@@ -328,16 +348,28 @@ def assert_compile_failed():
     return assert_compile_failed
 
 
+def _get_logs(w3, tx_hash, c, event_name):
+    tx_receipt = w3.eth.getTransactionReceipt(tx_hash)
+    logs = get_decoder(c._abi).decode_receipt(tx_receipt, event_name)
+    return logs
+
+
 @pytest.fixture
 def get_logs(w3):
     def get_logs(tx_hash, c, event_name):
-        tx_receipt = w3.eth.getTransactionReceipt(tx_hash)
-        logs = c._classic_contract.events[event_name]().processReceipt(tx_receipt)
-        return logs
+        return _get_logs(w3, tx_hash, c, event_name)
 
     return get_logs
 
 
+@pytest.fixture(scope="session")
+def get_session_logs(session_w3):
+    def get_session_logs(tx_hash, c, event_name):
+        return _get_logs(session_w3, tx_hash, c, event_name)
+
+    return get_session_logs
+
+
 @pytest.fixture
 def search_for_sublist():
     def search_for_sublist(lll, sublist):
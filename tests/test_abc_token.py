@@ -1,6 +1,8 @@
 import pytest
 from datetime import datetime, timedelta
 from tests.utils import to_timestamp
+from scripts.batching import balance_of_batch, pad_batch
+from scripts.const import ZERO_ADDRESS
 
 
 MAX_BATCH_SIZE = 100
@@ -8,10 +10,6 @@ TOKEN_RANGE = range(1, 10)
 INITIAL_MINT = 300
 
 
-def resize(input_list, size, default_value=0):
-    return input_list[:size] + [default_value for _ in range(size - len(input_list))]
-
-
 def get_bids(contract, level=0):
     result = []
     cursor = contract.levels__nextBid(level, 0)
@@ -46,20 +44,28 @@ def erc20_contract(w3, get_contract):
         return get_contract(contract_code, "Mock ERC20", "MER", 20, 20)
 
 
-@pytest.fixture
-def minted_contract(w3, contract, zero_address, get_logs, get_contract):
-    owner = w3.eth.accounts[0]
+@pytest.fixture(scope="session")
+def abc_world(session_w3, get_session_contract, get_session_logs):
+    """
+    ABC with a TokenService, minted tokens and a token call, deployed once per session.
+    Tests reach it through `minted_contract` and `token_call_contract`.
+    """
+    owner = session_w3.eth.accounts[0]
+
+    with open("contracts/ABC.vy") as f:
+        contract_code = f.read()
+        contract = get_session_contract(contract_code)
 
     tx_hash = contract.createToken("Non-Fungible", True, transact={"from": owner})
-    token_type = get_logs(tx_hash, contract, "TransferSingle")[0].args._token_id
+    token_type = get_session_logs(tx_hash, contract, "TransferSingle")[0].args._token_id
     with open("contracts/TokenService.vy") as f:
         contract_code = f.read()
-        token_service_contract = get_contract(contract_code, contract.address, token_type)
+        token_service_contract = get_session_contract(contract_code, contract.address, token_type)
     contract.setTokenService(token_service_contract.address, token_type, transact={"from": owner})
     contract.token_service_contract = token_service_contract
 
     tx_hash = contract.createToken("Fungible", True, transact={"from": owner})
-    token_type_fungible = get_logs(tx_hash, contract, "TransferSingle")[0].args._token_id
+    token_type_fungible = get_session_logs(tx_hash, contract, "TransferSingle")[0].args._token_id
 
     mint_token_to = [owner for _ in TOKEN_RANGE]
 
@@ -67,7 +73,7 @@ def minted_contract(w3, contract, zero_address, get_logs, get_contract):
 
     contract.mintNonFungibleToken(
         token_type,
-        resize(mint_token_to, MAX_BATCH_SIZE, default_value=zero_address),
+        pad_batch(mint_token_to, MAX_BATCH_SIZE, default_value=ZERO_ADDRESS),
         transact={"from": owner},
     )
     contract.token_type = token_type
@@ -75,38 +81,45 @@ def minted_contract(w3, contract, zero_address, get_logs, get_contract):
     contract.token_ids = [token_type | index for index in TOKEN_RANGE]
 
     tx_hash = contract.createToken("Fungible", False, transact={"from": owner})
-    fungible_token_id = get_logs(tx_hash, contract, "TransferSingle")[0].args._token_id
+    fungible_token_id = get_session_logs(tx_hash, contract, "TransferSingle")[0].args._token_id
 
     contract.mintFungibleToken(
         fungible_token_id,
-        resize([owner], MAX_BATCH_SIZE, default_value=zero_address),
-        resize([INITIAL_MINT], MAX_BATCH_SIZE),
+        pad_batch([owner], MAX_BATCH_SIZE, default_value=ZERO_ADDRESS),
+        pad_batch([INITIAL_MINT], MAX_BATCH_SIZE),
         transact={"from": owner},
     )
 
     contract.fungible_token_id = fungible_token_id
 
-    return contract
-
-
-@pytest.fixture
-def token_call_contract(w3, get_contract, minted_contract):
     with open("contracts/mockTokenCall.vy") as f:
         contract_code = f.read()
         max_preferred_tkns = 10
         max_total_tkns = 20
         start_date = to_timestamp(datetime.today() - timedelta(days=5))
         end_date = to_timestamp(datetime.today() + timedelta(days=5))
-        return get_contract(
+        contract.token_call_contract = get_session_contract(
             contract_code,
-            minted_contract.address,
-            minted_contract.token_type,
-            minted_contract.token_type_fungible,
+            contract.address,
+            contract.token_type,
+            contract.token_type_fungible,
             max_preferred_tkns,
             max_total_tkns,
             start_date,
             end_date
-    )
+        )
+
+    return contract
+
+
+@pytest.fixture
+def minted_contract(abc_world, tester):
+    return abc_world
+
+
+@pytest.fixture
+def token_call_contract(abc_world, tester):
+    return abc_world.token_call_contract
 
 
 def test_create_and_mint_token(w3, contract, zero_address, get_contract):
@@ -122,7 +135,7 @@ def test_create_and_mint_token(w3, contract, zero_address, get_contract):
 
     assert token_type == 1 << 128 | 1 << 255
 
-    mint_token_to = resize(
+    mint_token_to = pad_batch(
         w3.eth.accounts[1:4], MAX_BATCH_SIZE, default_value=zero_address
     )
     token_ids = [i for i in range(1, 10)]
@@ -130,7 +143,7 @@ def test_create_and_mint_token(w3, contract, zero_address, get_contract):
     contract.setMintTokenApproval(token_type, sender, True, transact={"from": sender})
     tx_hash = contract.mintNonFungibleToken(
         token_type,
-        resize(mint_token_to, MAX_BATCH_SIZE, default_value=zero_address),
+        pad_batch(mint_token_to, MAX_BATCH_SIZE, default_value=zero_address),
         transact={"from": sender},
     )
 
@@ -148,6 +161,64 @@ def test_create_and_mint_token(w3, contract, zero_address, get_contract):
     )
 
 
+def test_mint_non_fungible_token_batch_takes_consecutive_ids(
+    w3, minted_contract, zero_address, assert_tx_failed, get_logs
+):
+    owner, first, second = w3.eth.accounts[:3]
+    token_service_contract = minted_contract.token_service_contract
+    next_tid = token_service_contract.nextTid()
+    mint_token_to = [first, zero_address, second, zero_address, first]
+
+    tx_hash = minted_contract.mintNonFungibleToken(
+        minted_contract.token_type,
+        pad_batch(mint_token_to, MAX_BATCH_SIZE, default_value=zero_address),
+        transact={"from": owner},
+    )
+
+    token_ids = [next_tid, next_tid + 1, next_tid + 2]
+    assert [log.args._token_id for log in get_logs(tx_hash, minted_contract, "TransferSingle")] == token_ids
+    assert [log.args._tid for log in get_logs(tx_hash, token_service_contract, "ExitStateLog")] == token_ids
+    assert [minted_contract.getNFTOwner(token_id) for token_id in token_ids] == [first, second, first]
+    assert token_service_contract.nextTid() == next_tid + 3
+
+    # Only ABC mints through the token service.
+    assert_tx_failed(
+        lambda: token_service_contract.mintTokens(
+            pad_batch([owner], MAX_BATCH_SIZE, default_value=zero_address),
+            owner,
+            transact={"from": owner},
+        )
+    )
+
+
+def test_mint_non_fungible_token_skips_token_service_for_empty_batch(
+    w3, minted_contract, zero_address, assert_tx_failed, get_logs
+):
+    owner = w3.eth.accounts[0]
+    # A type without a token service, so any call to one reverts.
+    tx_hash = minted_contract.createToken("No Service", True, transact={"from": owner})
+    token_type = get_logs(tx_hash, minted_contract, "TransferSingle")[0].args._token_id
+    minted_contract.setMintTokenApproval(token_type, owner, True, transact={"from": owner})
+
+    tx_hash = minted_contract.mintNonFungibleToken(
+        token_type, [zero_address] * MAX_BATCH_SIZE, transact={"from": owner}
+    )
+    assert w3.eth.getTransactionReceipt(tx_hash).logs == []
+
+    assert_tx_failed(
+        lambda: minted_contract.mintNonFungibleToken(
+            token_type,
+            pad_batch([owner], MAX_BATCH_SIZE, default_value=zero_address),
+            transact={"from": owner},
+        )
+    )
+
+
+def test_abc_fits_the_contract_size_limit(w3, minted_contract):
+    # EIP-170
+    assert len(w3.eth.getCode(minted_contract.address)) <= 24576
+
+
 def test_set_uri(w3, minted_contract, assert_tx_failed):
     owner = w3.eth.accounts[0]
     non_owner = w3.eth.accounts[1]
@@ -183,8 +254,8 @@ def test_get_balance_single_token(w3, minted_contract, zero_address, get_logs):
 def test_get_balance_batch_token(w3, minted_contract, zero_address, get_logs):
     sender = w3.eth.accounts[0]
     other_account = w3.eth.accounts[1]
-    token_ids = resize(minted_contract.token_ids, MAX_BATCH_SIZE)
-    accounts = resize(
+    token_ids = pad_batch(minted_contract.token_ids, MAX_BATCH_SIZE)
+    accounts = pad_batch(
         [sender] * 5 + [other_account] * 5, MAX_BATCH_SIZE, default_value=zero_address
     )
     assert minted_contract.balanceOfBatch(accounts, token_ids, call={'from': sender, 'gas': 2000000}) == [
@@ -192,6 +263,22 @@ def test_get_balance_batch_token(w3, minted_contract, zero_address, get_logs):
     ]
 
 
+def test_balance_of_batch_accepts_any_length(w3, minted_contract):
+    owner = w3.eth.accounts[0]
+    other_account = w3.eth.accounts[1]
+    token_ids = (minted_contract.token_ids + [minted_contract.fungible_token_id]) * 15
+    owners = [owner, other_account] * 75
+
+    balances = balance_of_batch(
+        minted_contract._classic_contract, owners, token_ids, params={"gas": 6000000}
+    )
+
+    assert balances == [
+        0 if account != owner else 1 if token_id in minted_contract.token_ids else INITIAL_MINT
+        for account, token_id in zip(owners, token_ids)
+    ]
+
+
 def test_safe_transfer_from_should_transfer_non_fungible_token_to_other_account(
     w3, minted_contract, zero_address, get_logs
 ):
@@ -413,8 +500,8 @@ def test_safe_batch_transfer_should_transfer_asset_to_other_receiver_contract(
     to = receiver_contract.address
     start, end = 4, 8
 
-    token_ids = resize(minted_contract.token_ids[start:end], MAX_BATCH_SIZE)
-    values = resize([1] * (end - start), MAX_BATCH_SIZE)
+    token_ids = pad_batch(minted_contract.token_ids[start:end], MAX_BATCH_SIZE)
+    values = pad_batch([1] * (end - start), MAX_BATCH_SIZE)
 
     tx_hash = minted_contract.safeBatchTransferFrom(
         sender, to, token_ids, values, "", transact={"from": sender}
@@ -432,8 +519,8 @@ def test_safe_transfer_batch_from_should_transfer_asset_to_other_users(
 ):
     sender = w3.eth.accounts[0]
     to = w3.eth.accounts[1]
-    token_ids = resize(minted_contract.token_ids[6:9], MAX_BATCH_SIZE)
-    values = resize([1 for _ in range(3)], MAX_BATCH_SIZE)
+    token_ids = pad_batch(minted_contract.token_ids[6:9], MAX_BATCH_SIZE)
+    values = pad_batch([1 for _ in range(3)], MAX_BATCH_SIZE)
 
     tx_hash = minted_contract.safeBatchTransferFrom(
         sender, to, token_ids, values, "", transact={"from": sender}
@@ -446,6 +533,106 @@ def test_safe_transfer_batch_from_should_transfer_asset_to_other_users(
         assert minted_contract.balanceOf(sender, token_id) == 0
 
 
+def test_safe_batch_transfer_with_count(
+    w3, minted_contract, receiver_contract, assert_tx_failed, get_logs
+):
+    sender = w3.eth.accounts[0]
+    to = w3.eth.accounts[1]
+    abc = minted_contract._classic_contract
+    fungible_token_id = minted_contract.fungible_token_id
+    token_ids = minted_contract.token_ids[:2] + [fungible_token_id, fungible_token_id]
+    # Items past the count are never read when the batch is logged item by item.
+    padded_ids = token_ids + [minted_contract.token_ids[2]] + [0] * (MAX_BATCH_SIZE - 5)
+    values = pad_batch([1, 1, 5, 7], MAX_BATCH_SIZE)
+
+    tx_hash = abc.functions.safeBatchTransferFrom(
+        sender, to, padded_ids, values, b"", 4
+    ).transact({"from": sender})
+
+    assert [log.args._token_id for log in get_logs(tx_hash, minted_contract, "TransferSingle")] == token_ids
+    assert get_logs(tx_hash, minted_contract, "TransferBatch") == []
+    assert minted_contract.balanceOf(to, fungible_token_id) == 12
+    assert minted_contract.balanceOf(to, minted_contract.token_ids[1]) == 1
+    assert minted_contract.balanceOf(to, minted_contract.token_ids[2]) == 0
+
+    # A receiver contract gets the whole arrays, so their padding must be empty.
+    padded_ids = pad_batch(minted_contract.token_ids[3:5], MAX_BATCH_SIZE)
+    assert_tx_failed(
+        lambda: abc.functions.safeBatchTransferFrom(
+            sender, receiver_contract.address, padded_ids, values, b"", 1
+        ).transact({"from": sender})
+    )
+    abc.functions.safeBatchTransferFrom(
+        sender, receiver_contract.address, padded_ids, values, b"", 2
+    ).transact({"from": sender})
+    assert minted_contract.balanceOf(receiver_contract.address, padded_ids[1]) == 1
+    assert_tx_failed(
+        lambda: abc.functions.safeBatchTransferFrom(
+            sender, to, padded_ids, values, b"", MAX_BATCH_SIZE + 1
+        ).transact({"from": sender})
+    )
+
+
+def test_safe_batch_transfer_with_mixed_token_type_runs(
+    w3, minted_contract, assert_tx_failed, get_logs
+):
+    owner = w3.eth.accounts[0]
+    to = w3.eth.accounts[1]
+    token_a = minted_contract.fungible_token_id
+    tx_hash = minted_contract.createToken("Fungible B", False, transact={"from": owner})
+    token_b = get_logs(tx_hash, minted_contract, "TransferSingle")[0].args._token_id
+    minted_contract.mintFungibleToken(
+        token_b,
+        pad_batch([owner], MAX_BATCH_SIZE, default_value=ZERO_ADDRESS),
+        pad_batch([10], MAX_BATCH_SIZE),
+        transact={"from": owner},
+    )
+    nft_ids = minted_contract.token_ids[:3]
+
+    # Runs of A, B, NFTs, A again, B again and one more NFT.
+    token_ids = [token_a, token_b, nft_ids[0], nft_ids[1], token_a, token_b, nft_ids[2]]
+    values = [3, 4, 1, 1, 5, 1, 1]
+    minted_contract.safeBatchTransferFrom(
+        owner,
+        to,
+        pad_batch(token_ids, MAX_BATCH_SIZE),
+        pad_batch(values, MAX_BATCH_SIZE),
+        "",
+        transact={"from": owner},
+    )
+
+    assert minted_contract.balanceOf(to, token_a) == 8
+    assert minted_contract.balanceOf(owner, token_a) == INITIAL_MINT - 8
+    assert minted_contract.balanceOf(to, token_b) == 5
+    assert minted_contract.balanceOf(owner, token_b) == 5
+    assert minted_contract.balanceOf(to, minted_contract.token_type) == 3
+    assert minted_contract.balanceOf(owner, minted_contract.token_type) == len(TOKEN_RANGE) - 3
+    assert all(minted_contract.balanceOf(to, token_id) == 1 for token_id in nft_ids)
+
+    # A run's total must fit the sender's balance, even when sending to itself.
+    assert_tx_failed(
+        lambda: minted_contract.safeBatchTransferFrom(
+            to,
+            owner,
+            pad_batch([token_b, token_a, token_b], MAX_BATCH_SIZE),
+            pad_batch([5, 8, 1], MAX_BATCH_SIZE),
+            "",
+            transact={"from": to},
+        )
+    )
+    assert_tx_failed(
+        lambda: minted_contract.safeBatchTransferFrom(
+            to,
+            to,
+            pad_batch([token_b, token_b], MAX_BATCH_SIZE),
+            pad_batch([5, 5], MAX_BATCH_SIZE),
+            "",
+            transact={"from": to},
+        )
+    )
+    assert minted_contract.balanceOf(to, token_b) == 5
+
+
 def test_apply_and_withdraw_token(
         w3, minted_contract, token_call_contract, assert_tx_failed, get_logs):
     sender = w3.eth.accounts[0]
@@ -575,8 +762,8 @@ def test_sell_token(w3, minted_contract, receiver_contract, token_call_contract,
         )
     )
 
-    token_ids = resize([token_id], MAX_BATCH_SIZE)
-    values = resize([1], MAX_BATCH_SIZE)
+    token_ids = pad_batch([token_id], MAX_BATCH_SIZE)
+    values = pad_batch([1], MAX_BATCH_SIZE)
     assert_tx_failed(
         lambda: minted_contract.safeBatchTransferFrom(
             sender, to, token_ids, values, "", transact={"from": sender}
@@ -820,20 +1007,20 @@ def test_nf_token_must_be_minted_by_auction_only(w3, contract, zero_address, ass
         token_service_contract = get_contract(contract_code, contract.address, token_type)
     contract.setTokenService(token_service_contract.address, token_type, transact={"from": creator})
 
-    mint_token_to = resize(
+    mint_token_to = pad_batch(
         w3.eth.accounts[1:4], MAX_BATCH_SIZE, default_value=zero_address
     )
     token_ids = [i for i in range(1, 10)]
 
     assert_tx_failed(lambda: contract.mintNonFungibleToken(
         token_type,
-        resize(mint_token_to, MAX_BATCH_SIZE, default_value=zero_address),
+        pad_batch(mint_token_to, MAX_BATCH_SIZE, default_value=zero_address),
         transact={"from": sender},
     ))
 
     assert_tx_failed(lambda: contract.mintNonFungibleToken(
         token_type,
-        resize(mint_token_to, MAX_BATCH_SIZE, default_value=zero_address),
+        pad_batch(mint_token_to, MAX_BATCH_SIZE, default_value=zero_address),
         transact={"from": creator},
     ))
 
@@ -844,7 +1031,7 @@ def test_nf_token_must_be_minted_by_auction_only(w3, contract, zero_address, ass
 
     contract.mintNonFungibleToken(
         token_type,
-        resize(mint_token_to, MAX_BATCH_SIZE, default_value=zero_address),
+        pad_batch(mint_token_to, MAX_BATCH_SIZE, default_value=zero_address),
         transact={"from": sender},
     )
 
@@ -868,29 +1055,29 @@ def test_fungible_token_must_be_minted_by_creator_or_operator_only(w3, contract,
     hex_token_id = w3.eth.getTransactionReceipt(tx_hash).logs[1].topics[1]
     token_type = int(hex_token_id.hex(), 0)
 
-    mint_token_to = resize(
+    mint_token_to = pad_batch(
         w3.eth.accounts[1:4], MAX_BATCH_SIZE, default_value=zero_address
     )
     quantities = [10 for _ in range(20, 30)]
 
     assert_tx_failed(lambda: contract.mintFungibleToken(
         token_type,
-        resize(mint_token_to, MAX_BATCH_SIZE, default_value=zero_address),
-        resize(quantities, MAX_BATCH_SIZE),
+        pad_batch(mint_token_to, MAX_BATCH_SIZE, default_value=zero_address),
+        pad_batch(quantities, MAX_BATCH_SIZE),
         transact={"from": sender},
     ))
 
     contract.mintFungibleToken(
         token_type,
-        resize(mint_token_to, MAX_BATCH_SIZE, default_value=zero_address),
-        resize(quantities, MAX_BATCH_SIZE),
+        pad_batch(mint_token_to, MAX_BATCH_SIZE, default_value=zero_address),
+        pad_batch(quantities, MAX_BATCH_SIZE),
         transact={"from": creator},
     )
 
     contract.mintFungibleToken(
         token_type,
-        resize(mint_token_to, MAX_BATCH_SIZE, default_value=zero_address),
-        resize(quantities, MAX_BATCH_SIZE),
+        pad_batch(mint_token_to, MAX_BATCH_SIZE, default_value=zero_address),
+        pad_batch(quantities, MAX_BATCH_SIZE),
         transact={"from": operator},
     )
 
@@ -0,0 +1,82 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from web3 import Web3
+
+from scripts.async_utils import AsyncHelpers
+from scripts.utils import vcompile
+
+
+def test_async_helpers_bound_requests_in_flight():
+    helpers = AsyncHelpers(None, concurrency=3)
+    lock = threading.Lock()
+    in_flight = []
+    peak = []
+
+    def slow_request(i):
+        with lock:
+            in_flight.append(i)
+            peak.append(len(in_flight))
+        time.sleep(0.01)
+        with lock:
+            in_flight.remove(i)
+        return i
+
+    async def main():
+        return await asyncio.gather(*(helpers.run(slow_request, i) for i in range(12)))
+
+    assert asyncio.get_event_loop().run_until_complete(main()) == list(range(12))
+    assert max(peak) == 3
+    helpers.close()
+
+
+def serialize_requests(lock, threads):
+    def middleware(make_request, w3):
+        def request(method, params):
+            threads.add(threading.get_ident())
+            with lock:
+                return make_request(method, params)
+
+        return request
+
+    return middleware
+
+
+@pytest.mark.parametrize("concurrency", [1, 4])
+def test_async_helpers_deploy_transact_and_read_logs(w3, concurrency):
+    threads = set()
+    if concurrency > 1:
+        # The in-process tester is not thread safe, so its requests take turns. Reentrant,
+        # as inner middlewares send requests of their own, e.g. for gas estimates.
+        w3 = Web3(w3.provider)
+        w3.middleware_onion.add(serialize_requests(threading.RLock(), threads))
+    helpers = AsyncHelpers(w3, concurrency=concurrency)
+    owner = w3.eth.accounts[0]
+    compiled_contract = vcompile("contracts/ABC.vy")
+
+    async def main():
+        addresses = await asyncio.gather(
+            *(helpers.deploy(compiled_contract, owner=owner) for _ in range(3))
+        )
+        contracts = [w3.eth.contract(address=a, abi=compiled_contract["abi"]) for a in addresses]
+        receipts = await asyncio.gather(
+            *(helpers.transact(c.functions.createToken("uri", True)) for c in contracts)
+        )
+        logs = await asyncio.gather(
+            *(
+                helpers.get_logs(r.transactionHash, c, "TransferSingle")
+                for r, c in zip(receipts, contracts)
+            )
+        )
+        nonces = await asyncio.gather(*(helpers.call(c.functions.nonce()) for c in contracts))
+        return addresses, logs, nonces
+
+    addresses, logs, nonces = asyncio.get_event_loop().run_until_complete(main())
+
+    assert len(set(addresses)) == 3
+    assert all(log[0].args._token_id == 1 << 128 | 1 << 255 for log in logs)
+    assert nonces == [1, 1, 1]
+    assert (len(threads) > 1) == (concurrency > 1)
+    helpers.close()
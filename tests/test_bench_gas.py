@@ -0,0 +1,33 @@
+import pytest
+
+from benchmarks.bench_gas import CONTRACTS, GasBench, compare, stale_via
+from scripts.utils import vcompile
+
+
+def test_gas_bench_via_entries_exist():
+    abis = {name: vcompile("contracts/%s.vy" % name)["abi"] for name in CONTRACTS}
+
+    assert stale_via(abis) == []
+    assert stale_via(dict(abis, ABC=[])) != []
+
+
+@pytest.mark.slow
+def test_gas_bench_covers_every_public_function():
+    bench = GasBench(sizes=[2])
+    results = bench.run()
+
+    assert bench.uncovered() == []
+    assert results["ABC.mintNonFungibleToken[2]"] > results["ABC.mintFungibleToken[2]"]
+    assert "mockTokenCall.finalize[2]" in results
+
+
+def test_compare_flags_entries_over_threshold():
+    baseline = {"a": 1000, "b": 1000, "c": 1000, "gone": 1}
+    results = {"a": 1010, "b": 1011, "c": 900, "new": 5}
+
+    regressions, improvements, added, removed = compare(baseline, results, 0.01)
+
+    assert regressions == [("b", 1000, 1011)]
+    assert improvements == [("c", 1000, 900)]
+    assert added == ["new"]
+    assert removed == ["gone"]
@@ -0,0 +1,62 @@
+import re
+
+from benchmarks.bench_state_machine import (
+    AVAILABLE,
+    BURNED,
+    EAPAPPLIED,
+    OPTIONED,
+    STATE_TRANSITIONS,
+    StateMachineFuzzer,
+    TokenModel,
+    transition,
+)
+from scripts.const import ZERO_ADDRESS
+
+
+OWNER = "0x" + "11" * 20
+BUYER = "0x" + "22" * 20
+
+
+def test_model_follows_transition_matrix():
+    token = TokenModel(1, OWNER)
+    assert token.state(100) == AVAILABLE
+
+    def sell(changed):
+        changed.buyer, changed.expires = BUYER, 100
+
+    optioned = transition("sell", token, 100, sell)
+    assert optioned.state(100) == OPTIONED
+    assert optioned.state(101) == AVAILABLE
+    assert transition("finalize", token, 100, lambda changed: None) is None
+
+    def apply(changed):
+        changed.call = object()
+
+    # A lapsed option is still set when the token applies, which leaves it in no state.
+    assert transition("apply", optioned, 101, apply) is None
+    assert transition("apply", token, 100, apply).state(100) == EAPAPPLIED
+
+    token.owner = ZERO_ADDRESS
+    assert token.state(100) == BURNED
+
+
+def test_packed_transitions_match_model():
+    with open("contracts/TokenService.vy") as f:
+        packed = int(re.search(r"^STATE_TRANSITIONS: .* = (0x\w+)$", f.read(), re.M).group(1), 16)
+
+    states = len(STATE_TRANSITIONS[0])
+    for event, row in enumerate(STATE_TRANSITIONS):
+        for state, exit_state in enumerate(row):
+            assert packed >> 4 * (event * states + state) & 15 == exit_state
+    assert packed >> 4 * len(STATE_TRANSITIONS) * states == 0
+
+
+def test_chain_matches_model_for_random_events():
+    fuzzer = StateMachineFuzzer(tokens=6, accounts=3, seed=1, round_size=30).run(120)
+
+    assert len(fuzzer.gas["mint"]) == 6
+    # A mint writes the owner, the token call word and nextTid.
+    assert {sstores for _, sstores in fuzzer.storage_ops["mint"]} == {3}
+    assert sum(len(gas) for gas in fuzzer.gas.values()) > 20
+    assert sum(fuzzer.reverted.values()) > 0
+    assert "transitions/s" in fuzzer.report()
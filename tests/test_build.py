@@ -0,0 +1,49 @@
+import glob
+import json
+import os
+import shutil
+
+from scripts.build import BUILD_DIR, CONTRACTS_DIR, build
+
+
+SOURCE_CODE = """
+@public
+@constant
+def answer() -> uint256:
+    return %d
+"""
+
+
+def test_build_writes_artifacts_and_skips_unchanged(tmp_path):
+    contracts_dir = tmp_path / "contracts"
+    build_dir = tmp_path / "build"
+    contracts_dir.mkdir()
+    (contracts_dir / "First.vy").write_text(SOURCE_CODE % 1)
+    (contracts_dir / "Second.vy").write_text(SOURCE_CODE % 2)
+
+    built = build(str(contracts_dir), str(build_dir), jobs=1)
+    assert len(built) == 2
+
+    artifact = json.loads((build_dir / "First.json").read_text())
+    assert artifact["contractName"] == "First"
+    assert artifact["abi"][0]["name"] == "answer"
+    assert artifact["bytecode"].startswith("0x")
+    assert "external_interface" in artifact
+
+    assert build(str(contracts_dir), str(build_dir), jobs=1) == []
+
+    (contracts_dir / "Second.vy").write_text(SOURCE_CODE % 3)
+    assert build(str(contracts_dir), str(build_dir), jobs=1) == [str(contracts_dir / "Second.vy")]
+
+
+def test_build_defaults_fit_the_project_layout(tmp_path, monkeypatch):
+    # The project root's own files, e.g. its wrapper scripts, must not take the build path.
+    for name in os.listdir("."):
+        if os.path.isfile(name):
+            shutil.copy(name, str(tmp_path))
+    shutil.copytree(CONTRACTS_DIR, str(tmp_path / CONTRACTS_DIR))
+    monkeypatch.chdir(str(tmp_path))
+
+    assert len(build(jobs=1)) == len(glob.glob(os.path.join(CONTRACTS_DIR, "*.vy")))
+    with open(os.path.join(BUILD_DIR, "ABC.json")) as f:
+        assert json.load(f)["contractName"] == "ABC"
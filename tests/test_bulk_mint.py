@@ -0,0 +1,117 @@
+import pytest
+
+from scripts import bulk_mint
+from scripts.bulk_mint import BulkMinter, read_recipients
+from scripts.utils import deploy, transact, vcompile
+
+
+class Crash(Exception):
+    pass
+
+
+def deploy_nft_abc(w3):
+    owner = w3.eth.accounts[0]
+    abc_compiled = vcompile("contracts/ABC.vy")
+    abc = w3.eth.contract(address=deploy(w3, abc_compiled), abi=abc_compiled["abi"])
+    token_type = 1 << 255 | 1 << 128
+    transact(w3, abc.functions.createToken("Non-Fungible", True))
+    service = deploy(w3, vcompile("contracts/TokenService.vy"), abc.address, token_type)
+    transact(w3, abc.functions.setTokenService(service, token_type))
+    transact(w3, abc.functions.setMintTokenApproval(token_type, owner, True))
+    return abc, token_type
+
+
+def test_bulk_mint_resumes_without_double_minting(w3, tmp_path, monkeypatch):
+    abc, token_type = deploy_nft_abc(w3)
+
+    recipients = w3.eth.accounts[1:6] * 5
+    recipients_path = tmp_path / "recipients.txt"
+    recipients_path.write_text("# airdrop\n" + "\n".join(recipients) + "\n\n")
+    checkpoint_path = str(tmp_path / "recipients.checkpoint")
+
+    def minter():
+        return BulkMinter(
+            w3, abc, token_type, batch_size=10, window=2, checkpoint_path=checkpoint_path
+        )
+
+    # Crash after the first window of two batches is sent, before any receipt is read.
+    def crash(*args, **kwargs):
+        raise Crash()
+
+    monkeypatch.setattr(bulk_mint, "wait_for_jobs", crash)
+    with pytest.raises(Crash):
+        minter().run(read_recipients(str(recipients_path)))
+    monkeypatch.undo()
+
+    resumed = minter()
+    report = resumed.run(read_recipients(str(recipients_path)))
+
+    assert report.batches == 1 and report.tokens == 5 and report.failed == []
+    assert report.gas_per_token > 0 and report.tokens_per_second > 0
+    assert resumed.state["minted"] == 25 and resumed.state["pending"] == {}
+    for account in w3.eth.accounts[1:6]:
+        assert abc.functions.balanceOf(account, token_type).call({"gas": 1000000}) == 5
+
+    # Nothing is left to do on another run.
+    assert minter().run(read_recipients(str(recipients_path))).batches == 0
+
+
+def test_bulk_mint_reports_and_retries_failed_batches(w3, tmp_path):
+    creator, sender = w3.eth.accounts[:2]
+    abc_compiled = vcompile("contracts/ABC.vy")
+    abc = w3.eth.contract(address=deploy(w3, abc_compiled), abi=abc_compiled["abi"])
+    transact(w3, abc.functions.createToken("Fungible", False))
+    recipients = [(account, 10) for account in w3.eth.accounts[2:5]]
+
+    def minter():
+        return BulkMinter(
+            w3, abc, 1 << 128, sender=sender, batch_size=2,
+            checkpoint_path=str(tmp_path / "checkpoint"),
+        )
+
+    # Only the creator and its operators can mint.
+    report = minter().run(recipients)
+    assert report.tokens == 0
+    assert [failure["batch"] for failure in report.failed] == [0, 1]
+
+    abc.functions.setApprovalForAll(sender, True).transact({"from": creator, "gasPrice": 0})
+    report = minter().run(recipients)
+    assert report.batches == 2 and report.tokens == 3 and report.failed == []
+    assert [
+        abc.functions.balanceOf(account, 1 << 128).call({"gas": 1000000})
+        for account, _ in recipients
+    ] == [10, 10, 10]
+
+
+def test_bulk_mint_replaces_lost_transactions_without_double_minting(w3, tmp_path):
+    owner = w3.eth.accounts[0]
+    abc, token_type = deploy_nft_abc(w3)
+    recipients = [(account, 1) for account in w3.eth.accounts[1:5]]
+    checkpoint_path = str(tmp_path / "checkpoint")
+    minter = BulkMinter(
+        w3, abc, token_type, batch_size=2, timeout=0, checkpoint_path=checkpoint_path
+    )
+
+    # Both batches were sent by an earlier run and never showed up. Batch 0's nonce has been
+    # used since, so its transaction can never be mined; batch 1's is still free.
+    nonce = w3.eth.getTransactionCount(owner, "latest")
+    state = minter.load_checkpoint()
+    state["next_batch"] = 2
+    state["pending"] = {
+        "0": {"tx_hash": "0x" + "01" * 32, "size": 2, "nonce": nonce - 1},
+        "1": {"tx_hash": "0x" + "02" * 32, "size": 2, "nonce": nonce},
+    }
+    minter.save_checkpoint(state)
+
+    report = minter.run(recipients)
+
+    assert report.tokens == 4 and report.failed == [] and report.pending == []
+    assert w3.eth.getTransactionCount(owner, "latest") == nonce + 2
+    # Batch 1 replaced its transaction at the same nonce.
+    replacement = w3.eth.getBlock(w3.eth.blockNumber - 1, True).transactions[0]
+    assert replacement.nonce == nonce
+    assert abc.decode_function_input(replacement.data)[1]["_to"][:2] == [
+        account for account, _ in recipients[2:]
+    ]
+    for account, _ in recipients:
+        assert abc.functions.balanceOf(account, token_type).call({"gas": 1000000}) == 1
@@ -0,0 +1,85 @@
+import json
+import threading
+
+from eth_tester.exceptions import TransactionFailed
+from hexbytes import HexBytes
+from web3 import HTTPProvider, Web3
+
+from scripts import rpc
+from scripts.bulk_reader import FIELDS, TokenStateReader
+from scripts.const import ZERO_ADDRESS
+from scripts.utils import deploy, transact, vcompile
+
+
+def test_token_state_reader_matches_getters(w3, monkeypatch):
+    owner, alice = w3.eth.accounts[:2]
+    abc_compiled = vcompile("contracts/ABC.vy")
+    service_compiled = vcompile("contracts/TokenService.vy")
+    abc = w3.eth.contract(address=deploy(w3, abc_compiled), abi=abc_compiled["abi"])
+
+    token_type = 1 << 255 | 1 << 128
+    transact(w3, abc.functions.createToken("Non-Fungible", True))
+    service = deploy(w3, service_compiled, abc.address, token_type)
+    transact(w3, abc.functions.setTokenService(service, token_type))
+    transact(w3, abc.functions.setMintTokenApproval(token_type, owner, True))
+    recipients = [owner, alice, alice]
+    transact(
+        w3,
+        abc.functions.mintNonFungibleToken(
+            token_type, recipients + [ZERO_ADDRESS] * (100 - len(recipients))
+        ),
+    )
+    # Index 4 was never minted.
+    token_ids = [token_type | i for i in range(1, 5)]
+
+    expected = {
+        field: [getattr(abc.functions, getter)(token_id).call() for token_id in token_ids]
+        for field, getter in FIELDS.items()
+    }
+    assert expected["owner"] == recipients + [ZERO_ADDRESS]
+
+    reader = TokenStateReader(w3, abc.address, abc.abi, chunk_size=3)
+    columns = reader.read_type(token_type, 1, 5)
+    assert columns["token_id"] == token_ids
+    for field in FIELDS:
+        assert columns[field] == expected[field]
+    assert columns["error"] == [None] * len(token_ids)
+    assert reader.rpc_calls == len(token_ids) * len(FIELDS)
+
+    # A type without a token service makes every getter revert, for that token only.
+    unserviced_id = 1 << 255 | 2 << 128 | 1
+    columns = reader.read([unserviced_id] + token_ids)
+    assert [columns[field][0] for field in FIELDS] == [None] * len(FIELDS)
+    assert set(columns["error"][0]) == set(FIELDS)
+    assert columns["error"][1:] == [None] * len(token_ids)
+    assert columns["owner"][1:] == expected["owner"]
+
+    # Over HTTP every chunk is a single batch request.
+    lock = threading.Lock()
+
+    def fake_post(endpoint_uri, data, **kwargs):
+        responses = []
+        with lock:
+            for call in json.loads(data):
+                tx, block = call["params"]
+                response = {"jsonrpc": "2.0", "id": call["id"]}
+                try:
+                    result = w3.eth.call(tx, block if block == "latest" else int(block, 16))
+                    response["result"] = HexBytes(result).hex()
+                except TransactionFailed:
+                    response["error"] = {"code": -32000, "message": "execution reverted"}
+                responses.append(response)
+        return json.dumps(responses).encode()
+
+    monkeypatch.setattr(rpc, "make_post_request", fake_post)
+    http_w3 = Web3(HTTPProvider("http://node.invalid"))
+    reader = TokenStateReader(http_w3, abc.address, abc.abi, chunk_size=2, concurrency=2)
+    columns = reader.read(token_ids, block_identifier=w3.eth.blockNumber)
+    for field in FIELDS:
+        assert columns[field] == expected[field]
+    assert reader.rpc_calls == 2
+
+    columns = reader.read([unserviced_id] + token_ids[:1], block_identifier="latest")
+    assert set(columns["error"][0]) == set(FIELDS)
+    assert all(isinstance(e, ValueError) for e in columns["error"][0].values())
+    assert [columns[field][1] for field in FIELDS] == [expected[field][0] for field in FIELDS]
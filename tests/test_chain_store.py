@@ -0,0 +1,54 @@
+import os
+
+from scripts.chain_store import ChainStore, mint_nfts
+from scripts.utils import deploy, transact, vcompile
+
+
+def test_chain_store_reopens_chain_from_disk(tmp_path):
+    path = str(tmp_path / "chain.db")
+    compiled_contract = vcompile("contracts/ABC.vy")
+
+    with ChainStore(path, backend="sqlite") as store:
+        assert store.created
+        w3 = store.web3()
+        address = deploy(w3, compiled_contract, gas=7000000)
+        abc = w3.eth.contract(address=address, abi=compiled_contract["abi"])
+        transact(w3, abc.functions.createToken("Persisted", True))
+        store.metadata = {"abc": address}
+        head = w3.eth.getBlock("latest")
+
+    with ChainStore(path, backend="sqlite") as store:
+        assert not store.created
+        w3 = store.web3()
+        assert w3.eth.getBlock("latest").hash == head.hash
+        assert store.metadata == {"abc": address}
+
+        abc = w3.eth.contract(address=address, abi=compiled_contract["abi"])
+        assert abc.functions.nonce().call({"gas": 100000}) == 1
+        assert w3.eth.getBalance(w3.eth.accounts[1]) > 0
+
+        transact(w3, abc.functions.createToken("Second", False))
+        assert w3.eth.blockNumber == head.number + 1
+
+
+def test_chain_store_mint_commits_every_window(tmp_path):
+    path = str(tmp_path / "chain.db")
+    checkpoint_path = str(tmp_path / "chain.db.mint-checkpoint")
+
+    store = ChainStore(path, backend="sqlite")
+    w3 = store.web3()
+    report = mint_nfts(store, w3, 6, batch_size=2, checkpoint_path=checkpoint_path)
+    assert report.tokens == 6
+    assert not os.path.exists(checkpoint_path)
+    head = w3.eth.getBlock("latest")
+    # Dropped without a final commit, as if the process died.
+    store.db.wrapped_db.connection.close()
+
+    with ChainStore(path, backend="sqlite") as store:
+        w3 = store.web3()
+        assert w3.eth.getBlock("latest").hash == head.hash
+        assert store.metadata["minted"] == 6
+
+        report = mint_nfts(store, w3, 2, batch_size=2, checkpoint_path=checkpoint_path)
+        assert report.tokens == 2
+        assert store.metadata["minted"] == 8
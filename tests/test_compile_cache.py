@@ -0,0 +1,46 @@
+import os
+
+from vyper import compiler
+
+from scripts.compile_cache import CompileCache
+
+
+SOURCE_CODE = """
+@public
+@constant
+def answer() -> uint256:
+    return 42
+"""
+
+
+def test_compile_cache_hit_skips_compiler(tmp_path, monkeypatch):
+    cache = CompileCache(path=str(tmp_path))
+    first = cache.compile_code(SOURCE_CODE, ["abi", "bytecode"])
+
+    def fail(*args, **kwargs):
+        raise AssertionError("compiler should not run on a cache hit")
+
+    monkeypatch.setattr(compiler, "compile_code", fail)
+
+    # Fresh instance so the result has to come from disk.
+    assert CompileCache(path=str(tmp_path)).compile_code(SOURCE_CODE, ["bytecode", "abi"]) == first
+
+
+def test_compile_cache_key_depends_on_source_and_formats(tmp_path):
+    cache = CompileCache(path=str(tmp_path))
+    key = cache.key(SOURCE_CODE, ["abi", "bytecode"])
+
+    assert key == cache.key(SOURCE_CODE, ["bytecode", "abi"])
+    assert key != cache.key(SOURCE_CODE, ["abi"])
+    assert key != cache.key(SOURCE_CODE.replace("42", "43"), ["abi", "bytecode"])
+
+
+def test_compile_cache_evicts_least_recently_used(tmp_path):
+    cache = CompileCache(path=str(tmp_path), max_size=300)
+    cache.put("old", {"bytecode": "0x" + "00" * 100})
+    os.utime(os.path.join(str(tmp_path), "old.json"), (0, 0))
+    cache.put("new", {"bytecode": "0x" + "11" * 100})
+
+    assert sorted(os.listdir(str(tmp_path))) == ["new.json"]
+    assert cache.get("old") is None
+    assert cache.get("new") == {"bytecode": "0x" + "11" * 100}
@@ -0,0 +1,72 @@
+import copy
+
+import pytest
+
+from scripts.const import ZERO_ADDRESS
+from scripts.events import EventDecoder, get_decoder
+from scripts.utils import deploy, transact, vcompile
+
+
+def test_event_decoder_decodes_receipt_across_contracts(w3):
+    owner = w3.eth.accounts[0]
+    abc_compiled = vcompile("contracts/ABC.vy")
+    service_compiled = vcompile("contracts/TokenService.vy")
+
+    abc = w3.eth.contract(address=deploy(w3, abc_compiled), abi=abc_compiled["abi"])
+    receipt = transact(w3, abc.functions.createToken("Non-Fungible", True))
+    token_type = get_decoder(abc.abi).decode_receipt(receipt, "TransferSingle")[0].args._token_id
+
+    service = w3.eth.contract(
+        address=deploy(w3, service_compiled, abc.address, token_type),
+        abi=service_compiled["abi"],
+    )
+    transact(w3, abc.functions.setTokenService(service.address, token_type))
+    transact(w3, abc.functions.setMintTokenApproval(token_type, owner, True))
+    receipt = transact(
+        w3, abc.functions.mintNonFungibleToken(token_type, [owner] * 2 + [ZERO_ADDRESS] * 98)
+    )
+
+    decoder = EventDecoder().register(abc.abi, abc.address).register(service.abi, service.address)
+    events = decoder.decode_receipt(receipt)
+
+    assert len(events) == len(receipt.logs)
+    assert [e.logIndex for e in events] == [log.logIndex for log in receipt.logs]
+    assert {e.event for e in events if e.address == service.address} >= {
+        "EntryStateLog",
+        "ExitStateLog",
+    }
+    assert {e.event for e in events if e.address == abc.address} == {"TransferSingle"}
+
+    # Same result as scanning the receipt once per event type.
+    for contract in (abc, service):
+        for event in contract.events:
+            expected = event().processReceipt(receipt)
+            found = decoder.decode_receipt(receipt, event.event_name)
+            assert list(found) == list(expected)
+
+    # Logs from an address the decoder does not know are skipped.
+    assert EventDecoder().register(abc.abi, service.address).decode_receipt(receipt) == []
+
+
+def test_event_decoder_skips_logs_with_another_indexed_layout(w3):
+    abc_compiled = vcompile("contracts/ABC.vy")
+    abc = w3.eth.contract(address=deploy(w3, abc_compiled), abi=abc_compiled["abi"])
+    receipt = transact(w3, abc.functions.createToken("Non-Fungible", True))
+
+    # Same signature, and so the same topic, with none of its arguments indexed.
+    other_abi = copy.deepcopy(abc_compiled["abi"])
+    for abi in other_abi:
+        if abi.get("name") == "TransferSingle":
+            for param in abi["inputs"]:
+                param["indexed"] = False
+
+    with pytest.warns(UserWarning, match="TransferSingle"):
+        assert get_decoder(other_abi).decode_receipt(receipt, "TransferSingle") == []
+    assert len(get_decoder(abc_compiled["abi"]).decode_receipt(receipt, "TransferSingle")) == 1
+
+
+def test_get_decoder_shares_decoders_by_abi_content():
+    abi = vcompile("contracts/ABC.vy")["abi"]
+
+    assert get_decoder(abi) is get_decoder(copy.deepcopy(abi))
+    assert get_decoder(abi) is not get_decoder(vcompile("contracts/TokenService.vy")["abi"])
@@ -0,0 +1,35 @@
+from tests import conftest
+
+
+SOURCE_CODE = """
+counter: public(uint256)
+
+@public
+def bump(_by: uint256):
+    self.counter += _by
+"""
+
+
+def test_gas_estimate_is_computed_once_per_source(get_contract_with_gas_estimation, monkeypatch):
+    contract = get_contract_with_gas_estimation(SOURCE_CODE)
+
+    calls = []
+    gas_estimate = conftest.compiler.gas_estimate
+
+    def counting_gas_estimate(code, *args, **kwargs):
+        calls.append(code)
+        return gas_estimate(code, *args, **kwargs)
+
+    monkeypatch.setattr(conftest.compiler, "gas_estimate", counting_gas_estimate)
+    monkeypatch.setattr(conftest, "_gas_estimates", {})
+    monkeypatch.setattr(conftest, "_gas_records", {})
+
+    for value in (1, 2, 3):
+        contract.bump(value, transact={})
+
+    assert contract.counter() == 6
+    assert len(calls) == 1
+    ((source_hash, func), (estimate, actuals)), = conftest._gas_records.items()
+    assert func == "bump"
+    assert len(actuals) == 3
+    assert max(actuals) <= estimate
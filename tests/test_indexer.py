@@ -0,0 +1,56 @@
+from scripts.batching import pad_batch
+from scripts.const import ZERO_ADDRESS
+from scripts.indexer import TransferIndexer, to_uint_key
+from scripts.utils import deploy, transact, vcompile
+
+
+def test_indexer_streams_transfers_and_resumes(w3, tester, tmp_path):
+    owner, alice, bob = w3.eth.accounts[:3]
+    compiled_contract = vcompile("contracts/ABC.vy")
+    abc = w3.eth.contract(address=deploy(w3, compiled_contract), abi=compiled_contract["abi"])
+
+    transact(w3, abc.functions.createToken("Fungible", False))
+    token_id = 1 << 128
+    transact(
+        w3,
+        abc.functions.mintFungibleToken(
+            token_id, pad_batch([alice, bob], default_value=ZERO_ADDRESS), pad_batch([100, 50])
+        ),
+    )
+    db_path = str(tmp_path / "abc.db")
+    indexer = TransferIndexer(
+        w3, abc.address, db_path, abi=compiled_contract["abi"], chunk_size=2
+    )
+    assert indexer.sync() == 4
+    assert indexer.uri(token_id) == "Fungible"
+    assert [t[6] for t in indexer.transfers_of_token(token_id)] == [ZERO_ADDRESS, alice, bob]
+    indexer.close()
+
+    # A new indexer on the same file picks up from its checkpoint.
+    abc.functions.setApprovalForAll(bob, True).transact({"from": alice})
+    abc.functions.safeBatchTransferFrom(
+        alice, bob, pad_batch([token_id]), pad_batch([30]), b""
+    ).transact({"from": bob})
+
+    indexer = TransferIndexer(w3, abc.address, db_path, abi=compiled_contract["abi"])
+    assert indexer.sync() == 2
+    assert indexer.operators(alice) == {bob}
+    batch = indexer.transfers_from(alice)
+    assert len(batch) == 1
+    assert batch[0][7:] == (to_uint_key(token_id), to_uint_key(token_id), to_uint_key(30))
+    assert len(indexer.transfers_to(bob)) == 2
+    assert len(indexer.transfers_of_type(token_id)) == 4
+    assert indexer.sync() == 0
+
+    # Orphaned blocks are dropped and the replacement chain is indexed instead.
+    snapshot_id = tester.take_snapshot()
+    abc.functions.setApprovalForAll(bob, False).transact({"from": alice})
+    indexer.sync()
+    assert indexer.operators(alice) == set()
+
+    tester.revert_to_snapshot(snapshot_id)
+    tester.mine_blocks(2)
+    indexer.sync()
+    assert indexer.operators(alice) == {bob}
+    assert indexer.checkpoint[0] == w3.eth.blockNumber
+    indexer.close()
@@ -0,0 +1,66 @@
+from scripts.batching import pad_batch
+from scripts.const import ZERO_ADDRESS
+from scripts.ownership import OwnershipView
+from scripts.utils import deploy, transact, vcompile
+
+
+def test_ownership_view_follows_transfers_and_rolls_back(w3, tester):
+    owner, alice, bob = w3.eth.accounts[:3]
+    abc_compiled = vcompile("contracts/ABC.vy")
+    service_compiled = vcompile("contracts/TokenService.vy")
+    abc = w3.eth.contract(address=deploy(w3, abc_compiled), abi=abc_compiled["abi"])
+
+    token_type = 1 << 255 | 1 << 128
+    fungible_id = 2 << 128
+    nft_ids = [token_type | i for i in (1, 2, 3)]
+    transact(w3, abc.functions.createToken("Non-Fungible", True))
+    service = deploy(w3, service_compiled, abc.address, token_type)
+    transact(w3, abc.functions.setTokenService(service, token_type))
+    transact(w3, abc.functions.setMintTokenApproval(token_type, owner, True))
+    transact(
+        w3,
+        abc.functions.mintNonFungibleToken(
+            token_type, pad_batch([alice, alice, bob], default_value=ZERO_ADDRESS)
+        ),
+    )
+    transact(w3, abc.functions.createToken("Fungible", False))
+    transact(
+        w3,
+        abc.functions.mintFungibleToken(
+            fungible_id, pad_batch([alice], default_value=ZERO_ADDRESS), pad_batch([100])
+        ),
+    )
+
+    view = OwnershipView(w3, abc.address, abi=abc_compiled["abi"], max_depth=8)
+
+    def assert_matches_chain():
+        for token_id in nft_ids:
+            assert view.owner_of(token_id) == abc.functions.getNFTOwner(token_id).call()
+        for account in (owner, alice, bob):
+            for token_id in nft_ids + [token_type, fungible_id]:
+                on_chain = abc.functions.balanceOf(account, token_id).call()
+                assert view.balance_of(account, token_id) == on_chain
+
+    view.sync()
+    assert view.tokens_of(alice) == set(nft_ids[:2])
+    assert view.tokens_of(bob) == {nft_ids[2]}
+    assert_matches_chain()
+
+    snapshot_id = tester.take_snapshot()
+    abc.functions.safeTransferFrom(alice, bob, nft_ids[0], 1, b"").transact({"from": alice})
+    abc.functions.safeBatchTransferFrom(
+        alice, bob, pad_batch([nft_ids[1], fungible_id]), pad_batch([1, 30]), b""
+    ).transact({"from": alice})
+    view.sync()
+    assert view.tokens_of(alice) == set()
+    assert view.tokens_of(bob) == set(nft_ids)
+    assert view.balance_of(bob, fungible_id) == 30
+    assert_matches_chain()
+
+    tester.revert_to_snapshot(snapshot_id)
+    tester.mine_blocks(3)
+    view.sync()
+    assert view.head == (w3.eth.blockNumber, w3.eth.getBlock("latest").hash.hex())
+    assert view.tokens_of(alice) == set(nft_ids[:2])
+    assert view.balance_of(alice, fungible_id) == 100
+    assert_matches_chain()
@@ -0,0 +1,76 @@
+import json
+
+import pytest
+from web3 import HTTPProvider, Web3
+from web3.exceptions import TimeExhausted
+
+from scripts import receipts, rpc
+from scripts.receipts import ReceiptWaiter
+from scripts.utils import deploy_job, send_batch, vcompile
+
+
+def test_receipt_waiter_returns_receipts_in_order(w3):
+    compiled_contract = vcompile("contracts/ABC.vy")
+    results = send_batch(w3, [deploy_job(w3, compiled_contract) for _ in range(3)])
+    tx_hashes = [result["tx_hash"] for result in results]
+
+    waiter = ReceiptWaiter(w3)
+    found = waiter.wait(tx_hashes)
+
+    assert [r.transactionHash for r in found] == tx_hashes
+    assert waiter.pending == {}
+    assert waiter.rpc_calls == 3
+
+
+def test_receipt_waiter_batches_http_polls_with_backoff(monkeypatch):
+    tx_hashes = ["0x%064x" % i for i in range(1, 51)]
+    mined_after = {tx_hash: i % 3 for i, tx_hash in enumerate(tx_hashes)}
+    # Arrives after two empty polls, so the interval backs off before it shows up.
+    tx_hashes.append("0x%064x" % 100)
+    mined_after[tx_hashes[-1]] = 5
+    requests = []
+    sleeps = []
+
+    def fake_post(endpoint_uri, data, **kwargs):
+        batch = json.loads(data)
+        requests.append(batch)
+        poll = len(requests) - 1
+        return json.dumps(
+            [
+                {
+                    "jsonrpc": "2.0",
+                    "id": call["id"],
+                    "result": None
+                    if mined_after[call["params"][0]] > poll
+                    else {
+                        "transactionHash": call["params"][0],
+                        "blockNumber": hex(poll + 1),
+                        "status": "0x1",
+                        "gasUsed": "0x5208",
+                        "logs": [],
+                    },
+                }
+                for call in batch
+            ]
+        ).encode()
+
+    monkeypatch.setattr(rpc, "make_post_request", fake_post)
+    monkeypatch.setattr(receipts.time, "sleep", sleeps.append)
+
+    waiter = ReceiptWaiter(Web3(HTTPProvider("http://node.invalid")), min_poll=0.5, max_poll=2)
+    waiter.add_many(tx_hashes)
+    arrived = list(waiter.iter_receipts())
+
+    assert len(arrived) == 51
+    assert {tx_hash for tx_hash, _ in arrived} == set(tx_hashes)
+    assert all(receipt.status == 1 and receipt.gasUsed == 21000 for _, receipt in arrived)
+    assert [len(batch) for batch in requests] == [51, 34, 17, 1, 1, 1]
+    assert waiter.rpc_calls == 6
+    assert sleeps == [0.5, 0.5, 0.5, 1, 2]
+
+    waiter = ReceiptWaiter(Web3(HTTPProvider("http://node.invalid")), timeout=0, min_poll=0.5)
+    mined_after["0x%064x" % 99] = 100
+    waiter.add("0x%064x" % 99)
+    with pytest.raises(TimeExhausted):
+        list(waiter.iter_receipts())
+    assert len(waiter.pending) == 1
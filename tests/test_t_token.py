@@ -2,6 +2,10 @@ from datetime import datetime, timedelta
 from tests.utils import to_timestamp
 from dataclasses import dataclass
 from tests.utils import to_timestamp
+from scripts.batching import pad_batch
+from scripts.const import ZERO_ADDRESS
+from scripts.events import get_decoder
+from web3._utils.abi import filter_by_type
 
 import pytest
 
@@ -11,19 +15,15 @@ def printLogEvents(contract, tx_dict):
     #
     #   Would be really nice if we could discover the public method from the tx_dict. Anyone know how?
     #
-    ev = contract._classic_contract.events
+    # Every log is decoded once by topic, then reported under each event of the ABI.
+    events = get_decoder(contract._abi).group_receipt(tx_dict)
     print("\nLOG for transaction blockNumber: %s, total gas: %s" % (tx_dict.blockNumber,tx_dict.gasUsed))
-    for event in ev:
-        #print("event: %s = dir(event): %s\n" % (event, dir(event)))
-        #print("event(): %s\n" % event())
-        #print("event().event_name : %s" % event().event_name)
-        
-        receipt = event().processReceipt(tx_dict)
-        #print("receipt = %s\n" % str(receipt))
+    for event_abi in filter_by_type("event", contract._abi):
+        event_name = event_abi["name"]
+        receipt = events.get(event_name)
         receipt_text = ""
         if receipt:
             if len(receipt) == 1:
-                #receipt_text += "\tblockNumber : %s" % receipt[0].blockNumber
                 for x in receipt[0].args:
                     receipt_text += "\n\t\t%s : %s" % (x,receipt[0].args[x])
             else:
@@ -33,12 +33,7 @@ def printLogEvents(contract, tx_dict):
                         receipt_text += "\n\t\t%s) %s : %s" % (n,x,receipt[n].args[x])
         else:
             receipt_text += " : No incidents."
-        print("\tEVENT: %s %s\n" % (event().event_name, receipt_text))
-    #print("tx_dict = %s" % tx_dict)
-
-
-def resize(input_list, size, default_value=0):
-    return input_list[:size] + [default_value for _ in range(size - len(input_list))]
+        print("\tEVENT: %s %s\n" % (event_name, receipt_text))
 
 
 @pytest.fixture
@@ -114,7 +109,7 @@ def _get_available_token(w3, erc1155_contract, zero_address, get_contract, accou
     ## AO Create Token #1
     erc1155_contract.mintNonFungibleToken(
         token_type,
-        resize([accounts.to], BATCH_SIZE, default_value=zero_address),
+        pad_batch([accounts.to], BATCH_SIZE, default_value=zero_address),
         transact={"from": accounts.ao},
     )
 
@@ -124,9 +119,30 @@ def _get_available_token(w3, erc1155_contract, zero_address, get_contract, accou
     return erc1155_contract
 
 
+@pytest.fixture(scope="session")
+def available_token_world(session_w3, get_session_contract, get_session_logs):
+    # Deployed once per session; `available_token` rolls the chain back after each test.
+    accounts = demo_accounts(   ao=session_w3.eth.accounts[0],
+                                to= session_w3.eth.accounts[1],
+                                tco= session_w3.eth.accounts[2],
+                                wo= session_w3.eth.accounts[0]  )
+
+    with open("contracts/ABC.vy") as f:
+        erc1155_contract = get_session_contract(f.read())
+
+    return _get_available_token(
+        session_w3, erc1155_contract, ZERO_ADDRESS, get_session_contract, accounts, get_session_logs
+    )
+
+
+@pytest.fixture
+def available_token(available_token_world, tester):
+    return available_token_world
+
+
 
-def test_available_token(w3, erc1155_contract, zero_address, get_contract, accounts, assert_tx_failed, get_logs):
-    erc1155_contract = _get_available_token(w3, erc1155_contract, zero_address, get_contract, accounts, get_logs)
+def test_available_token(w3, available_token, zero_address, accounts, assert_tx_failed):
+    erc1155_contract = available_token
     accounts.tco = erc1155_contract.token_call_contract.address
     token_id = erc1155_contract.token_type | 1
     assert erc1155_contract.acs_contract.get_state(token_id) == 1
@@ -167,8 +183,8 @@ def test_available_token(w3, erc1155_contract, zero_address, get_contract, accou
 
 
 
-def test_get_optioned_token(w3, erc1155_contract, zero_address, get_contract, accounts, get_logs):
-    erc1155_contract = _get_available_token(w3, erc1155_contract, zero_address, get_contract, accounts, get_logs)
+def test_get_optioned_token(w3, available_token, zero_address, accounts):
+    erc1155_contract = available_token
     accounts.tco = erc1155_contract.token_call_contract.address
     token_id = erc1155_contract.token_type | 1
 
@@ -188,8 +204,8 @@ def test_get_optioned_token(w3, erc1155_contract, zero_address, get_contract, ac
     return erc1155_contract
 
 
-def test_get_applied_token(w3, erc1155_contract, zero_address, get_contract, accounts, get_logs):
-    erc1155_contract = _get_available_token(w3, erc1155_contract, zero_address, get_contract, accounts, get_logs)
+def test_get_applied_token(w3, available_token, accounts):
+    erc1155_contract = available_token
     accounts.tco = erc1155_contract.token_call_contract.address
     token_id = erc1155_contract.token_type | 1
 
@@ -201,8 +217,8 @@ def test_get_applied_token(w3, erc1155_contract, zero_address, get_contract, acc
     return erc1155_contract
 
 
-def test_get_processing_token(w3, erc1155_contract, zero_address, get_contract, accounts, get_logs):
-    erc1155_contract = test_get_applied_token(w3, erc1155_contract, zero_address, get_contract, accounts, get_logs)
+def test_get_processing_token(w3, available_token, accounts):
+    erc1155_contract = test_get_applied_token(w3, available_token, accounts)
     token_id = erc1155_contract.token_type | 1
 
     tx_hash = erc1155_contract.token_call_contract.docsSubmitted(token_id, transact={"from": accounts.ao})
@@ -213,8 +229,8 @@ def test_get_processing_token(w3, erc1155_contract, zero_address, get_contract,
     return erc1155_contract
 
 
-def test_get_approved_token(w3, erc1155_contract, zero_address, get_contract, accounts, get_logs):
-    erc1155_contract = test_get_processing_token(w3, erc1155_contract, zero_address, get_contract, accounts, get_logs)
+def test_get_approved_token(w3, available_token, accounts):
+    erc1155_contract = test_get_processing_token(w3, available_token, accounts)
     token_id = erc1155_contract.token_type | 1
 
     tx_hash = erc1155_contract.token_call_contract.userQualified(token_id, transact={"from": accounts.ao})
@@ -225,8 +241,8 @@ def test_get_approved_token(w3, erc1155_contract, zero_address, get_contract, ac
     return erc1155_contract
 
 
-def test_get_burned_token(w3, erc1155_contract, zero_address, get_contract, accounts, get_logs):
-    erc1155_contract = test_get_approved_token(w3, erc1155_contract, zero_address, get_contract, accounts,get_logs)
+def test_get_burned_token(w3, available_token, accounts):
+    erc1155_contract = test_get_approved_token(w3, available_token, accounts)
     token_id = erc1155_contract.token_type | 1
 
     assert erc1155_contract.token_call_contract.getState() == 4 # TC is closed
@@ -284,7 +300,7 @@ def test_full_token_happy_path(w3, erc1155_contract, zero_address, get_contract,
         ## AO Create Token #1
         tx_hash = erc1155_contract.mintNonFungibleToken(
             token_type,
-            resize([to_sender], BATCH_SIZE, default_value=zero_address),
+            pad_batch([to_sender], BATCH_SIZE, default_value=zero_address),
             transact={"from": ao_sender},
         )
         tx_dict = w3.eth.waitForTransactionReceipt(tx_hash)
@@ -312,7 +328,7 @@ def test_full_token_happy_path(w3, erc1155_contract, zero_address, get_contract,
 
         tx_hash = erc1155_contract.mintNonFungibleToken(
             token_type,
-            resize([to_sender], BATCH_SIZE, default_value=zero_address),
+            pad_batch([to_sender], BATCH_SIZE, default_value=zero_address),
             transact={"from": ao_sender},
         )
         tx_dict = w3.eth.waitForTransactionReceipt(tx_hash)
@@ -0,0 +1,60 @@
+from web3.exceptions import TimeExhausted
+
+from scripts.receipts import ReceiptWaiter
+from scripts.utils import (
+    TransactionReverted,
+    deploy_job,
+    send_batch,
+    send_jobs,
+    transact_job,
+    vcompile,
+    wait_for_jobs,
+)
+
+
+def test_send_batch_deploys_and_transacts_with_local_nonces(w3):
+    owner = w3.eth.accounts[0]
+    other = w3.eth.accounts[1]
+    compiled_contract = vcompile("contracts/ABC.vy")
+
+    results = send_batch(w3, [deploy_job(w3, compiled_contract) for _ in range(3)])
+
+    addresses = [result["contract_address"] for result in results]
+    assert all(result["error"] is None for result in results)
+    assert len(set(addresses)) == 3
+
+    abc = w3.eth.contract(address=addresses[0], abi=compiled_contract["abi"])
+    nonce_before = w3.eth.getTransactionCount(owner)
+    results = send_batch(
+        w3,
+        [
+            transact_job(abc.functions.createToken("first", True), **{"from": owner}),
+            # Fails gas estimation, so it is never sent and must not burn a nonce.
+            transact_job(abc.functions.setURI("nope", 1), **{"from": other}),
+            # Sent with explicit gas, so it is mined and reverts.
+            transact_job(abc.functions.setURI("nope", 1), **{"from": other, "gas": 100000}),
+            transact_job(abc.functions.createToken("second", False), **{"from": owner}),
+        ],
+    )
+
+    assert results[0]["error"] is None
+    assert results[1]["tx_hash"] is None and results[1]["error"] is not None
+    assert isinstance(results[2]["error"], TransactionReverted)
+    assert results[3]["error"] is None
+    assert abc.functions.nonce().call() == 2
+    assert w3.eth.getTransactionCount(owner) == nonce_before + 2
+
+
+def test_wait_for_jobs_reports_missing_receipts(w3, monkeypatch):
+    compiled_contract = vcompile("contracts/ABC.vy")
+    constructor, params = deploy_job(w3, compiled_contract)
+    assert "gasPrice" not in params
+    assert deploy_job(w3, compiled_contract, gasPrice=0)[1]["gasPrice"] == 0
+
+    results = send_jobs(w3, [(constructor, params)])
+    # The waiter stops without a receipt for the deploy and without raising.
+    monkeypatch.setattr(ReceiptWaiter, "iter_receipts", lambda self: iter(()))
+    wait_for_jobs(w3, results)
+
+    assert results[0]["receipt"] is None
+    assert isinstance(results[0]["error"], TimeExhausted)
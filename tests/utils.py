@@ -1,2 +1,149 @@
+from eth_utils import is_address, to_checksum_address
+from web3._utils.abi import filter_by_type
+from web3.contract import Contract, mk_collision_prop
+
+
 def to_timestamp(date):
     return int(date.timestamp())
+
+
+def build_abi_index(contract_abi):
+    # Maps each name to its ABI entry, built once per contract so plain calls
+    # are a dict lookup. Later entries win, so an overloaded name resolves to its last entry.
+    return {x["name"]: x for x in contract_abi if x.get("name")}
+
+
+def _abi_tables(contract_factory):
+    # The function names and ABI index of a web3 contract factory, built on first use and
+    # kept on the factory, so every contract bound from it shares them.
+    tables = contract_factory.__dict__.get("_concise_abi_tables")
+    if tables is None:
+        contract_abi = contract_factory.abi or []
+        tables = (
+            {x["name"] for x in filter_by_type("function", contract_abi)},
+            build_abi_index(contract_abi),
+        )
+        contract_factory._concise_abi_tables = tables
+    return tables
+
+
+class VyperMethod:
+    ALLOWED_MODIFIERS = {"call", "estimateGas", "transact", "buildTransaction"}
+
+    def __init__(self, function, normalizers=None, abi_index=None):
+        self._function = function
+        self._function._return_data_normalizers = normalizers
+        if abi_index is None:
+            abi_index = build_abi_index(function.contract_abi)
+        self._abi_index = abi_index
+
+    def __call__(self, *args, **kwargs):
+        return self.__prepared_function(*args, **kwargs)
+
+    def __prepared_function(self, *args, **kwargs):
+        if not kwargs:
+            modifier, modifier_dict = "call", {}
+            fn_abi = self._abi_index[self._function.function_identifier]
+            # To make tests faster just supply some high gas value.
+            modifier_dict.update({"gas": fn_abi.get("gas", 0) + 50000})
+        elif len(kwargs) == 1:
+            modifier, modifier_dict = kwargs.popitem()
+            if modifier not in self.ALLOWED_MODIFIERS:
+                raise TypeError(
+                    "The only allowed keyword arguments are: %s"
+                    % self.ALLOWED_MODIFIERS
+                )
+        else:
+            raise TypeError(
+                "Use up to one keyword argument, one of: %s" % self.ALLOWED_MODIFIERS
+            )
+
+        return getattr(self._function(*args), modifier)(modifier_dict)
+
+
+class VyperContract:
+
+    """
+    An alternative Contract Factory which invokes all methods as `call()`,
+    unless you add a keyword argument. The keyword argument assigns the prep method.
+
+    This call
+
+    > contract.withdraw(amount, transact={'from': eth.accounts[1], 'gas': 100000, ...})
+
+    is equivalent to this call in the classic contract:
+
+    > contract.functions.withdraw(amount).transact({'from': eth.accounts[1], 'gas': 100000, ...})
+    """
+
+    def __init__(self, classic_contract, method_class=VyperMethod, address=None):
+        # `classic_contract` is a web3 Contract, or a Contract factory class and the
+        # `address` to bind it at. A factory is only instantiated the first time the
+        # contract is used, since web3 builds objects for every ABI function and event.
+        self._method_class = method_class
+        self._abi = classic_contract.abi or []
+        self._fn_names, self._abi_index = _abi_tables(
+            classic_contract if isinstance(classic_contract, type) else type(classic_contract)
+        )
+
+        if isinstance(classic_contract, type) and is_address(address):
+            self._contract_factory = classic_contract
+            self._bound_contract = None
+            self.address = to_checksum_address(address)
+        else:
+            if isinstance(classic_contract, type):
+                classic_contract = classic_contract(address)
+            self._bind(classic_contract)
+
+        # Methods are created on first access in __getattr__. Only namespace
+        # collisions are set up front, since they shadow existing attributes.
+        for fn_name in self._fn_names:
+            if fn_name.endswith("__"):
+                continue
+            if fn_name in self.__dict__ or hasattr(type(self), fn_name):
+                setattr(self, fn_name, mk_collision_prop(fn_name))
+
+    def _bind(self, classic_contract):
+        classic_contract._return_data_normalizers += CONCISE_NORMALIZERS
+        self._bound_contract = classic_contract
+        self.address = classic_contract.address
+
+    @property
+    def _classic_contract(self):
+        if self._bound_contract is None:
+            self._bind(self._contract_factory(self.address))
+        return self._bound_contract
+
+    def __getattr__(self, fn_name):
+        # Only reached when normal lookup fails, i.e. the first time a method is used
+        # on this instance. The method is cached on the instance afterwards.
+        if "_abi" not in self.__dict__:
+            raise AttributeError(fn_name)
+
+        if fn_name not in self._fn_names:
+            raise AttributeError(
+                "%r object has no attribute %r" % (type(self).__name__, fn_name)
+            )
+
+        _concise_method = self._method_class(
+            getattr(self._classic_contract.functions, fn_name),
+            self._classic_contract._return_data_normalizers,
+            self._abi_index,
+        )
+        setattr(self, fn_name, _concise_method)
+        return _concise_method
+
+    @classmethod
+    def factory(cls, *args, **kwargs):
+        contract_factory = Contract.factory(*args, **kwargs)
+        return lambda address=None: cls(contract_factory, address=address)
+
+
+def _none_addr(datatype, data):
+    if datatype == "address" and int(data, base=16) == 0:
+        return (datatype, None)
+    else:
+        return (datatype, data)
+
+
+CONCISE_NORMALIZERS = (_none_addr,)